@@ -1,13 +1,26 @@
 # agent.py
 import asyncio
+import hashlib
+import os
 import threading
-from contextlib import asynccontextmanager
 
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-
+from langchain_core.messages import HumanMessage, AIMessage
+
+from app.agent.checkpoint.retention import maintenance_loop
+from app.agent.checkpoint.sqlite import SqliteCheckpointer
+from app.agent.config.config import (
+    CHECKPOINT_COMPACT_INTERVAL,
+    CHECKPOINT_DB_PATH,
+    CHECKPOINT_KEEP_TURNS,
+    CHECKPOINT_MAX_BATCH,
+    CHECKPOINT_READERS,
+    CHECKPOINT_VACUUM_FREE_RATIO,
+)
 from app.agent.state import AgentState
+from app.agent.streaming import astream_resume, astream_turn
+from app.agent.history import count_text_tokens
+from app.agent.vectorstore.vectorstore import aclose_vectorstore, aopen_vectorstore
 from app.agent.nodes import (
     router_node,
     rag_node,
@@ -20,42 +33,20 @@ from app.agent.nodes import (
 # 1. SQLITE CHECKPOINTER - GLOBAL INITIALIZATION
 # ============================================================
 
-# Initialize checkpointer synchronously at module level
-# This avoids the background thread complexity
+# One checkpointer per process, opened by startup(): WAL SQLite with a reader
+# pool and a single batching writer (see app/agent/checkpoint/sqlite.py).
+# Old checkpoints are pruned per thread and the file compacted in the background.
 checkpointer = None
+_maintenance: asyncio.Task | None = None
 
 
 def init_checkpointer():
-    """Initialize checkpointer in the main event loop"""
-    global checkpointer
-    import aiosqlite
-    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
-
-    class PoolWrapper:
-        """Wrapper to make aiosqlite.Connection compatible with LangGraph"""
-
-        def __init__(self, db_path):
-            self.db_path = db_path
-            self._conn = None
-
-        async def __aenter__(self):
-            self._conn = await aiosqlite.connect(self.db_path)
-            return self._conn
-
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            if self._conn:
-                await self._conn.close()
-
-        def is_alive(self):
-            """LangGraph checks this method"""
-            return self._conn is not None
-
-        def __getattr__(self, name):
-            """Delegate all other methods to the connection"""
-            return getattr(self._conn, name)
-
-    pool = PoolWrapper("N:/Dev/Langgraph-Project/Expense-Whatsapp/data/agent_state.db")
-    return AsyncSqliteSaver(pool)
+    return SqliteCheckpointer(
+        CHECKPOINT_DB_PATH,
+        readers=CHECKPOINT_READERS,
+        max_batch=CHECKPOINT_MAX_BATCH,
+        keep_turns=CHECKPOINT_KEEP_TURNS,
+    )
 
 
 # ============================================================
@@ -83,29 +74,114 @@ def should_continue(state: AgentState):
 
 
 # ============================================================
-# 3. BUILD AGENT
+# 3. COMPILED GRAPHS (built once, reused by every request)
 # ============================================================
+# Compiled graphs are cached per variant and shared: a compiled graph holds no
+# per-run state (that lives in the checkpointer, keyed by thread_id), so a
+# request only pays for executing it. The variant key is web search on/off;
+# without web search the web node is left out and "web" routes go to answer.
+#
+#   await startup()                          # checkpointer, vector store, all variants
+#   graph = get_graph(web_search_enabled)    # cached, thread-safe
+#   await shutdown()
+
+_graphs: dict[tuple, object] = {}
+_graphs_lock = threading.Lock()
+GRAPH_VARIANTS = ((True,), (False,))
+
+
+def thread_id_for(user_id: str) -> str:
+    """One graph thread per user"""
+    # Full digest: a shared thread would mean a shared expense history
+    return f"user-{hashlib.sha256(user_id.encode()).hexdigest()}"
 
 
-async def build_agent():
-    global checkpointer
+def get_graph(web_search_enabled: bool = True):
+    """Compiled graph for this variant (compiled on first use, then cached)"""
+    if checkpointer is None:
+        raise RuntimeError("Agent not started: await startup() first")
+    key = (bool(web_search_enabled),)
+    graph = _graphs.get(key)
+    if graph is None:
+        with _graphs_lock:
+            graph = _graphs.get(key)
+            if graph is None:
+                graph = build_graph(checkpointer, web_search_enabled=key[0])
+                _graphs[key] = graph
+                print(f"Compiled agent graph (web_search={key[0]})")
+    return graph
+
+
+async def startup():
+    """Open the checkpointer and vector store, then compile and warm up every variant"""
+    global checkpointer, _maintenance
 
-    # Initialize checkpointer if not already done
     if checkpointer is None:
         checkpointer = init_checkpointer()
-        # Open the connection pool
-        await checkpointer.conn.__aenter__()
-        # Setup tables
+        # Create tables, start the writer and open the reader pool
         await checkpointer.setup()
+        if CHECKPOINT_COMPACT_INTERVAL > 0:
+            _maintenance = asyncio.create_task(
+                maintenance_loop(
+                    checkpointer, CHECKPOINT_COMPACT_INTERVAL, CHECKPOINT_VACUUM_FREE_RATIO
+                )
+            )
+
+    # Check the RAG index and open its (async) connections once, off the hot path
+    try:
+        await aopen_vectorstore()
+    except Exception as e:
+        print(f"Vector store warm-up failed (will retry on first lookup): {e}")
+
+    # Tokenizer load is a one-off file read; do it before the first turn
+    await asyncio.to_thread(count_text_tokens, "warm up")
 
+    for (web_search_enabled,) in GRAPH_VARIANTS:
+        graph = get_graph(web_search_enabled)
+        # Resolves channel / node specs the first run would otherwise build
+        graph.get_graph()
+
+
+async def shutdown():
+    global checkpointer, _maintenance
+
+    if _maintenance is not None:
+        _maintenance.cancel()
+        # Let it unwind before the writer closes behind any queued compaction
+        try:
+            await _maintenance
+        except asyncio.CancelledError:
+            pass
+        _maintenance = None
+    with _graphs_lock:
+        _graphs.clear()
+    await aclose_vectorstore()
+    if checkpointer is not None:
+        await checkpointer.aclose()
+        checkpointer = None
+
+
+async def build_agent(web_search_enabled: bool = True):
+    """Start the agent (once) and return the cached compiled graph"""
+    await startup()
+    return get_graph(web_search_enabled)
+
+
+def build_graph(checkpointer, web_search_enabled: bool = True):
+    """Compile the agent graph (all nodes are async: run it with ainvoke / astream)"""
     graph = StateGraph(AgentState)
 
     graph.add_node("router", router_node)
     graph.add_node("rag_lookup", rag_node)
-    graph.add_node("web_search", web_search)
     graph.add_node("answer", answer_node)
     graph.add_node("tools", tool_node)
 
+    # Without web search the "web" route falls through to answer
+    web_target = "answer"
+    if web_search_enabled:
+        graph.add_node("web_search", web_search)
+        web_target = "web_search"
+
     graph.set_entry_point("router")
 
     graph.add_conditional_edges(
@@ -113,7 +189,7 @@ async def build_agent():
         from_router,
         {
             "rag": "rag_lookup",
-            "web": "web_search",
+            "web": web_target,
             "answer": "answer",
             "end": END,
         },
@@ -122,14 +198,15 @@ async def build_agent():
     graph.add_conditional_edges(
         "rag_lookup",
         after_rag,
-        {"web": "web_search", "answer": "answer"},
+        {"web": web_target, "answer": "answer"},
     )
 
-    graph.add_conditional_edges(
-        "web_search",
-        after_web,
-        {"answer": "answer"},
-    )
+    if web_search_enabled:
+        graph.add_conditional_edges(
+            "web_search",
+            after_web,
+            {"answer": "answer"},
+        )
 
     graph.add_conditional_edges(
         "answer",
@@ -153,11 +230,11 @@ async def build_agent():
 async def main():
     agent = await build_agent()
 
-    config = {
-        "configurable": {
-            "thread_id": "user-9a56df08",
-        }
-    }
+    # Expense tools are scoped to this user; without it they refuse to run
+    user_id = os.getenv("CLI_USER_ID")
+    if not user_id:
+        raise SystemExit("Set CLI_USER_ID to the user whose expenses the CLI should use")
+    config = {"configurable": {"thread_id": thread_id_for(user_id), "user_id": user_id}}
 
     initial_input = {
         "messages": [
@@ -167,44 +244,38 @@ async def main():
         ]
     }
 
-    # Run until pause or end
-    async for _ in agent.astream(initial_input, config, stream_mode="values"):
-        pass
-
-    snapshot = await agent.aget_state(config)
-
-    if snapshot.next:
-        last_ai_msg = snapshot.values["messages"][-1]
-        tool_call = last_ai_msg.tool_calls[0]
+    # Stream the reply token by token; pause for approval before tools run
+    stream = astream_turn(agent, initial_input, config)
+    while True:
+        pending = await _print_events(stream)
+        if pending is None:
+            break
 
         print("\n⚠️ PAUSED")
-        print("Tool:", tool_call["name"])
+        for tool_call in pending:
+            print("Tool:", tool_call["name"], tool_call["args"])
 
         approval = input("Approve? (yes/no): ").strip().lower()
-
-        if approval == "yes":
-            async for _ in agent.astream(None, config, stream_mode="values"):
-                pass
-        else:
-            await agent.aupdate_state(
-                config,
-                {
-                    "messages": [
-                        ToolMessage(
-                            tool_call_id=tool_call["id"],
-                            content="User denied execution. Ask for next steps.",
-                        )
-                    ]
-                },
-                as_node="tools",
-            )
-            async for _ in agent.astream(None, config, stream_mode="values"):
-                pass
-
-    final_state = await agent.aget_state(config)
-    print("\nFinal Assistant Response:")
-    print(final_state.values["messages"][-1].content)
-
+        stream = astream_resume(agent, config, approved=approval == "yes")
+    print()
+    await shutdown()
+
+
+async def _print_events(stream):
+    """Print a streamed turn; returns the tool calls awaiting approval, if any"""
+    print("\nAssistant: ", end="", flush=True)
+    async for event in stream:
+        if event.type in ("token", "message"):
+            print(event.text, end="", flush=True)
+        elif event.type == "status":
+            print(f"\n[{event.text}...]", flush=True)
+        elif event.type == "tool_call":
+            print(f"\n[tool call: {event.data['name']}]", flush=True)
+        elif event.type == "tool_result":
+            print(f"\n[{event.data['name']} finished]", flush=True)
+        elif event.type == "interrupt":
+            return event.data["tool_calls"]
+    return None
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.agent import nodes
+from app.agent.agent import build_graph
+from app.agent.llm.llms import RagJudge, RouteDecision
+
+# ======================================================
+# CONCURRENCY BENCHMARK
+# ======================================================
+# Runs many conversations at once through the real graph (router -> rag ->
+# judge -> answer) with the LLM, retrieval and web clients replaced by
+# fixed-latency fakes, so only the execution model is measured:
+#   async     clients awaited on the event loop (the current nodes)
+#   blocking  sync clients: every in-flight call holds an executor thread,
+#             which is what the previous sync nodes did under astream
+#
+#   python -m app.agent.benchmark --conversations 200 --llm-latency 0.4
+
+
+def _fake(latency: float, output, blocking: bool):
+    def call(_):
+        time.sleep(latency)
+        return output
+
+    async def acall(_):
+        await asyncio.sleep(latency)
+        return output
+
+    # Without afunc, RunnableLambda.ainvoke runs `call` in the default executor
+    return RunnableLambda(call) if blocking else RunnableLambda(call, afunc=acall)
+
+
+def _install_fakes(llm_latency: float, retrieval_latency: float, blocking: bool):
+    nodes.router_llm = _fake(llm_latency, RouteDecision(route="rag"), blocking)
+    nodes.judge_llm = _fake(llm_latency, RagJudge(sufficient=True), blocking)
+    nodes.answer_llm = _fake(llm_latency, AIMessage(content="Here is what the policy says."), blocking)
+
+    retrieval = _fake(retrieval_latency, ("Meals are reimbursable up to 500 per day.", 0.7), blocking)
+    web = _fake(retrieval_latency, "No results found", blocking)
+
+    async def rag_search(query, k=5):
+        return await retrieval.ainvoke(query)
+
+    async def web_search(query):
+        return await web.ainvoke(query)
+
+    nodes.arag_search_with_score = rag_search
+    nodes.aweb_search = web_search
+    # Measure the graph, not the caches / calibration log
+    nodes.get_semantic_cache = lambda: None
+    nodes.record_gate = lambda *args, **kwargs: None
+
+
+async def _conversation(graph, i: int) -> float:
+    config = {"configurable": {"thread_id": f"bench-{i}", "user_id": f"bench-{i}"}}
+    message = HumanMessage(content=f"What does the travel policy say about meal number {i}?")
+    start = time.perf_counter()
+    await graph.ainvoke({"messages": [message], "web_search_enabled": True}, config)
+    return time.perf_counter() - start
+
+
+async def run(
+    mode: str, conversations: int, llm_latency: float, retrieval_latency: float
+) -> dict:
+    _install_fakes(llm_latency, retrieval_latency, blocking=mode == "blocking")
+    graph = build_graph(InMemorySaver())
+
+    peak_threads = threading.active_count()
+    done = False
+
+    async def watch_threads():
+        nonlocal peak_threads
+        while not done:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    watcher = asyncio.create_task(watch_threads())
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(_conversation(graph, i) for i in range(conversations)))
+    wall = time.perf_counter() - start
+    done = True
+    await watcher
+
+    # One conversation alone: 3 LLM calls + 1 retrieval
+    ideal = 3 * llm_latency + retrieval_latency
+    return {
+        "mode": mode,
+        "conversations": conversations,
+        "wall_s": round(wall, 2),
+        "conversations_per_s": round(conversations / wall, 1),
+        "p50_s": round(statistics.median(latencies), 2),
+        "p95_s": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 2),
+        "single_conversation_s": round(ideal, 2),
+        "peak_threads": peak_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent conversations: async vs blocking clients")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="seconds per LLM call")
+    parser.add_argument("--retrieval-latency", type=float, default=0.15)
+    parser.add_argument("--modes", default="blocking,async")
+    args = parser.parse_args()
+
+    results = [
+        asyncio.run(run(mode, args.conversations, args.llm_latency, args.retrieval_latency))
+        for mode in args.modes.split(",")
+    ]
+    print(json.dumps(results, indent=2))
+
+    by_mode = {r["mode"]: r for r in results}
+    if {"async", "blocking"} <= by_mode.keys():
+        speedup = by_mode["blocking"]["wall_s"] / by_mode["async"]["wall_s"]
+        print(f"\nasync is {speedup:.1f}x faster for {args.conversations} concurrent conversations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from app.agent.config.config import (
+    DATA_DIR,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+)
+
+# ==============================
+# Semantic Cache
+# ==============================
+# Caches structured LLM outputs (RouteDecision, RagJudge) keyed by the
+# query embedding: a new query hits when its cosine similarity to a cached
+# one is above the threshold. Exact (normalized) repeats hit without
+# embedding at all. Entries expire after a TTL, the least recently used are
+# evicted, and everything is mirrored to SQLite so hits survive restarts.
+
+_WS = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WS.sub(" ", (text or "").strip().lower())
+
+
+def _key(text: str) -> str:
+    return hashlib.sha256(_normalize(text).encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("text", "vector", "value", "created_at", "last_used")
+
+    def __init__(self, text: str, vector: np.ndarray | None, value: dict, created_at: float):
+        self.text = text
+        self.vector = vector
+        self.value = value
+        self.created_at = created_at
+        self.last_used = created_at
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        path: str | None,
+        embed: Callable[[str], list[float]],
+        threshold: float = 0.93,
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 5000,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.RLock()
+        # namespace -> {key: _Entry}; namespaces are dropped once empty
+        self._entries: dict[str, dict[str, _Entry]] = {}
+        # (namespace, key) in least- to most-recently used order, across namespaces
+        self._lru: OrderedDict = OrderedDict()
+        # namespace -> (keys, matrix) built lazily for similarity search
+        self._matrix: dict[str, tuple[list[str], np.ndarray]] = {}
+        # A miss is usually followed by put() for the same text: embed once
+        self._recent_vectors: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS semantic_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    vector BLOB,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._db.commit()
+            self._load()
+
+    # --------------------
+    # Persistence
+    # --------------------
+    def _load(self):
+        cutoff = time.time() - self.ttl
+        self._db.execute("DELETE FROM semantic_cache WHERE created_at < ?", (cutoff,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT namespace, key, text, vector, value, created_at FROM semantic_cache"
+            " ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for namespace, key, text, vector, value, created_at in reversed(rows):
+            vec = np.frombuffer(vector, dtype=np.float32) if vector else None
+            self._entries.setdefault(namespace, {})[key] = _Entry(
+                text, vec, json.loads(value), created_at
+            )
+            self._lru[(namespace, key)] = None
+
+    def _persist(self, namespace: str, key: str, entry: _Entry):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO semantic_cache VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                namespace,
+                key,
+                entry.text,
+                entry.vector.tobytes() if entry.vector is not None else None,
+                json.dumps(entry.value),
+                entry.created_at,
+            ),
+        )
+        self._db.commit()
+
+    def _forget(self, namespace: str, key: str):
+        entries = self._entries.get(namespace)
+        if entries is not None:
+            entries.pop(key, None)
+            if not entries:
+                del self._entries[namespace]
+        self._lru.pop((namespace, key), None)
+        self._matrix.pop(namespace, None)
+        if self._db is not None:
+            self._db.execute(
+                "DELETE FROM semantic_cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            self._db.commit()
+
+    # --------------------
+    # Lookup
+    # --------------------
+    def _embed(self, text: str) -> np.ndarray | None:
+        key = _key(text)
+        with self._lock:
+            if key in self._recent_vectors:
+                return self._recent_vectors[key]
+
+        try:
+            vec = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception as e:
+            print(f"Semantic cache embedding failed: {e}")
+            return None
+        norm = np.linalg.norm(vec)
+        vec = vec / norm if norm else None
+
+        with self._lock:
+            self._recent_vectors[key] = vec
+            if len(self._recent_vectors) > 256:
+                self._recent_vectors.popitem(last=False)
+        return vec
+
+    def _expired(self, entry: _Entry) -> bool:
+        return time.time() - entry.created_at > self.ttl
+
+    def _nearest(self, namespace: str, vector: np.ndarray) -> tuple[str | None, float]:
+        entries = self._entries.get(namespace)
+        if not entries:
+            return None, 0.0
+
+        if namespace not in self._matrix:
+            keys = [k for k, e in entries.items() if e.vector is not None]
+            if not keys:
+                return None, 0.0
+            self._matrix[namespace] = (keys, np.stack([entries[k].vector for k in keys]))
+
+        keys, matrix = self._matrix[namespace]
+        if matrix.shape[1] != vector.shape[0]:
+            return None, 0.0
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return keys[best], float(scores[best])
+
+    def get(self, namespace: str, text: str) -> dict | None:
+        key = _key(text)
+
+        with self._lock:
+            entry = self._entries.get(namespace, {}).get(key)
+            if entry is not None and self._expired(entry):
+                self._forget(namespace, key)
+                entry = None
+            if entry is not None:
+                self._lru.move_to_end((namespace, key))
+                entry.last_used = time.time()
+                self.hits += 1
+                return entry.value
+            if not self._entries.get(namespace):
+                self.misses += 1
+                return None
+
+        # Embed outside the lock (network call)
+        vector = self._embed(text)
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            best_key, score = self._nearest(namespace, vector)
+            entry = self._entries.get(namespace, {}).get(best_key) if best_key else None
+            if entry is not None and self._expired(entry):
+                self._forget(namespace, best_key)
+                entry = None
+            if entry is None or score < self.threshold:
+                self.misses += 1
+                return None
+            self._lru.move_to_end((namespace, best_key))
+            entry.last_used = time.time()
+            self.hits += 1
+            self.semantic_hits += 1
+            print(f"Semantic cache hit [{namespace}] score={score:.3f}: {entry.text[:60]!r}")
+            return entry.value
+
+    def put(self, namespace: str, text: str, value: dict):
+        vector = self._embed(text)
+        key = _key(text)
+        entry = _Entry(text, vector, value, time.time())
+
+        with self._lock:
+            self._entries.setdefault(namespace, {})[key] = entry
+            self._lru[(namespace, key)] = None
+            self._lru.move_to_end((namespace, key))
+            self._matrix.pop(namespace, None)
+            self._persist(namespace, key, entry)
+
+            while len(self._lru) > self.max_entries:
+                # Evict the least recently used entry across namespaces
+                oldest_ns, oldest_key = next(iter(self._lru))
+                self._forget(oldest_ns, oldest_key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# ==============================
+# Shared Instance
+# ==============================
+
+_cache: SemanticCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache | None:
+    """Process-wide cache (None when disabled)."""
+    global _cache
+
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            from app.agent.vectorstore.vectorstore import embeddings
+
+            _cache = SemanticCache(
+                os.path.join(DATA_DIR, "semantic_cache.db"),
+                embed=embeddings.embed_query,
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                ttl=SEMANTIC_CACHE_TTL,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            )
+        return _cache
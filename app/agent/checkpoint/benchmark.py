@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+from langchain_core.messages import HumanMessage
+
+from app.agent.agent import build_graph
+from app.agent.benchmark import _install_fakes
+from app.agent.checkpoint.sqlite import SqliteCheckpointer
+
+# ======================================================
+# CHECKPOINTER BENCHMARK
+# ======================================================
+# Concurrent multi-turn conversations through the real graph with instant
+# fake LLM / retrieval clients, so checkpoint reads and writes dominate:
+#   aiosqlite  langgraph's AsyncSqliteSaver on one connection (previous setup)
+#   pooled     SqliteCheckpointer: WAL, reader pool, batching writer
+#
+#   python -m app.agent.checkpoint.benchmark --conversations 200 --turns 3
+#
+# The gain is modest and machine dependent. Measured pooled / aiosqlite
+# checkpoints per second, 3 turns: 0.9x-1.2x at 50 conversations and
+# 1.2x-1.5x at 200. Most of a step is graph overhead, not SQLite.
+
+
+@asynccontextmanager
+async def _saver(mode: str, path: str):
+    if mode == "aiosqlite":
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        async with AsyncSqliteSaver.from_conn_string(path) as saver:
+            await saver.setup()
+            yield saver
+    else:
+        saver = SqliteCheckpointer(path)
+        await saver.setup()
+        try:
+            yield saver
+        finally:
+            await saver.aclose()
+
+
+async def _conversation(graph, i: int, turns: int):
+    config = {"configurable": {"thread_id": f"bench-{i}", "user_id": f"bench-{i}"}}
+    for turn in range(turns):
+        message = HumanMessage(content=f"What does the travel policy say about item {i}-{turn}?")
+        await graph.ainvoke({"messages": [message], "web_search_enabled": True}, config)
+        # A client reading the thread back between turns (history / approval checks)
+        await graph.aget_state(config)
+
+
+async def run(mode: str, conversations: int, turns: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoints.db")
+        async with _saver(mode, path) as saver:
+            graph = build_graph(saver)
+            start = time.perf_counter()
+            await asyncio.gather(*(_conversation(graph, i, turns) for i in range(conversations)))
+            wall = time.perf_counter() - start
+            stats = saver.stats() if hasattr(saver, "stats") else {}
+
+        with sqlite3.connect(path) as conn:
+            checkpoints = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            writes = conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+
+    result = {
+        "mode": mode,
+        "conversations": conversations,
+        "turns": turns,
+        "wall_s": round(wall, 2),
+        "checkpoints": checkpoints,
+        "writes": writes,
+        "checkpoints_per_s": round(checkpoints / wall, 1),
+        "turns_per_s": round(conversations * turns / wall, 1),
+    }
+    if stats:
+        result["writes_per_transaction"] = stats["writes_per_transaction"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint throughput under concurrent conversations")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--modes", default="aiosqlite,pooled")
+    args = parser.parse_args()
+
+    _install_fakes(0.0, 0.0, blocking=False)
+    results = [
+        asyncio.run(run(mode, args.conversations, args.turns)) for mode in args.modes.split(",")
+    ]
+    print(json.dumps(results, indent=2))
+
+    by_mode = {r["mode"]: r for r in results}
+    if {"aiosqlite", "pooled"} <= by_mode.keys():
+        speedup = by_mode["pooled"]["checkpoints_per_s"] / by_mode["aiosqlite"]["checkpoints_per_s"]
+        print(f"\npooled writes {speedup:.1f}x more checkpoints per second")
+
+
+if __name__ == "__main__":
+    main()
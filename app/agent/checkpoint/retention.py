@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+
+# ==============================
+# Checkpoint Retention
+# ==============================
+# Every super-step writes a checkpoint holding the full state (messages, rag,
+# web), so an unpruned thread grows ~quadratically with its length. Retention
+# keeps, per thread:
+#   - the final checkpoint of each of the last `keep_turns` turns, and
+#   - every checkpoint of the turn in progress (needed to resume / approve)
+# A turn's final checkpoint is the one right before the next turn's "input"
+# checkpoint. Intermediate super-steps of finished turns, and older turns, are
+# deleted with their pending writes; kept checkpoints are re-linked so the
+# parent chain stays walkable. (Safe for this graph: no DeltaChannel state,
+# every checkpoint is a full snapshot.)
+#
+# The checkpointer prunes a thread when its next turn starts. Deleted pages are
+# reused by SQLite; compact() gives them back to the filesystem (VACUUM) once
+# enough of the file is free, from a periodic background task.
+#
+#   python -m app.agent.checkpoint.retention stats [--top 20]
+#   python -m app.agent.checkpoint.retention prune [--keep-turns 5]
+#   python -m app.agent.checkpoint.retention vacuum
+
+
+def prune_thread(conn: sqlite3.Connection, thread_id: str, keep_turns: int) -> int:
+    """Apply retention to one thread (inside the caller's transaction); returns checkpoints deleted."""
+    rows = conn.execute(
+        "SELECT checkpoint_id, metadata FROM checkpoints "
+        "WHERE thread_id = ? AND checkpoint_ns = '' ORDER BY checkpoint_id",
+        (thread_id,),
+    ).fetchall()
+    if len(rows) <= keep_turns:
+        return 0
+
+    ids = [checkpoint_id for checkpoint_id, _ in rows]
+    metadata = [json.loads(m) if m else {} for _, m in rows]
+    sources = [m.get("source") for m in metadata]
+    steps = [m.get("step") for m in metadata]
+
+    def ends_turn(i: int) -> bool:
+        if sources[i + 1] == "input":
+            return True
+        # Turn ends kept by an earlier pass lost their "input" successor; the
+        # step gap to the next survivor still marks them (steps are +1 per super-step)
+        return steps[i] is not None and steps[i + 1] is not None and steps[i + 1] != steps[i] + 1
+
+    # Start of the turn in progress: its checkpoints are all kept
+    current = max((i for i, source in enumerate(sources) if source == "input"), default=0)
+    turn_ends = [i for i in range(current) if ends_turn(i)]
+    keep = set(turn_ends[-keep_turns:] if keep_turns else []) | set(range(current, len(ids)))
+    drop = [ids[i] for i in range(len(ids)) if i not in keep]
+    if not drop:
+        return 0
+
+    for start in range(0, len(drop), 500):
+        chunk = drop[start : start + 500]
+        marks = ",".join("?" * len(chunk))
+        conn.execute(
+            f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+            f"AND checkpoint_id IN ({marks})",
+            (thread_id, *chunk),
+        )
+        conn.execute(
+            f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = '' "
+            f"AND checkpoint_id IN ({marks})",
+            (thread_id, *chunk),
+        )
+
+    # Re-link survivors to the previous survivor
+    kept = sorted(keep)
+    for previous, i in zip([None, *kept], kept):
+        conn.execute(
+            "UPDATE checkpoints SET parent_checkpoint_id = ? "
+            "WHERE thread_id = ? AND checkpoint_ns = '' AND checkpoint_id = ?",
+            (ids[previous] if previous is not None else None, thread_id, ids[i]),
+        )
+    return len(drop)
+
+
+def free_ratio(conn: sqlite3.Connection) -> float:
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return free / pages if pages else 0.0
+
+
+def compact(conn: sqlite3.Connection, min_free_ratio: float = 0.2) -> dict:
+    """Checkpoint the WAL and VACUUM if enough pages are free (outside any transaction)."""
+    before = free_ratio(conn)
+    vacuumed = before >= min_free_ratio
+    if vacuumed:
+        conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA optimize")
+    return {"free_ratio": round(before, 3), "vacuumed": vacuumed}
+
+
+async def maintenance_loop(checkpointer, interval: float, min_free_ratio: float):
+    """Background task: compact the checkpoint database every `interval` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await checkpointer.acompact(min_free_ratio)
+            print(f"Checkpoint compaction: {result}")
+        except Exception as e:
+            print(f"Checkpoint compaction failed: {e}")
+
+
+# --------------------
+# Storage report
+# --------------------
+def thread_storage(conn: sqlite3.Connection, top: int | None = None) -> list[dict]:
+    query = """
+        SELECT c.thread_id, c.checkpoints, c.bytes, COALESCE(w.writes, 0), COALESCE(w.bytes, 0)
+        FROM (
+            SELECT thread_id, COUNT(*) AS checkpoints,
+                   SUM(LENGTH(checkpoint) + COALESCE(LENGTH(metadata), 0)) AS bytes
+            FROM checkpoints GROUP BY thread_id
+        ) c
+        LEFT JOIN (
+            SELECT thread_id, COUNT(*) AS writes, SUM(COALESCE(LENGTH(value), 0)) AS bytes
+            FROM writes GROUP BY thread_id
+        ) w ON w.thread_id = c.thread_id
+        ORDER BY c.bytes + COALESCE(w.bytes, 0) DESC
+    """
+    params: tuple = ()
+    if top:
+        query += " LIMIT ?"
+        params = (top,)
+    return [
+        {
+            "thread_id": thread_id,
+            "checkpoints": checkpoints,
+            "checkpoint_bytes": checkpoint_bytes,
+            "writes": writes,
+            "write_bytes": write_bytes,
+        }
+        for thread_id, checkpoints, checkpoint_bytes, writes, write_bytes in conn.execute(
+            query, params
+        )
+    ]
+
+
+def database_storage(conn: sqlite3.Connection, path: str) -> dict:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    wal = f"{path}-wal"
+    return {
+        "path": path,
+        "file_bytes": pages * page_size,
+        "free_bytes": free * page_size,
+        "wal_bytes": os.path.getsize(wal) if os.path.exists(wal) else 0,
+        "threads": conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0],
+        "checkpoints": conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0],
+        "writes": conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0],
+    }
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1e6:.2f} MB"
+
+
+def main():
+    from app.agent.checkpoint.sqlite import connect
+    from app.agent.config.config import CHECKPOINT_DB_PATH, CHECKPOINT_KEEP_TURNS
+
+    parser = argparse.ArgumentParser(description="Checkpoint storage report and maintenance")
+    parser.add_argument("command", choices=["stats", "prune", "vacuum"])
+    parser.add_argument("--db", default=CHECKPOINT_DB_PATH)
+    parser.add_argument("--top", type=int, default=20, help="stats: largest N threads (0 = all)")
+    parser.add_argument("--keep-turns", type=int, default=CHECKPOINT_KEEP_TURNS)
+    parser.add_argument("--json", action="store_true", help="stats: print JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"no checkpoint database at {args.db}")
+    conn = connect(args.db, readonly=args.command == "stats")
+
+    if args.command == "stats":
+        database = database_storage(conn, args.db)
+        threads = thread_storage(conn, args.top or None)
+        if args.json:
+            print(json.dumps({"database": database, "threads": threads}, indent=2))
+            return
+        print(
+            f"{database['path']}: {_mb(database['file_bytes'])} "
+            f"({_mb(database['free_bytes'])} free, WAL {_mb(database['wal_bytes'])}), "
+            f"{database['threads']} threads, {database['checkpoints']} checkpoints, "
+            f"{database['writes']} writes"
+        )
+        print(f"\n{'thread_id':<40} {'checkpoints':>11} {'writes':>8} {'size':>12}")
+        for t in threads:
+            size = t["checkpoint_bytes"] + t["write_bytes"]
+            print(f"{t['thread_id']:<40} {t['checkpoints']:>11} {t['writes']:>8} {_mb(size):>12}")
+
+    elif args.command == "prune":
+        if args.keep_turns <= 0:
+            parser.error("--keep-turns must be positive")
+        thread_ids = [r[0] for r in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+        conn.execute("BEGIN IMMEDIATE")
+        deleted = sum(prune_thread(conn, t, args.keep_turns) for t in thread_ids)
+        conn.execute("COMMIT")
+        print(f"Deleted {deleted} checkpoints across {len(thread_ids)} threads")
+        print(compact(conn, min_free_ratio=0.0))
+
+    else:
+        print(compact(conn, min_free_ratio=0.0))
+
+
+if __name__ == "__main__":
+    main()
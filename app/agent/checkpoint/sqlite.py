@@ -0,0 +1,555 @@
+import asyncio
+import json
+import os
+import queue
+import random
+import sqlite3
+import threading
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, cast
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.sqlite.utils import (
+    load_pending_writes,
+    pending_writes_sql,
+    search_where,
+)
+
+from app.agent.checkpoint.retention import compact, prune_thread
+
+# ==============================
+# SQLite Checkpointer
+# ==============================
+# Drop-in replacement for langgraph's AsyncSqliteSaver built for many
+# concurrent conversations. It uses the same `checkpoints` / `writes` tables,
+# so existing databases keep working.
+#   - WAL journal with synchronous=NORMAL: readers never block the writer,
+#     and a commit appends to the WAL without an fsync of the main file.
+#     Trade-off: a process crash loses nothing, but an OS crash or power
+#     loss can roll back the last committed checkpoints (the database stays
+#     consistent; those turns resume from an earlier step)
+#   - one writer thread owns the only write connection. Writes queued while a
+#     transaction is committing are coalesced into the next one (group
+#     commit), so N conversations stepping at once cost ~1 commit, not N
+#   - a pool of read-only connections serves get_tuple / list in parallel
+# Writes are acknowledged after their transaction commits, so a read issued
+# after aput() returns always sees the checkpoint.
+# With keep_turns > 0, a thread's older checkpoints are pruned on the writer
+# when its next turn starts (see retention.py).
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # KiB
+    "PRAGMA mmap_size=268435456",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+SELECT_CHECKPOINT = (
+    "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+    "checkpoint, metadata FROM checkpoints"
+)
+
+INSERT_CHECKPOINT = (
+    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+    "parent_checkpoint_id, type, checkpoint, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+INSERT_WRITES = (
+    "INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, "
+    "channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_STOP = object()
+
+
+def connect(path: str, readonly: bool = False) -> sqlite3.Connection:
+    # Autocommit mode: transactions are opened explicitly with BEGIN
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if readonly:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    def __init__(
+        self,
+        path: str,
+        *,
+        readers: int = 4,
+        max_batch: int = 256,
+        keep_turns: int = 0,
+        serde: SerializerProtocol | None = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.readers = readers
+        self.max_batch = max_batch
+        self.keep_turns = keep_turns
+        self.is_setup = False
+        self._setup_lock = threading.Lock()
+        self._metrics: Counter = Counter()
+
+        # Writer: one thread, one connection, ops coalesced per transaction
+        self._writes: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+
+        # Readers: one read-only connection per pool thread
+        self._local = threading.local()
+        self._reader_conns: list[sqlite3.Connection] = []
+        self._read_pool: ThreadPoolExecutor | None = None
+
+    # --------------------
+    # Lifecycle
+    # --------------------
+    def _setup(self):
+        with self._setup_lock:
+            if self.is_setup:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+            conn = connect(self.path)
+            conn.executescript(SCHEMA)
+            # Databases created before `task_path` existed
+            try:
+                conn.execute("ALTER TABLE writes ADD COLUMN task_path TEXT NOT NULL DEFAULT ''")
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" not in str(e):
+                    raise
+
+            self._writer = threading.Thread(
+                target=self._write_loop, args=(conn,), name="checkpoint-writer", daemon=True
+            )
+            self._writer.start()
+            self._read_pool = ThreadPoolExecutor(
+                max_workers=self.readers, thread_name_prefix="checkpoint-read"
+            )
+            self.is_setup = True
+            print(f"Checkpointer ready: {self.path} (WAL, {self.readers} readers)")
+
+    async def setup(self) -> None:
+        await asyncio.to_thread(self._setup)
+
+    def close(self):
+        if self._writer is not None:
+            self._writes.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        if self._read_pool is not None:
+            self._read_pool.shutdown(wait=True)
+            self._read_pool = None
+        self._local = threading.local()
+        for conn in self._reader_conns:
+            conn.close()
+        self._reader_conns = []
+        self.is_setup = False
+
+    async def aclose(self):
+        await asyncio.to_thread(self.close)
+
+    # --------------------
+    # Writer
+    # --------------------
+    def _write_loop(self, conn: sqlite3.Connection):
+        op = self._writes.get()
+        while op is not _STOP:
+            fn, args, future, exclusive = op
+            if exclusive:
+                self._run_exclusive(conn, fn, args, future)
+                op = self._writes.get()
+                continue
+
+            # Everything queued while the last commit ran goes into this one
+            batch, op = [(fn, args, future)], None
+            while len(batch) < self.max_batch:
+                try:
+                    op = self._writes.get_nowait()
+                except queue.Empty:
+                    op = None
+                    break
+                if op is _STOP or op[3]:
+                    break
+                batch.append(op[:3])
+                op = None
+            self._commit(conn, batch)
+            if op is None:
+                op = self._writes.get()
+        conn.close()
+
+    def _run_exclusive(self, conn: sqlite3.Connection, fn: Callable, args: tuple, future: Future):
+        # Maintenance (VACUUM, WAL checkpoint) that cannot run inside a transaction
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(conn, *args))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _commit(self, conn: sqlite3.Connection, batch: list):
+        # Ops whose caller was cancelled are still written, just not resolved
+        batch = [
+            (fn, args, future if future.set_running_or_notify_cancel() else None)
+            for fn, args, future in batch
+        ]
+        done = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, future in batch:
+                # A savepoint per op: one bad write fails alone, not the batch
+                conn.execute("SAVEPOINT op")
+                try:
+                    result = fn(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    if future:
+                        future.set_exception(e)
+                    continue
+                conn.execute("RELEASE op")
+                done.append((future, result))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, future in batch:
+                if future and not future.done():
+                    future.set_exception(e)
+            return
+
+        self._metrics["transactions"] += 1
+        self._metrics["writes"] += len(batch)
+        for future, result in done:
+            if future:
+                future.set_result(result)
+
+    def _submit(self, fn: Callable, *args, exclusive: bool = False) -> Future:
+        if not self.is_setup:
+            self._setup()
+        future: Future = Future()
+        self._writes.put((fn, args, future, exclusive))
+        return future
+
+    # --------------------
+    # Readers
+    # --------------------
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path, readonly=True)
+            self._reader_conns.append(conn)
+        return conn
+
+    def _snapshot(self, fn: Callable, *args):
+        # One read transaction: the checkpoint and its writes come from the same snapshot
+        conn = self._reader()
+        conn.execute("BEGIN")
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.execute("COMMIT")
+
+    async def _read(self, fn: Callable, *args):
+        if not self.is_setup:
+            await self.setup()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._read_pool, self._snapshot, fn, *args
+        )
+
+    def _read_sync(self, fn: Callable, *args):
+        if not self.is_setup:
+            self._setup()
+        return self._read_pool.submit(self._snapshot, fn, *args).result()
+
+    # --------------------
+    # Queries (run on a connection)
+    # --------------------
+    def _tuple(self, conn: sqlite3.Connection, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata = row
+        writes = conn.execute(
+            pending_writes_sql(True), (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return CheckpointTuple(
+            {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            self.serde.loads_typed((type_, checkpoint)),
+            cast(CheckpointMetadata, json.loads(metadata) if metadata is not None else {}),
+            (
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            load_pending_writes(writes, self.serde),
+        )
+
+    def _get_tuple(self, conn: sqlite3.Connection, config: RunnableConfig):
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        if checkpoint_id := get_checkpoint_id(config):
+            row = conn.execute(
+                f"{SELECT_CHECKPOINT} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"{SELECT_CHECKPOINT} WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        return self._tuple(conn, row) if row else None
+
+    def _list(self, conn: sqlite3.Connection, config, filter, before, limit):
+        where, params = search_where(config, filter, before)
+        query = f"{SELECT_CHECKPOINT} {where} ORDER BY checkpoint_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (*params, limit)
+        return [self._tuple(conn, row) for row in conn.execute(query, params).fetchall()]
+
+    @staticmethod
+    def _put(conn: sqlite3.Connection, row: tuple):
+        conn.execute(INSERT_CHECKPOINT, row)
+
+    @staticmethod
+    def _put_writes(conn: sqlite3.Connection, query: str, rows: list[tuple]):
+        conn.executemany(query, rows)
+
+    @staticmethod
+    def _delete_thread(conn: sqlite3.Connection, thread_id: str):
+        conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+        conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def _prune(self, conn: sqlite3.Connection, thread_id: str):
+        deleted = prune_thread(conn, thread_id, self.keep_turns)
+        self._metrics["pruned"] += deleted
+
+    def _after_put(self, config, metadata):
+        # A new turn started: the previous one is complete and can be pruned.
+        # Queued behind the put, nobody waits on it, so failures are logged here
+        if self.keep_turns > 0 and (metadata or {}).get("source") == "input":
+            if not config["configurable"].get("checkpoint_ns"):
+                thread_id = str(config["configurable"]["thread_id"])
+                pruned = self._submit(self._prune, thread_id)
+                pruned.add_done_callback(lambda f: self._prune_done(f, thread_id))
+
+    def _prune_done(self, future: Future, thread_id: str):
+        if future.cancelled() or future.exception() is None:
+            return
+        self._metrics["prune_failed"] += 1
+        print(f"Checkpoint pruning failed for {thread_id}: {future.exception()}")
+
+    # --------------------
+    # Serialization (caller side, so the writer thread only does I/O)
+    # --------------------
+    def _checkpoint_row(self, config, checkpoint, metadata) -> tuple:
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        serialized_metadata = json.dumps(
+            get_checkpoint_metadata(config, metadata), ensure_ascii=False
+        ).encode("utf-8", "ignore")
+        return (
+            str(config["configurable"]["thread_id"]),
+            config["configurable"]["checkpoint_ns"],
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            type_,
+            blob,
+            serialized_metadata,
+        )
+
+    def _writes_rows(self, config, writes, task_id, task_path) -> tuple[str, list[tuple]]:
+        verb = (
+            "INSERT OR REPLACE"
+            if all(w[0] in WRITES_IDX_MAP for w in writes)
+            else "INSERT OR IGNORE"
+        )
+        rows = [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                task_path,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        return f"{verb} {INSERT_WRITES}", rows
+
+    @staticmethod
+    def _saved_config(config, checkpoint) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": config["configurable"]["thread_id"],
+                "checkpoint_ns": config["configurable"]["checkpoint_ns"],
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    # --------------------
+    # Async interface (used by the graph)
+    # --------------------
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await self._read(self._get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in await self._read(self._list, config, filter, before, limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        row = self._checkpoint_row(config, checkpoint, metadata)
+        written = self._submit(self._put, row)
+        self._after_put(config, metadata)
+        await asyncio.wrap_future(written)
+        return self._saved_config(config, checkpoint)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        query, rows = self._writes_rows(config, writes, task_id, task_path)
+        await asyncio.wrap_future(self._submit(self._put_writes, query, rows))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.wrap_future(self._submit(self._delete_thread, str(thread_id)))
+
+    # --------------------
+    # Sync interface (same pools; safe from any thread)
+    # --------------------
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self._read_sync(self._get_tuple, config)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        yield from self._read_sync(self._list, config, filter, before, limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        row = self._checkpoint_row(config, checkpoint, metadata)
+        written = self._submit(self._put, row)
+        self._after_put(config, metadata)
+        written.result()
+        return self._saved_config(config, checkpoint)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        query, rows = self._writes_rows(config, writes, task_id, task_path)
+        self._submit(self._put_writes, query, rows).result()
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._submit(self._delete_thread, str(thread_id)).result()
+
+    async def acompact(self, min_free_ratio: float = 0.2) -> dict:
+        """VACUUM (if min_free_ratio of the file is free) and truncate the WAL, on the writer"""
+        return await asyncio.wrap_future(
+            self._submit(compact, min_free_ratio, exclusive=True)
+        )
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same version format as langgraph's sqlite savers
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> dict:
+        transactions = self._metrics["transactions"]
+        return {
+            "path": self.path,
+            "transactions": transactions,
+            "writes": self._metrics["writes"],
+            "pruned": self._metrics["pruned"],
+            "prune_failed": self._metrics["prune_failed"],
+            "writes_per_transaction": round(self._metrics["writes"] / transactions, 2)
+            if transactions
+            else 0.0,
+            "queued": self._writes.qsize(),
+        }
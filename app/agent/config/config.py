@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,3 +11,114 @@ TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME")
+
+# MCP servers (stdio)
+PROJECT_ROOT = os.getenv(
+    "PROJECT_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")),
+)
+MCP_PYTHON = os.getenv("MCP_PYTHON", sys.executable)
+
+# Max concurrent warm sessions kept per MCP server
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "4"))
+# Idle sessions older than this (seconds) are pinged before reuse
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+MCP_HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT", "5"))
+
+# "stdio" runs each MCP server as a subprocess (isolation),
+# "inprocess" calls the same tools directly in this process
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_INPROCESS_WORKERS = int(os.getenv("MCP_INPROCESS_WORKERS", "8"))
+
+# Compact tool results sent back to the LLM
+COMPACT_TOOL_RESULTS = os.getenv("COMPACT_TOOL_RESULTS", "true").lower() == "true"
+TOOL_RESULT_MAX_ROWS = int(os.getenv("TOOL_RESULT_MAX_ROWS", "25"))
+TOOL_RESULT_DROP_COLUMNS = {"user_id", "created_at", "updated_at"}
+
+# Rule-based pre-router in front of router_llm
+FAST_ROUTER_ENABLED = os.getenv("FAST_ROUTER_ENABLED", "true").lower() == "true"
+FAST_ROUTER_CLASSIFIER = os.getenv("FAST_ROUTER_CLASSIFIER", "false").lower() == "true"
+FAST_ROUTER_CLASSIFIER_THRESHOLD = float(
+    os.getenv("FAST_ROUTER_CLASSIFIER_THRESHOLD", "2.5")
+)
+
+# Local data directory (caches, indexes, checkpoints)
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(PROJECT_ROOT, "data"))
+
+# Embedding-keyed cache for router / RAG judge decisions
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", str(7 * 24 * 3600)))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+
+# Query / document embedding cache (memory LRU + memory-mapped float32 file)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "4096"))
+
+# Embedding size (gemini-embedding-001 supports truncated outputs, e.g. 768 / 1536 / 3072).
+# Each dimension gets its own index and embedding cache.
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "3072"))
+
+# RAG vector backend: "pinecone" (remote) or "local" (numpy / mmap index in DATA_DIR)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # float32 | int8 | binary
+# int8 / binary: re-score the top k * LOCAL_INDEX_RERANK hits with float32 vectors
+# (0 = off, unset = 4 for int8, 10 for binary)
+LOCAL_INDEX_RERANK = (
+    int(os.environ["LOCAL_INDEX_RERANK"]) if os.getenv("LOCAL_INDEX_RERANK") else None
+)
+# Train IVF partitions once the local index has this many rows (0 = never)
+LOCAL_INDEX_IVF_MIN_ROWS = int(os.getenv("LOCAL_INDEX_IVF_MIN_ROWS", "50000"))
+LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))
+
+# Hybrid retrieval: BM25 index built at ingestion, fused with dense results (RRF)
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+# Decide RAG sufficiency from the top retrieval score, judge_llm only in between
+RAG_SCORE_GATING = os.getenv("RAG_SCORE_GATING", "true").lower() == "true"
+RAG_SCORE_HIGH = float(os.getenv("RAG_SCORE_HIGH", "0.80"))  # >= : sufficient
+RAG_SCORE_LOW = float(os.getenv("RAG_SCORE_LOW", "0.55"))  # < : not sufficient
+# JSON lines of (score, gate decision, judge verdict) for threshold calibration ("" = off).
+# Contains user queries; rotated at RAG_GATE_LOG_MAX_BYTES, one previous file kept
+RAG_GATE_LOG = os.getenv("RAG_GATE_LOG", "")
+RAG_GATE_LOG_MAX_BYTES = int(os.getenv("RAG_GATE_LOG_MAX_BYTES", str(10 * 2**20)))
+
+# Start RAG (and web, when enabled) retrieval while the router is still deciding
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+SPECULATIVE_WEB = os.getenv("SPECULATIVE_WEB", "true").lower() == "true"
+SPECULATIVE_TTL = float(os.getenv("SPECULATIVE_TTL", "120"))
+
+# Answer prompt history: recent turns within HISTORY_MAX_TOKENS; once exceeded,
+# older turns are summarized until HISTORY_COMPACT_TO tokens of turns remain
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "4000"))
+HISTORY_COMPACT_TO = int(os.getenv("HISTORY_COMPACT_TO", "2000"))
+HISTORY_TOKENIZER = os.getenv("HISTORY_TOKENIZER", "cl100k_base")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama-3.1-8b-instant")
+
+# HTTP service (app/main.py): turns run on SERVICE_WORKERS async workers; at most
+# SERVICE_QUEUE_SIZE turns wait overall and SERVICE_USER_QUEUE_SIZE per user
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "32"))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "256"))
+SERVICE_USER_QUEUE_SIZE = int(os.getenv("SERVICE_USER_QUEUE_SIZE", "3"))
+SERVICE_QUEUE_TIMEOUT = float(os.getenv("SERVICE_QUEUE_TIMEOUT", "30"))
+SERVICE_TURN_TIMEOUT = float(os.getenv("SERVICE_TURN_TIMEOUT", "120"))
+# Caller identity (app/auth.py): bearer tokens signed with SERVICE_AUTH_SECRET,
+# webhook bodies signed with SERVICE_WEBHOOK_SECRET. Unset = requests refused
+SERVICE_AUTH_SECRET = os.getenv("SERVICE_AUTH_SECRET", "")
+SERVICE_TOKEN_TTL = int(os.getenv("SERVICE_TOKEN_TTL", str(30 * 24 * 3600)))
+SERVICE_WEBHOOK_SECRET = os.getenv("SERVICE_WEBHOOK_SECRET", "")
+
+# Checkpointer (app/agent/checkpoint/sqlite.py): WAL database, a pool of reader
+# connections and one writer that commits up to CHECKPOINT_MAX_BATCH queued writes at once
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", os.path.join(DATA_DIR, "agent_state.db"))
+CHECKPOINT_READERS = int(os.getenv("CHECKPOINT_READERS", "4"))
+CHECKPOINT_MAX_BATCH = int(os.getenv("CHECKPOINT_MAX_BATCH", "256"))
+
+# Checkpoint retention: keep the final checkpoint of the last CHECKPOINT_KEEP_TURNS
+# turns per thread (0 keeps everything); compact every CHECKPOINT_COMPACT_INTERVAL
+# seconds (0 disables), running VACUUM once CHECKPOINT_VACUUM_FREE_RATIO of the file is free
+CHECKPOINT_KEEP_TURNS = int(os.getenv("CHECKPOINT_KEEP_TURNS", "5"))
+CHECKPOINT_COMPACT_INTERVAL = float(os.getenv("CHECKPOINT_COMPACT_INTERVAL", "3600"))
+CHECKPOINT_VACUUM_FREE_RATIO = float(os.getenv("CHECKPOINT_VACUUM_FREE_RATIO", "0.2"))
@@ -0,0 +1,120 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+
+from app.agent.config.config import HISTORY_TOKENIZER
+
+# ==============================
+# Token-Budgeted History
+# ==============================
+# The answer prompt carries the most recent turns that fit a token budget.
+# Counting uses a tiktoken encoding (Llama 3's tokenizer is derived from
+# cl100k, so counts are close) loaded once, and each message's count is
+# memoized, so a turn only tokenizes the messages it added. Turns that fall
+# out of the window are folded into a rolling summary kept in AgentState and
+# removed from the checkpointed history, so both stay bounded.
+
+# Role / separator tokens added per message by the chat template
+MESSAGE_OVERHEAD = 4
+
+_cache_lock = threading.Lock()
+_counts: OrderedDict = OrderedDict()
+_MAX_CACHED = 20000
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(HISTORY_TOKENIZER)
+    except Exception as e:
+        print(f"Tokenizer {HISTORY_TOKENIZER} unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        content += json.dumps(
+            [{"name": c["name"], "args": c["args"]} for c in message.tool_calls], default=str
+        )
+    return content
+
+
+def count_text_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Token count of one message (memoized on id + content)."""
+    text = _text(message)
+    key = (message.id, message.type, len(text), hash(text))
+    with _cache_lock:
+        count = _counts.get(key)
+        if count is not None:
+            _counts.move_to_end(key)
+            return count
+
+    count = count_text_tokens(text) + MESSAGE_OVERHEAD
+    with _cache_lock:
+        _counts[key] = count
+        if len(_counts) > _MAX_CACHED:
+            _counts.popitem(last=False)
+    return count
+
+
+def count_tokens(messages: list[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def split_history(
+    messages: list[BaseMessage], max_tokens: int
+) -> tuple[list[BaseMessage], list[BaseMessage]]:
+    """
+    (older, recent): recent is the longest suffix within max_tokens that starts
+    on a HumanMessage, so tool calls are never separated from their results.
+    The latest human turn is always kept, even when it alone exceeds the budget.
+    """
+    history = [m for m in messages if not isinstance(m, SystemMessage)]
+    starts = [i for i, m in enumerate(history) if isinstance(m, HumanMessage)]
+    if not starts:
+        return [], history
+
+    cut = starts[-1]
+    total = count_tokens(history[cut:])
+    for start in reversed(starts[:-1]):
+        turn = count_tokens(history[start:cut])
+        if total + turn > max_tokens:
+            break
+        total += turn
+        cut = start
+    return history[:cut], history[cut:]
+
+
+def format_for_summary(messages: list[BaseMessage], max_chars: int = 1500) -> str:
+    lines = []
+    for m in messages:
+        text = _text(m)
+        if len(text) > max_chars:
+            text = text[:max_chars] + " ..."
+        lines.append(f"{m.type}: {text}")
+    return "\n".join(lines)
+
+
+def remove_messages(messages: list[BaseMessage]) -> list[RemoveMessage]:
+    return [RemoveMessage(id=m.id) for m in messages if m.id]
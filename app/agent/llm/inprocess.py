@@ -0,0 +1,100 @@
+# ==============================
+# Imports
+# ==============================
+
+import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult, ListToolsResult, TextContent
+
+
+# ==============================
+# In-Process Session
+# ==============================
+# Runs FastMCP tools directly in this process: same tool registry,
+# same input schemas and same argument validation as the stdio server,
+# minus the JSON-RPC round trip and the process hop.
+
+
+def _call_sync(tool, arguments: dict):
+    """Validate arguments exactly like FastMCP does, then call the tool body."""
+    meta = tool.fn_metadata
+    parsed = meta.arg_model.model_validate(meta.pre_parse_json(arguments))
+    return tool.fn(**parsed.model_dump_one_level())
+
+
+class InProcessSession:
+    """
+    Quacks like mcp.ClientSession for the adapter tools,
+    but dispatches straight to a FastMCP server object.
+    """
+
+    def __init__(self, server: FastMCP, executor: ThreadPoolExecutor):
+        self.server = server
+        self.executor = executor
+
+    async def list_tools(self, *args, **kwargs) -> ListToolsResult:
+        return ListToolsResult(tools=await self.server.list_tools())
+
+    async def call_tool(self, name: str, arguments: dict | None = None, **kwargs):
+        tool = self.server._tool_manager.get_tool(name)
+        if tool is None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Unknown tool: {name}")],
+                isError=True,
+            )
+
+        try:
+            if tool.is_async:
+                result = await tool.fn_metadata.call_fn_with_arg_validation(
+                    tool.fn, True, arguments or {}, None
+                )
+            else:
+                # Sync bodies (supabase calls) go to the thread pool
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.executor, partial(_call_sync, tool, arguments or {})
+                )
+            converted = tool.fn_metadata.convert_result(result)
+        except Exception as e:
+            return CallToolResult(
+                content=[
+                    TextContent(type="text", text=f"Error executing tool {name}: {e}")
+                ],
+                isError=True,
+            )
+
+        if isinstance(converted, CallToolResult):
+            return converted
+        if isinstance(converted, tuple):
+            content, structured = converted
+            return CallToolResult(content=list(content), structuredContent=structured)
+        return CallToolResult(content=list(converted))
+
+
+# ==============================
+# Tool Loader
+# ==============================
+
+
+async def load_inprocess_tools(
+    server_modules: dict[str, str], executor: ThreadPoolExecutor
+) -> list[BaseTool]:
+    """
+    Import each MCP server module and adapt its FastMCP tools
+    into LangChain tools executed in this process.
+    """
+    tools: list[BaseTool] = []
+    for name, module_path in server_modules.items():
+        server = importlib.import_module(module_path).mcp
+        tools.extend(
+            await load_mcp_tools(
+                InProcessSession(server, executor), server_name=name
+            )
+        )
+    return tools
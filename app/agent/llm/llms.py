@@ -4,14 +4,29 @@
 
 from typing import Literal
 import asyncio
+import atexit
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from pydantic import BaseModel, Field
 from langchain_groq import ChatGroq
+from langgraph.constants import TAG_NOSTREAM
 from langchain_core.tools import BaseTool
-from langchain_mcp_adapters.client import MultiServerMCPClient
 
-from app.agent.config.config import GEMINI_API_KEY, GROQ_API_KEY
+from app.agent.config.config import (
+    GEMINI_API_KEY,
+    GROQ_API_KEY,
+    MCP_HEALTH_CHECK_INTERVAL,
+    MCP_HEALTH_CHECK_TIMEOUT,
+    MCP_INPROCESS_WORKERS,
+    MCP_POOL_SIZE,
+    MCP_PYTHON,
+    MCP_TRANSPORT,
+    PROJECT_ROOT,
+    SUMMARY_MODEL,
+)
+from app.agent.llm.inprocess import load_inprocess_tools
+from app.agent.llm.mcp_sessions import MCPSessionManager
 
 
 # ==============================
@@ -68,21 +83,45 @@ class RagJudge(BaseModel):
 # MCP Client Configuration
 # ==============================
 
-client = MultiServerMCPClient(
-    {
-        "Expense Server": {
-            "transport": "stdio",
-            "command": "N:\\Dev\\Langgraph-Project\\Expense-Whatsapp\\venv\\Scripts\\python.exe",
-            "args": ["-m", "app.mcp.expense_server"],
-            "env": {"PYTHONPATH": "N:\\Dev\\Langgraph-Project\\Expense-Whatsapp"},
-        },
-        "Analytics Server": {
-            "transport": "stdio",
-            "command": "N:\\Dev\\Langgraph-Project\\Expense-Whatsapp\\venv\\Scripts\\python.exe",
-            "args": ["-m", "app.mcp.analytics_server"],
-            "env": {"PYTHONPATH": "N:\\Dev\\Langgraph-Project\\Expense-Whatsapp"},
-        },
+MCP_SERVER_MODULES = {
+    "Expense Server": "app.mcp.expense_server",
+    "Analytics Server": "app.mcp.analytics_server",
+}
+
+MCP_CONNECTIONS = {
+    name: {
+        "transport": "stdio",
+        "command": MCP_PYTHON,
+        "args": ["-m", module],
+        "env": {"PYTHONPATH": PROJECT_ROOT},
     }
+    for name, module in MCP_SERVER_MODULES.items()
+}
+
+# Long-lived, pooled sessions (one warm server process per server,
+# grown up to MCP_POOL_SIZE under concurrent tool calls)
+session_manager = MCPSessionManager(
+    MCP_CONNECTIONS,
+    loop=_ASYNC_LOOP,
+    pool_size=MCP_POOL_SIZE,
+    health_check_interval=MCP_HEALTH_CHECK_INTERVAL,
+    health_check_timeout=MCP_HEALTH_CHECK_TIMEOUT,
+)
+
+
+def shutdown_mcp_sessions():
+    """Close every pooled MCP session (terminates server processes)."""
+    try:
+        _submit_async(session_manager.aclose()).result(timeout=10)
+    except Exception as e:
+        print(f"MCP shutdown error: {e}")
+
+
+atexit.register(shutdown_mcp_sessions)
+
+# Thread pool for sync tool bodies in "inprocess" transport mode
+_TOOL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=MCP_INPROCESS_WORKERS, thread_name_prefix="mcp-tool"
 )
 
 
@@ -100,9 +139,13 @@ def load_mcp_tools() -> list[BaseTool]:
     and adapt them into LangChain tools.
     """
     try:
-        tools = run_async(client.get_tools())
+        if MCP_TRANSPORT == "inprocess":
+            tools = run_async(load_inprocess_tools(MCP_SERVER_MODULES, _TOOL_EXECUTOR))
+        else:
+            run_async(session_manager.start())
+            tools = run_async(session_manager.get_tools())
 
-        print("\n=== MCP TOOLS LOADED ===")
+        print(f"\n=== MCP TOOLS LOADED ({MCP_TRANSPORT}) ===")
         for t in tools:
             print(f"- {t.name}")
         print("=======================\n")
@@ -124,13 +167,15 @@ tools = [*mcp_tools]
 # ==============================
 # LLM Configuration
 # ==============================
+# Only answer_llm streams tokens to the user; internal calls are tagged
+# TAG_NOSTREAM so stream_mode="messages" skips them.
 
 # Router LLM (decides RAG / web / direct answer)
 router_llm = ChatGroq(
     model="llama-3.3-70b-versatile",
     temperature=0,
     api_key=GROQ_API_KEY,
-).with_structured_output(RouteDecision)
+).with_structured_output(RouteDecision).with_config(tags=[TAG_NOSTREAM])
 
 
 # RAG Judge LLM (checks context sufficiency)
@@ -138,7 +183,7 @@ judge_llm = ChatGroq(
     model="llama-3.3-70b-versatile",
     temperature=0,
     api_key=GROQ_API_KEY,
-).with_structured_output(RagJudge)
+).with_structured_output(RagJudge).with_config(tags=[TAG_NOSTREAM])
 
 
 # Final Answer LLM (tool-enabled)
@@ -147,3 +192,11 @@ answer_llm = ChatGroq(
     temperature=0.7,
     api_key=GROQ_API_KEY,
 ).bind_tools(tools=tools)
+
+
+# Summary LLM (folds old turns into the rolling conversation summary)
+summary_llm = ChatGroq(
+    model=SUMMARY_MODEL,
+    temperature=0,
+    api_key=GROQ_API_KEY,
+).with_config(tags=[TAG_NOSTREAM])
@@ -0,0 +1,284 @@
+# ==============================
+# Imports
+# ==============================
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+
+# ==============================
+# Warm Session
+# ==============================
+# A stdio session has to be opened and closed by the same task
+# (anyio cancel scopes), so each one is owned by a long-lived task
+# that parks until it is told to close.
+
+
+class WarmSession:
+    """One long-lived MCP session (one server subprocess)."""
+
+    def __init__(self, server_name: str, connection: dict):
+        self.server_name = server_name
+        self.connection = connection
+        self.session = None
+        self.error: BaseException | None = None
+        self.last_used = 0.0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        self.last_used = time.monotonic()
+        return self
+
+    async def _run(self):
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    async def ping(self, timeout: float) -> bool:
+        """Health check: round trip a ping to the server."""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self, timeout: float = 5.0):
+        self._closing.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+
+
+# ==============================
+# Per-Server Pool
+# ==============================
+
+
+class ServerPool:
+    """Bounded pool of warm sessions for one MCP server."""
+
+    def __init__(
+        self,
+        server_name: str,
+        connection: dict,
+        size: int,
+        health_check_interval: float,
+        health_check_timeout: float,
+    ):
+        self.server_name = server_name
+        self.connection = connection
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._idle: list[WarmSession] = []
+        self._all: set[WarmSession] = set()
+        self._slots = asyncio.Semaphore(self.size)
+        self._closed = False
+        self.spawned = 0
+        self.respawned = 0
+
+    async def _spawn(self) -> WarmSession:
+        session = await WarmSession(self.server_name, self.connection).start()
+        self._all.add(session)
+        self.spawned += 1
+        print(f"[MCP] Spawned session for '{self.server_name}' ({len(self._all)} open)")
+        return session
+
+    async def _discard(self, session: WarmSession):
+        self._all.discard(session)
+        await session.close()
+
+    async def _checkout(self) -> WarmSession:
+        while self._idle:
+            session = self._idle.pop()
+
+            if not session.alive:
+                self.respawned += 1
+                await self._discard(session)
+                continue
+
+            idle_for = time.monotonic() - session.last_used
+            if idle_for > self.health_check_interval and not await session.ping(
+                self.health_check_timeout
+            ):
+                print(f"[MCP] Health check failed for '{self.server_name}', respawning")
+                self.respawned += 1
+                await self._discard(session)
+                continue
+
+            return session
+
+        return await self._spawn()
+
+    async def warm(self):
+        """Make sure at least one session is ready."""
+        if not self._all:
+            self._idle.append(await self._spawn())
+
+    @asynccontextmanager
+    async def lease(self):
+        if self._closed:
+            raise RuntimeError(f"MCP pool for '{self.server_name}' is closed")
+
+        await self._slots.acquire()
+        session = None
+        broken = False
+        try:
+            session = await self._checkout()
+            yield session.session
+        except Exception:
+            # Transport level failure: do not hand this process out again
+            broken = session is not None and not await session.ping(
+                self.health_check_timeout
+            )
+            raise
+        finally:
+            if session is not None:
+                session.last_used = time.monotonic()
+                if broken or self._closed or not session.alive:
+                    await self._discard(session)
+                else:
+                    self._idle.append(session)
+            self._slots.release()
+
+    async def aclose(self):
+        self._closed = True
+        sessions = list(self._all)
+        self._idle.clear()
+        self._all.clear()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+
+class PooledSession:
+    """
+    Quacks like mcp.ClientSession for the adapter tools:
+    every call leases a warm session from the pool on the manager loop.
+    """
+
+    def __init__(self, manager: "MCPSessionManager", server_name: str):
+        self._manager = manager
+        self._server_name = server_name
+
+    async def _call(self, method: str, *args, **kwargs):
+        async def _run():
+            async with self._manager.pool(self._server_name).lease() as session:
+                return await getattr(session, method)(*args, **kwargs)
+
+        return await self._manager.run(_run())
+
+    async def list_tools(self, *args, **kwargs):
+        return await self._call("list_tools", *args, **kwargs)
+
+    async def call_tool(self, *args, **kwargs):
+        return await self._call("call_tool", *args, **kwargs)
+
+
+# ==============================
+# Session Manager
+# ==============================
+
+
+class MCPSessionManager:
+    """
+    Keeps warm, pooled sessions to every configured MCP server.
+    All sessions live on one event loop; callers from other loops are
+    bridged onto it.
+    """
+
+    def __init__(
+        self,
+        connections: dict[str, dict],
+        loop: asyncio.AbstractEventLoop,
+        pool_size: int = 4,
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 5.0,
+    ):
+        self.connections = connections
+        self.loop = loop
+        self._pools = {
+            name: ServerPool(
+                name,
+                connection,
+                pool_size,
+                health_check_interval,
+                health_check_timeout,
+            )
+            for name, connection in connections.items()
+        }
+
+    def pool(self, server_name: str) -> ServerPool:
+        return self._pools[server_name]
+
+    async def run(self, coro):
+        """Await a coroutine on the manager loop from any loop."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            return await coro
+
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+        )
+
+    async def start(self):
+        """Spawn one warm session per server."""
+        await asyncio.gather(*(p.warm() for p in self._pools.values()))
+
+    async def get_tools(self) -> list[BaseTool]:
+        tools: list[BaseTool] = []
+        for name in self._pools:
+            tools.extend(
+                await load_mcp_tools(PooledSession(self, name), server_name=name)
+            )
+        return tools
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "open": len(p._all),
+                "idle": len(p._idle),
+                "spawned": p.spawned,
+                "respawned": p.respawned,
+            }
+            for name, p in self._pools.items()
+        }
+
+    async def aclose(self):
+        await asyncio.gather(
+            *(p.aclose() for p in self._pools.values()), return_exceptions=True
+        )
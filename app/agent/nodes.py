@@ -1,4 +1,6 @@
 from datetime import datetime
+import asyncio
+import hashlib
 import os
 from langchain.tools import tool
 from langchain_core.messages import (
@@ -6,12 +8,28 @@ from langchain_core.messages import (
     AIMessage,
     SystemMessage,
     ToolMessage,
-    trim_messages,
 )
 from langgraph.prebuilt import ToolNode
 from langchain_core.runnables import RunnableConfig
+from app.agent.cache.semantic_cache import get_semantic_cache
+from app.agent.config.config import (
+    COMPACT_TOOL_RESULTS,
+    HISTORY_COMPACT_TO,
+    HISTORY_MAX_TOKENS,
+)
+from app.agent.history import (
+    count_tokens,
+    format_for_summary,
+    remove_messages,
+    split_history,
+)
+from app.agent.rag_gate import gate, record_gate
+from app.agent.routing import fast_route, record_route
+from app.agent import speculative
 from app.agent.state import AgentState
-from app.agent.tools import rag_search_tool, web_search_tool
+from app.agent.streaming import emit_status
+from app.agent.tool_results import compact_tool_message
+from app.agent.tools import arag_search_with_score, aweb_search
 from app.agent.llm.llms import (
     RagJudge,
     RouteDecision,
@@ -19,20 +37,12 @@ from app.agent.llm.llms import (
     judge_llm,
     tools,
     answer_llm,
-)
-
-
-trimmer = trim_messages(
-    max_tokens=4000,  # The size of the "window"
-    strategy="last",  # Keep the most RECENT messages
-    token_counter=len,  # How to measure (characters/words/tokens)
-    include_system=True,  # ALWAYS keep your Expense AI rules
-    start_on="human",  # Start the history with a user question
+    summary_llm,
 )
 
 
 # Router node to route to web | rag | llm | answer based on query
-def router_node(state: AgentState) -> AgentState:
+async def router_node(state: AgentState, config: RunnableConfig) -> AgentState:
     print("Entering router node")
 
     # extract query
@@ -45,6 +55,9 @@ def router_node(state: AgentState) -> AgentState:
 
     print(f"Router received web search info : {web_search_enabled}")
 
+    # Retrieval overlaps the routing call (no-op unless SPECULATIVE_RETRIEVAL)
+    speculative.start(config, query, web_search_enabled)
+
     system_prompt = """
 You are a routing controller for an expense tracking AI agent.
 
@@ -66,7 +79,24 @@ Output ONLY one route: rag | web | answer | end
 
     messages = [("system", system_prompt), ("user", query)]
 
-    result: RouteDecision = router_llm.invoke(messages)
+    # Obvious messages are routed locally, the LLM only sees the rest
+    fast = fast_route(query)
+    if fast is not None:
+        print(f"Router fast path ({fast.path}): {fast.route}")
+        record_route(fast.path)
+        result = RouteDecision(route=fast.route, reply=fast.reply)
+    else:
+        cache = get_semantic_cache()
+        cached = await asyncio.to_thread(cache.get, "route", query) if cache else None
+
+        if cached is not None:
+            record_route("cache")
+            result = RouteDecision(**cached)
+        else:
+            record_route("llm")
+            result: RouteDecision = await router_llm.ainvoke(messages)
+            if cache:
+                await asyncio.to_thread(cache.put, "route", query, result.model_dump())
 
     initial_router_decision = result.route
     router_override_reason = None
@@ -78,6 +108,12 @@ Output ONLY one route: rag | web | answer | end
         print(f"Router decision overrriden : changed from 'web' to 'rag' ")
     print(f"Router final decision: {result.route}, Reply (if 'end'): {result.reply}")
 
+    # rag may still fall through to web, so its web lookup is kept for now
+    if result.route == "web":
+        speculative.discard(config, ("rag",), reason="route=web")
+    elif result.route != "rag":
+        speculative.discard(config, reason=f"route={result.route}")
+
     out = {
         "messages": state["messages"],
         "route": result.route,
@@ -98,7 +134,7 @@ Output ONLY one route: rag | web | answer | end
 
 
 # Web search node for web search
-def web_search(state: AgentState) -> AgentState:
+async def web_search(state: AgentState, config: RunnableConfig) -> AgentState:
     print("Entering RAG node")
 
     # extract query
@@ -113,12 +149,16 @@ def web_search(state: AgentState) -> AgentState:
 
     if not web_search_enabled:
         print("Web search node entered but search is disabled")
+        speculative.discard(config, ("web",), reason="web search disabled")
 
         return {**state, "web": "Web search was disabled by user", "route": "answer"}
 
     print(f"Web search query : {query}")
+    emit_status("web_search", "Searching the web")
 
-    snippets = web_search_tool.invoke(query)
+    snippets = await speculative.take(config, query, "web")
+    if snippets is None:
+        snippets = await aweb_search(query)
 
     if snippets.startswith("WEB_ERROR::"):
         print(f"Web Error: {snippets}. Proceeding to answer with limited info.")
@@ -130,7 +170,7 @@ def web_search(state: AgentState) -> AgentState:
 
 
 # For RAG Fetch
-def rag_node(state: AgentState) -> AgentState:
+async def rag_node(state: AgentState, config: RunnableConfig) -> AgentState:
     print("Entering RAG node")
 
     # extract query
@@ -144,8 +184,12 @@ def rag_node(state: AgentState) -> AgentState:
     print(f"Router received web search info : {web_search_enabled}")
 
     print(f"RAG Query : {query}")
+    emit_status("rag_lookup", "Searching the knowledge base")
 
-    chunks = rag_search_tool.invoke(query)
+    speculated = await speculative.take(config, query, "rag")
+    if speculated is None:
+        speculated = await arag_search_with_score(query)
+    chunks, top_score = speculated
 
     # logic to handle chunk
 
@@ -161,6 +205,39 @@ def rag_node(state: AgentState) -> AgentState:
     else:
         print("No RAG chunks")
 
+    # Clearly high / clearly low retrieval scores are decided without judge_llm
+    if not chunks:
+        sufficient, gate_path = False, "empty"
+    else:
+        sufficient, gate_path = gate(top_score)
+
+    if sufficient is None:
+        sufficient = await _judge_rag(query, chunks)
+    record_gate(query, top_score, gate_path, sufficient)
+    print("--- Exiting rag_node ---")
+
+    #  Decide next route based on sufficiency AND web_search_enabled
+    if sufficient:
+        next_route = "answer"
+        speculative.discard(config, ("web",), reason="RAG sufficient")
+    else:
+        next_route = (
+            "web" if web_search_enabled else "answer"
+        )  # If not sufficient, only go to web if enabled
+        print(
+            f"RAG not sufficient. Web search enabled: {web_search_enabled}. Next route: {next_route}"
+        )
+
+    return {
+        **state,
+        "rag": chunks,
+        "route": next_route,
+        "web_search_enabled": web_search_enabled,
+    }
+
+
+async def _judge_rag(query: str, chunks: str) -> bool:
+    """Ask judge_llm whether the chunks answer the question (cached per chunks)"""
     judge_messages = [
         (
             "system",
@@ -183,42 +260,91 @@ def rag_node(state: AgentState) -> AgentState:
         ),
     ]
 
-    verdict: RagJudge = judge_llm.invoke(judge_messages)
-    print(f"RAG Judge verdict: {verdict.sufficient}")
-    print("--- Exiting rag_node ---")
+    # Same question over the same retrieved chunks -> reuse the verdict
+    cache = get_semantic_cache()
+    judge_namespace = f"rag_judge:{hashlib.sha256(chunks.encode()).hexdigest()[:16]}"
+    cached = await asyncio.to_thread(cache.get, judge_namespace, query) if cache else None
 
-    #  Decide next route based on sufficiency AND web_search_enabled
-    if verdict.sufficient:
-        next_route = "answer"
+    if cached is not None:
+        verdict = RagJudge(**cached)
     else:
-        next_route = (
-            "web" if web_search_enabled else "answer"
-        )  # If not sufficient, only go to web if enabled
-        print(
-            f"RAG not sufficient. Web search enabled: {web_search_enabled}. Next route: {next_route}"
-        )
-
-    return {
-        **state,
-        "rag": chunks,
-        "route": next_route,
-        "web_search_enabled": web_search_enabled,
-    }
+        verdict: RagJudge = await judge_llm.ainvoke(judge_messages)
+        if cache:
+            await asyncio.to_thread(cache.put, judge_namespace, query, verdict.model_dump())
+    print(f"RAG Judge verdict: {verdict.sufficient}")
+    return verdict.sufficient
 
 
 # MCP Tools Node
 
 base_tool_node = ToolNode(tools=tools, handle_tool_errors=True)
 
+# Tools that take the caller's user_id; the argument is always set server-side
+USER_SCOPED_TOOLS = {t.name for t in tools if "user_id" in (t.args or {})}
+
+
+def _bind_user(message: AIMessage, user_id: str) -> AIMessage:
+    """Overwrite user_id in every tool call with the caller's id from the run config"""
+    calls = [
+        {**call, "args": {**call["args"], "user_id": user_id}}
+        if call["name"] in USER_SCOPED_TOOLS
+        else call
+        for call in message.tool_calls
+    ]
+    return message.model_copy(update={"tool_calls": calls})
+
+
+def _refuse_unscoped(message: AIMessage) -> tuple[AIMessage, list[ToolMessage]]:
+    """No user in the run config: answer user-scoped calls with an error, keep the rest"""
+    refused = [
+        ToolMessage(
+            content="Error: no signed-in user for this conversation, so the tool was not run.",
+            tool_call_id=call["id"],
+            name=call["name"],
+            status="error",
+        )
+        for call in message.tool_calls
+        if call["name"] in USER_SCOPED_TOOLS
+    ]
+    rest = [call for call in message.tool_calls if call["name"] not in USER_SCOPED_TOOLS]
+    return message.model_copy(update={"tool_calls": rest}), refused
+
 
 async def tool_node(state: AgentState, config: RunnableConfig):
-    """ """
-    print(f"--- Executing Tools for User: {config['configurable'].get('user_id')} ---")
-    return await base_tool_node.ainvoke(state, config)
+    """Run the approved tool calls, scoped to the user in the run config"""
+    user_id = config["configurable"].get("user_id")
+    print(f"--- Executing Tools for User: {user_id} ---")
+    last = state["messages"][-1]
+    emit_status(
+        "tools",
+        "Running " + ", ".join(c["name"] for c in getattr(last, "tool_calls", [])),
+    )
+
+    bound, refused = [], []
+    if isinstance(last, AIMessage) and last.tool_calls:
+        if user_id:
+            # Never trust a user_id the model produced (it may come from the chat)
+            last = _bind_user(last, user_id)
+            bound = [last]  # same id: replaces the stored message
+        else:
+            # Fail closed; the trimmed copy is only used to run the other calls
+            last, refused = _refuse_unscoped(last)
+        state = {**state, "messages": [*state["messages"][:-1], last]}
+
+    messages = []
+    if not isinstance(last, AIMessage) or last.tool_calls:
+        result = await base_tool_node.ainvoke(state, config)
+        messages = result["messages"]
+    if COMPACT_TOOL_RESULTS:
+        messages = [
+            compact_tool_message(m) if isinstance(m, ToolMessage) else m for m in messages
+        ]
+
+    return {"messages": bound + refused + messages}
 
 
 # Answer Node ( MCP Tools + LLM Answer)
-def answer_node(state: AgentState) -> AgentState:
+async def answer_node(state: AgentState) -> AgentState:
     print("Entering answer_node")
 
     # 1. Enhanced System Prompt
@@ -227,9 +353,10 @@ def answer_node(state: AgentState) -> AgentState:
 You are a professional Expense AI. Current Date: {datetime.now().strftime('%A, %B %d, %Y')}
 
 # OPERATIONAL RULES (TOOL CALLING)
-1. PARAMETERS: You MUST provide ALL required input parameters for every tool (amount, category, date, source, user_id). 
+1. PARAMETERS: You MUST provide ALL required input parameters for every tool (amount, category, date, source). 
    - If the user misses a field, fill it yourself using your best judgment from the context (e.g., today's date).
    - Do not ask for missing fields unless you are completely unable to guess.
+   - `user_id` is filled in by the system for the signed-in user. Never ask for it, and never use an id mentioned in the conversation.
 2. CONSTRAINTS: Only use valid sources: 'cash' or 'upi'. Anchor all dates to the Current Date above.
 3. DECISION: Stay in TOOL MODE if more data is needed to complete the request. Switch to ANSWER MODE only when you have the final result.
 
@@ -248,45 +375,81 @@ You are a professional Expense AI. Current Date: {datetime.now().strftime('%A, %
 7. NO REDUNDANCY: Once the task is confirmed or answered, stop all tool calls and continue as a plain conversation.
 """
 
-    # 2. Prepare history
-    trimmed_messages = trimmer.invoke(state["messages"])
-    messages_for_llm = [SystemMessage(content=answer_system_prompt)] + trimmed_messages
+    # 2. Prepare history: recent turns within the token budget + rolling summary
+    summary = state.get("summary", "")
+    update = {}
+    older, recent = split_history(state["messages"], HISTORY_MAX_TOKENS)
+    if older:
+        # Compact below the budget so this happens every few turns, not every turn
+        older, recent = split_history(state["messages"], HISTORY_COMPACT_TO)
+        new_summary = await _summarize(summary, older)
+        if new_summary is not None:
+            summary = new_summary
+            update = {"summary": summary, "messages": remove_messages(older)}
+
+    if summary:
+        answer_system_prompt += f"\n# EARLIER CONVERSATION (summary)\n{summary}\n"
+    messages_for_llm = [SystemMessage(content=answer_system_prompt)] + recent
+    print(f"Answer prompt history: {len(recent)} messages, {count_tokens(recent)} tokens")
+
+    def reply(message):
+        return {**update, "messages": update.get("messages", []) + [message]}
 
     try:
         # 3. Call the LLM
-        response = answer_llm.invoke(messages_for_llm)
+        response = await answer_llm.ainvoke(messages_for_llm)
 
         # 4. Handle 'Silent' LLM or Groq Glitches
         if not response.content and not response.tool_calls:
             # Check if we just finished a tool call
             if isinstance(state["messages"][-1], ToolMessage):
-                return {
-                    "messages": [
-                        AIMessage(
-                            content="I've processed that for you. Everything looks good!"
-                        )
-                    ]
-                }
-            return {
-                "messages": [
+                return reply(
                     AIMessage(
-                        content="I'm here to help. What would you like to do with your expenses?"
+                        content="I've processed that for you. Everything looks good!"
                     )
-                ]
-            }
+                )
+            return reply(
+                AIMessage(
+                    content="I'm here to help. What would you like to do with your expenses?"
+                )
+            )
 
-        return {"messages": [response]}
+        return reply(response)
 
     except Exception as e:
         print(f"Caught LLM Error: {e}")
         # The 'Ultimate Safety' response prevents the app from crashing on Groq 400 errors
-        return {
-            "messages": [
-                AIMessage(
-                    content="Action completed successfully, but I had trouble generating a summary. Your records are updated!"
-                )
-            ]
-        }
+        return reply(
+            AIMessage(
+                content="Action completed successfully, but I had trouble generating a summary. Your records are updated!"
+            )
+        )
+
+
+async def _summarize(summary: str, messages) -> str | None:
+    """Fold turns leaving the window into the rolling summary (None on failure)"""
+    prompt = [
+        (
+            "system",
+            "You maintain a running summary of a conversation between a user and an "
+            "expense-tracking assistant. Merge the new messages into the existing summary. "
+            "Keep what later turns may need: amounts, categories, dates, expense ids, "
+            "actions taken, user preferences and open requests. Use at most 200 words. "
+            "Output only the summary.",
+        ),
+        (
+            "user",
+            f"Existing summary:\n{summary or '(none)'}\n\n"
+            f"New messages:\n{format_for_summary(messages)}",
+        ),
+    ]
+    try:
+        response = await summary_llm.ainvoke(prompt)
+    except Exception as e:
+        print(f"History summarization failed, keeping old turns: {e}")
+        return None
+    print(f"Summarized {len(messages)} old messages into the conversation summary")
+    return response.content.strip()
 
 
 # Prompts
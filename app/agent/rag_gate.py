@@ -0,0 +1,103 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+
+from app.agent.config.config import (
+    RAG_GATE_LOG,
+    RAG_GATE_LOG_MAX_BYTES,
+    RAG_SCORE_GATING,
+    RAG_SCORE_HIGH,
+    RAG_SCORE_LOW,
+)
+
+# ==============================
+# RAG Sufficiency Gate
+# ==============================
+# The top dense similarity of the retrieved chunks already says most of what
+# judge_llm would: clearly high -> sufficient, clearly low -> not. Only the
+# band in between is sent to the judge. When RAG_GATE_LOG is set, every
+# decision is appended to it; judge verdicts in the band show where the
+# thresholds belong. Lines are written by a listener thread (record_gate runs
+# on the event loop) to a size-capped, rotated file.
+
+_lock = threading.Lock()
+_metrics: Counter = Counter()
+_log_queue: SimpleQueue | None = None
+
+
+def _gate_log() -> SimpleQueue:
+    global _log_queue
+
+    with _lock:
+        if _log_queue is None:
+            os.makedirs(os.path.dirname(RAG_GATE_LOG) or ".", exist_ok=True)
+            handler = RotatingFileHandler(
+                RAG_GATE_LOG,
+                maxBytes=RAG_GATE_LOG_MAX_BYTES,
+                backupCount=1,
+                encoding="utf-8",
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _log_queue = SimpleQueue()
+            listener = QueueListener(_log_queue, handler)
+            listener.start()
+            # Flush queued lines on exit
+            atexit.register(listener.stop)
+        return _log_queue
+
+
+def gate(top_score: float | None) -> tuple[bool | None, str]:
+    """(sufficient, path); sufficient is None when judge_llm has to decide."""
+    if top_score is None:
+        return None, "judge:no_score"
+    if not RAG_SCORE_GATING:
+        return None, "judge:gating_off"
+    if top_score >= RAG_SCORE_HIGH:
+        return True, "score:high"
+    if top_score < RAG_SCORE_LOW:
+        return False, "score:low"
+    return None, "judge:ambiguous"
+
+
+def record_gate(query: str, top_score: float | None, path: str, sufficient: bool):
+    with _lock:
+        _metrics[path] += 1
+        _metrics["total"] += 1
+
+    print(
+        f"RAG gate: top_score={top_score if top_score is None else round(top_score, 4)} "
+        f"low={RAG_SCORE_LOW} high={RAG_SCORE_HIGH} path={path} sufficient={sufficient}"
+    )
+    if not RAG_GATE_LOG:
+        return
+    line = json.dumps(
+        {
+            "ts": round(time.time(), 3),
+            "query": query,
+            "top_score": top_score,
+            "low": RAG_SCORE_LOW,
+            "high": RAG_SCORE_HIGH,
+            "path": path,
+            "sufficient": sufficient,
+        }
+    )
+    try:
+        _gate_log().put_nowait(logging.makeLogRecord({"msg": line}))
+    except OSError as e:
+        print(f"RAG gate log failed: {e}")
+
+
+def gate_metrics() -> dict:
+    """Counts per decision path plus the share decided without judge_llm."""
+    with _lock:
+        counts = dict(_metrics)
+    total = counts.get("total", 0)
+    local = counts.get("score:high", 0) + counts.get("score:low", 0) + counts.get("empty", 0)
+    return {"counts": counts, "judge_skip_rate": local / total if total else 0.0}
@@ -0,0 +1,172 @@
+import re
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+from app.agent.config.config import (
+    FAST_ROUTER_CLASSIFIER,
+    FAST_ROUTER_CLASSIFIER_THRESHOLD,
+    FAST_ROUTER_ENABLED,
+)
+
+# ==============================
+# Fast-Path Router
+# ==============================
+# Deterministic pre-router in front of router_llm. It only decides routes
+# it can be sure about ("end" for small talk, "answer" for expense CRUD and
+# analytics) and returns None otherwise, so the LLM still handles
+# rag / web / ambiguous messages.
+
+
+class FastRoute(NamedTuple):
+    route: str
+    reply: str | None
+    path: str
+
+
+_GREETING = re.compile(
+    r"^\s*(hi+|hello+|hey+|hii+|yo|hola|namaste|good\s+(morning|afternoon|evening|night)"
+    r"|how\s+are\s+you|what'?s\s+up|sup)[\s!.,?]*(there|buddy|bot)?[\s!.,?]*$",
+    re.I,
+)
+# Explicit thanks only: "ok" / "great" may answer a question the bot just asked
+_THANKS = re.compile(
+    r"^\s*((many\s+)?thanks?(\s+you)?(\s+(so\s+much|a\s+lot|very\s+much))?"
+    r"|thank\s+u|thx|ty)[\s!.,]*$",
+    re.I,
+)
+_BYE = re.compile(r"^\s*(bye+|goodbye|see\s+you|good\s*night|cya)[\s!.,]*$", re.I)
+# Bare acknowledgements only mean something next to the previous turn ("Shall
+# I add it?" -> "ok"). router_llm sees one message and the semantic cache is
+# shared across users, so they go straight to answer, which has the history.
+_ACK = re.compile(
+    r"^\s*(ok(ay)?|k|yes|yeah|yep|yup|sure|no|nope|cool|great|nice|fine|got\s+it"
+    r"|go\s+ahead|do\s+it|sounds\s+good|alright|right)[\s!.,]*$",
+    re.I,
+)
+
+_AMOUNT = re.compile(
+    r"(?:₹|rs\.?|inr|\$|usd)\s*\d[\d,]*(?:\.\d+)?|\d[\d,]*(?:\.\d+)?\s*(?:₹|rs\.?|rupees?|inr|bucks|dollars?)?",
+    re.I,
+)
+_CRUD = re.compile(
+    r"\b(spent|paid|pay|bought|add(ed)?|log(ged)?|record(ed)?|note\s+down"
+    r"|delete|remove|undo|update|edit|change|correct|clear)\b",
+    re.I,
+)
+_EXPENSE_NOUN = re.compile(r"\b(expenses?|spend(ing)?|transactions?|entry|entries|bills?)\b", re.I)
+_ANALYTICS = re.compile(
+    r"\b(how\s+much|total|summary|summari[sz]e|breakdown|by\s+category|highest|biggest"
+    r"|largest|most\s+expensive|over\s+(my\s+)?(limit|budget)|limit|budget|show\s+(me\s+)?my"
+    r"|list\s+(my\s+)?|last\s+\d+|my\s+expenses)\b",
+    re.I,
+)
+_DATE_HINT = re.compile(
+    r"\b(today|yesterday|this\s+(week|month|year)|last\s+(week|month|year)"
+    r"|\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}(/\d{2,4})?"
+    r"|jan|feb|mar|apr|jun|jul|aug|sep|oct|nov|dec)\b",
+    re.I,
+)
+# Knowledge / internet cues: always leave these to the LLM
+_DEFER = re.compile(
+    r"\b(policy|policies|reimburs\w*|allowed|eligible|rule|rules|gst|tax|explain|why"
+    r"|what\s+is|news|latest|current|price\s+of|exchange\s+rate|search)\b",
+    re.I,
+)
+
+_REPLIES = {
+    "greeting": "Hello! How can I help with your expenses today?",
+    "thanks": "You're welcome! Anything else I can help with?",
+    "bye": "Goodbye! Come back anytime to track your expenses.",
+}
+
+# Tiny local classifier: token weights towards "answer" (+) or "end" (-)
+_CLASSIFIER_WEIGHTS = {
+    "spent": 2.0, "paid": 2.0, "expense": 1.5, "expenses": 1.5, "add": 1.2,
+    "delete": 1.5, "update": 1.2, "total": 1.2, "month": 0.8, "week": 0.8,
+    "category": 1.2, "budget": 1.2, "limit": 1.0, "cash": 1.0, "upi": 1.5,
+    "rs": 1.0, "rupees": 1.0, "lunch": 0.6, "dinner": 0.6, "uber": 0.8,
+    "hi": -1.5, "hello": -1.5, "hey": -1.5, "thanks": -1.5, "thank": -1.5,
+    "bye": -1.5, "joke": -1.2, "weather": -0.5, "name": -0.8, "you": -0.4,
+}
+_TOKEN = re.compile(r"[a-z]+")
+
+
+# ==============================
+# Metrics
+# ==============================
+
+_metrics_lock = threading.Lock()
+_metrics: Counter = Counter()
+
+
+def record_route(path: str):
+    with _metrics_lock:
+        _metrics[path] += 1
+        _metrics["total"] += 1
+
+
+def router_metrics() -> dict:
+    """Counts per decision path plus the share decided without the LLM."""
+    with _metrics_lock:
+        counts = dict(_metrics)
+    total = counts.get("total", 0)
+    llm = counts.get("llm", 0)
+    return {
+        "counts": counts,
+        "fast_path_hit_rate": (total - llm) / total if total else 0.0,
+    }
+
+
+# ==============================
+# Router
+# ==============================
+
+
+def _classify(query: str) -> FastRoute | None:
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return None
+
+    score = sum(_CLASSIFIER_WEIGHTS.get(t, 0.0) for t in tokens)
+    if _AMOUNT.search(query):
+        score += 1.0
+
+    if score >= FAST_ROUTER_CLASSIFIER_THRESHOLD:
+        return FastRoute("answer", None, "classifier")
+    if score <= -FAST_ROUTER_CLASSIFIER_THRESHOLD and len(tokens) <= 6:
+        return FastRoute("end", _REPLIES["greeting"], "classifier")
+    return None
+
+
+def fast_route(query: str) -> FastRoute | None:
+    """Route obvious messages locally; None means 'ask router_llm'."""
+    text = (query or "").strip()
+    # Not an optimization: context-free routing of these is wrong, so always applied
+    if _ACK.match(text):
+        return FastRoute("answer", None, "rule:ack")
+
+    if not FAST_ROUTER_ENABLED or not text:
+        return None
+
+    if _GREETING.match(text):
+        return FastRoute("end", _REPLIES["greeting"], "rule:greeting")
+    if _THANKS.match(text):
+        return FastRoute("end", _REPLIES["thanks"], "rule:thanks")
+    if _BYE.match(text):
+        return FastRoute("end", _REPLIES["bye"], "rule:bye")
+
+    if _DEFER.search(text):
+        return None
+
+    has_amount = bool(_AMOUNT.search(text))
+    if _CRUD.search(text) and (has_amount or _EXPENSE_NOUN.search(text)):
+        return FastRoute("answer", None, "rule:expense_crud")
+
+    if _ANALYTICS.search(text) and (_EXPENSE_NOUN.search(text) or _DATE_HINT.search(text)):
+        return FastRoute("answer", None, "rule:analytics")
+
+    if FAST_ROUTER_CLASSIFIER:
+        return _classify(text)
+
+    return None
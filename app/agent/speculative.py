@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+
+from app.agent.config.config import (
+    SPECULATIVE_RETRIEVAL,
+    SPECULATIVE_TTL,
+    SPECULATIVE_WEB,
+)
+from app.agent.routing import fast_route
+
+# ==============================
+# Speculative Retrieval
+# ==============================
+# Opt-in (SPECULATIVE_RETRIEVAL). router_node starts RAG retrieval, and web
+# search when enabled, as asyncio tasks before asking router_llm, so the
+# lookups overlap the routing round trip. rag_node / web_search await the
+# result if the route needs it; everything else is cancelled (the pending
+# HTTP request is aborted). Speculations are keyed by (thread_id, query) and
+# expire after a TTL.
+
+_lock = threading.Lock()
+# thread_id -> {"query", "started", "tasks": {kind: asyncio.Task}}
+_pending: dict[str, dict] = {}
+_metrics: Counter = Counter()
+
+
+def _thread_id(config) -> str | None:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+def _cancel(tasks: dict[str, asyncio.Task], reason: str):
+    for kind, task in tasks.items():
+        task.cancel()
+        with _lock:
+            _metrics[f"{kind}:discarded"] += 1
+        print(f"Speculative {kind} discarded ({reason})")
+
+
+def _expire():
+    now = time.monotonic()
+    with _lock:
+        stale = [t for t, s in _pending.items() if now - s["started"] > SPECULATIVE_TTL]
+        expired = [_pending.pop(t) for t in stale]
+    for spec in expired:
+        _cancel(spec["tasks"], "expired")
+
+
+def start(config, query: str, web_search_enabled: bool):
+    """Kick off retrieval for a query the router is about to route (inside the loop)."""
+    thread_id = _thread_id(config)
+    if not SPECULATIVE_RETRIEVAL or not thread_id or not query:
+        return
+    # Small talk and expense CRUD never reach rag / web
+    if fast_route(query) is not None:
+        return
+
+    # Imported lazily: the tools pull in the vector store and web clients
+    from app.agent.tools import arag_search_with_score, aweb_search
+
+    _expire()
+    tasks = {"rag": asyncio.create_task(arag_search_with_score(query))}
+    if web_search_enabled and SPECULATIVE_WEB:
+        tasks["web"] = asyncio.create_task(aweb_search(query))
+
+    with _lock:
+        previous = _pending.pop(thread_id, None)
+        _pending[thread_id] = {"query": query, "started": time.monotonic(), "tasks": tasks}
+        for kind in tasks:
+            _metrics[f"{kind}:started"] += 1
+    if previous:
+        _cancel(previous["tasks"], "superseded")
+
+
+async def take(config, query: str, kind: str):
+    """Result of a speculative lookup for this query, or None to run it now."""
+    thread_id = _thread_id(config)
+    if not thread_id:
+        return None
+    with _lock:
+        spec = _pending.get(thread_id)
+        if not spec or spec["query"] != query or kind not in spec["tasks"]:
+            return None
+        task = spec["tasks"].pop(kind)
+        if not spec["tasks"]:
+            _pending.pop(thread_id, None)
+
+    try:
+        result = await task
+    except Exception as e:
+        print(f"Speculative {kind} failed, running it again: {e}")
+        with _lock:
+            _metrics[f"{kind}:failed"] += 1
+        return None
+
+    with _lock:
+        _metrics[f"{kind}:used"] += 1
+    print(f"Speculative {kind} result used")
+    return result
+
+
+def discard(config, kinds: tuple[str, ...] = ("rag", "web"), reason: str = "not needed"):
+    """Cancel speculative lookups the chosen route will not use."""
+    thread_id = _thread_id(config)
+    if not thread_id:
+        return
+    with _lock:
+        spec = _pending.get(thread_id)
+        if not spec:
+            return
+        dropped = {k: spec["tasks"].pop(k) for k in kinds if k in spec["tasks"]}
+        if not spec["tasks"]:
+            _pending.pop(thread_id, None)
+    if dropped:
+        _cancel(dropped, reason)
+
+
+def speculation_metrics() -> dict:
+    with _lock:
+        return dict(_metrics)
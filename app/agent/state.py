@@ -13,3 +13,6 @@ class AgentState(TypedDict):
     web_search_enabled: bool
 
     tool_retry_count: int
+
+    # Rolling summary of turns that were compacted out of `messages`
+    summary: str
@@ -0,0 +1,168 @@
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langgraph.config import get_stream_writer
+
+# ==============================
+# Token Streaming
+# ==============================
+# The graph is run with stream_mode=["messages", "custom"]:
+#   messages  answer_llm tokens as they are generated, plus whole messages
+#             returned by nodes (semantic-cache hits, fallbacks, tool results).
+#             Internal LLM calls (router, judge, summary) are tagged
+#             "nostream" in llms.py, so only user-facing text arrives here.
+#   custom    progress events written by nodes through emit_status().
+# Both are translated into StreamEvents for consumers (CLI, HTTP, WhatsApp):
+#
+#   async for event in astream_turn(agent, {"messages": [...]}, config):
+#       if event.type == "token":
+#           print(event.text, end="", flush=True)
+
+# Nodes whose AI messages are the reply to the user
+REPLY_NODES = frozenset({"answer", "router"})
+
+
+@dataclass
+class StreamEvent:
+    # token        partial reply text
+    # message      a complete reply that was not generated token by token
+    # tool_call    the model started a tool call (tool-call boundary; text so far is final)
+    # tool_result  a tool finished
+    # status       progress from a node (retrieval, web search, tools)
+    # interrupt    paused before tools: data["tool_calls"] awaits approval
+    # done         the turn finished: text is the final reply
+    type: str
+    text: str = ""
+    node: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+def emit_status(node: str, text: str, **data):
+    """Progress event for the custom stream (no-op outside a graph run)."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"type": "status", "node": node, "text": text, **data})
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    # Content blocks: keep the text parts
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+    )
+
+
+async def astream_turn(agent, graph_input, config) -> AsyncIterator[StreamEvent]:
+    """
+    Run the graph for one turn (graph_input=None resumes after an interrupt)
+    and yield StreamEvents until it finishes or pauses for approval.
+    """
+    streamed: set[str] = set()
+    announced: set[str] = set()
+
+    async for mode, payload in agent.astream(
+        graph_input, config, stream_mode=["messages", "custom"]
+    ):
+        if mode == "custom":
+            if isinstance(payload, dict):
+                yield StreamEvent(
+                    type=payload.get("type", "status"),
+                    text=payload.get("text", ""),
+                    node=payload.get("node"),
+                    data=payload,
+                )
+            continue
+
+        message, metadata = payload
+        node = metadata.get("langgraph_node")
+
+        if isinstance(message, AIMessageChunk):
+            if node not in REPLY_NODES:
+                continue
+            streamed.add(message.id)
+            text = _text(message.content)
+            if text:
+                yield StreamEvent(type="token", text=text, node=node)
+            for call in message.tool_call_chunks:
+                # Only the first chunk of each call carries its name
+                key = call.get("id") or f"{message.id}:{call.get('index')}"
+                if call.get("name") and key not in announced:
+                    announced.add(key)
+                    yield StreamEvent(
+                        type="tool_call",
+                        node=node,
+                        data={"name": call["name"], "id": call.get("id")},
+                    )
+
+        elif isinstance(message, ToolMessage):
+            yield StreamEvent(
+                type="tool_result",
+                text=_text(message.content),
+                node=node,
+                data={"name": message.name, "id": message.tool_call_id},
+            )
+
+        elif isinstance(message, AIMessage) and message.id not in streamed:
+            if node not in REPLY_NODES:
+                continue
+            text = _text(message.content)
+            if text:
+                yield StreamEvent(type="message", text=text, node=node)
+
+    snapshot = await agent.aget_state(config)
+    messages = snapshot.values.get("messages", [])
+    last = messages[-1] if messages else None
+
+    if snapshot.next and isinstance(last, AIMessage) and last.tool_calls:
+        yield StreamEvent(
+            type="interrupt",
+            text=_text(last.content),
+            node=snapshot.next[0],
+            data={
+                "tool_calls": [
+                    {"name": c["name"], "args": c["args"], "id": c["id"]}
+                    for c in last.tool_calls
+                ]
+            },
+        )
+        return
+
+    yield StreamEvent(
+        type="done", text=_text(last.content) if isinstance(last, AIMessage) else ""
+    )
+
+
+async def adeny_pending(agent, config, reason: str) -> bool:
+    """
+    Answer every tool call a paused turn is waiting on with a denial. Returns
+    False when nothing is pending. The thread must never keep a tool call
+    without a ToolMessage reply: the model API rejects that history.
+    """
+    snapshot = await agent.aget_state(config)
+    messages = snapshot.values.get("messages", [])
+    last = messages[-1] if messages else None
+    if not snapshot.next or not isinstance(last, AIMessage) or not last.tool_calls:
+        return False
+    await agent.aupdate_state(
+        config,
+        {
+            "messages": [
+                ToolMessage(tool_call_id=call["id"], content=reason)
+                for call in last.tool_calls
+            ]
+        },
+        as_node="tools",
+    )
+    return True
+
+
+async def astream_resume(agent, config, approved: bool) -> AsyncIterator[StreamEvent]:
+    """Continue a turn paused before tools: run them, or record the denial and let the model reply."""
+    if not approved:
+        await adeny_pending(agent, config, "User denied execution. Ask for next steps.")
+    async for event in astream_turn(agent, None, config):
+        yield event
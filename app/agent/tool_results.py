@@ -0,0 +1,118 @@
+import json
+
+from langchain_core.messages import ToolMessage
+
+from app.agent.config.config import TOOL_RESULT_DROP_COLUMNS, TOOL_RESULT_MAX_ROWS
+
+# ==============================
+# Compact Tool Results
+# ==============================
+# Tool results are re-sent to the LLM on every answer turn, so JSON dicts
+# with repeated keys are rendered as short "key: value" lines and tables.
+# The untouched result is kept in ToolMessage.artifact (never sent to the LLM).
+# Long tables are cut to max_rows, except pages of a paginated result (a dict
+# with "next_cursor"): the cursor points past the page, so a dropped row could
+# never be reached again.
+
+
+def _text_of(content) -> str:
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "\n".join(parts)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def render_table(rows: list[dict], max_rows: int | None = TOOL_RESULT_MAX_ROWS) -> str:
+    """List of dicts -> header + pipe separated rows, with a summary row when truncated (None: all rows)."""
+    columns: list[str] = []
+    for row in rows:
+        for key in row:
+            if key not in columns and key not in TOOL_RESULT_DROP_COLUMNS:
+                columns.append(key)
+    # Drop columns that carry no information at all
+    columns = [c for c in columns if any(r.get(c) not in (None, "") for r in rows)]
+
+    if max_rows is None:
+        max_rows = len(rows)
+    shown = rows[:max_rows]
+    lines = [" | ".join(columns)]
+    lines += [" | ".join(_cell(r.get(c)) for c in columns) for r in shown]
+
+    hidden = rows[max_rows:]
+    if hidden:
+        summary = f"... {len(hidden)} more rows"
+        amounts = [r["amount"] for r in hidden if isinstance(r.get("amount"), (int, float))]
+        if amounts:
+            summary += f" (amount sum {sum(amounts):g})"
+        lines.append(summary)
+
+    return "\n".join(lines)
+
+
+def render_value(value, max_rows: int = TOOL_RESULT_MAX_ROWS) -> str:
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return render_table(value, max_rows)
+
+    if isinstance(value, dict):
+        # A page is already bounded by the tool; keep every row reachable
+        page_rows = None if "next_cursor" in value else max_rows
+        lines = []
+        for key, item in value.items():
+            if key in TOOL_RESULT_DROP_COLUMNS or item is None:
+                continue
+            if isinstance(item, list) and item and all(isinstance(v, dict) for v in item):
+                lines.append(f"{key} ({len(item)}):")
+                lines.append(render_table(item, page_rows))
+            elif isinstance(item, dict):
+                inner = ", ".join(
+                    f"{k}={_cell(v)}"
+                    for k, v in item.items()
+                    if k not in TOOL_RESULT_DROP_COLUMNS and v is not None
+                )
+                lines.append(f"{key}: {inner}")
+            else:
+                lines.append(f"{key}: {_cell(item)}")
+        return "\n".join(lines)
+
+    return _cell(value)
+
+
+def compact_tool_message(message: ToolMessage) -> ToolMessage:
+    """Re-encode a JSON tool result compactly; anything else is returned as-is."""
+    if message.status == "error":
+        return message
+
+    text = _text_of(message.content)
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return message
+
+    if not isinstance(data, (dict, list)):
+        return message
+
+    compact = render_value(data)
+    if len(compact) >= len(text):
+        return message
+
+    return message.model_copy(
+        update={
+            "content": compact,
+            "artifact": {"raw": message.content, "mcp": message.artifact},
+        }
+    )
@@ -1,7 +1,7 @@
 import os
 from langchain_core.tools import tool
 from langchain_tavily import TavilySearch
-from app.agent.vectorstore.vectorstore import get_retriever
+from app.agent.vectorstore.vectorstore import aretrieve_with_scores, retrieve_with_scores
 from app.agent.config.config import TAVILY_API_KEY
 
 os.environ["TAVILY_API_KEY"] = TAVILY_API_KEY
@@ -9,37 +9,66 @@ os.environ["TAVILY_API_KEY"] = TAVILY_API_KEY
 tavily = TavilySearch(max_results=3, topic="general")
 
 
+def _rag_result(hits) -> tuple[str, float | None]:
+    text = "\n\n".join(d.page_content for d, _ in hits) if hits else ""
+    # A top hit found only by BM25 has no dense score: leave it to the judge
+    if not hits or hits[0][1] is None:
+        return text, None
+    return text, max(score for _, score in hits if score is not None)
+
+
+def rag_search_with_score(query: str, k: int = 5) -> tuple[str, float | None]:
+    """Top-K chunks from KB joined as text, plus the best dense similarity score"""
+    try:
+        return _rag_result(retrieve_with_scores(query, k=k))
+    except Exception as e:
+        return f"RAG_ERROR::{e}", None
+
+
+async def arag_search_with_score(query: str, k: int = 5) -> tuple[str, float | None]:
+    try:
+        return _rag_result(await aretrieve_with_scores(query, k=k))
+    except Exception as e:
+        return f"RAG_ERROR::{e}", None
+
+
 @tool
 def rag_search_tool(query: str) -> str:
     """Top-K chunks from KB (empty string if none)"""
-    try:
-        retriever_instance = get_retriever()
-        docs = retriever_instance.invoke(query, k=5)
-        return "\n\n".join(d.page_content for d in docs) if docs else ""
-    except Exception as e:
-        return f"RAG_ERROR::{e}"
+    return rag_search_with_score(query)[0]
+
+
+def _format_web_results(result) -> str:
+    if isinstance(result, dict) and "results" in result:
+        formatted_results = []
+        for item in result["results"]:
+            title = item.get("title", "No title")
+            content = item.get("content", "No content")
+            url = item.get("url", "")
+            formatted_results.append(
+                f"Title: {title}\nContent: {content}\nURL: {url}"
+            )
+        return (
+            "\n\n".join(formatted_results)
+            if formatted_results
+            else "No results found"
+        )
+    else:
+        return str(result)
 
 
 @tool
 def web_search_tool(query: str) -> str:
     """Up-to-date web info via Tavily"""
     try:
-        result = tavily.invoke({"query": query})
-        if isinstance(result, dict) and "results" in result:
-            formatted_results = []
-            for item in result["results"]:
-                title = item.get("title", "No title")
-                content = item.get("content", "No content")
-                url = item.get("url", "")
-                formatted_results.append(
-                    f"Title: {title}\nContent: {content}\nURL: {url}"
-                )
-            return (
-                "\n\n".join(formatted_results)
-                if formatted_results
-                else "No results found"
-            )
-        else:
-            return str(result)
+        return _format_web_results(tavily.invoke({"query": query}))
+    except Exception as e:
+        return f"WEB_ERROR::{e}"
+
+
+async def aweb_search(query: str) -> str:
+    """Async web_search_tool (Tavily's aiohttp client)"""
+    try:
+        return _format_web_results(await tavily.ainvoke({"query": query}))
     except Exception as e:
         return f"WEB_ERROR::{e}"
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.agent.vectorstore.local_index import (
+    LocalVectorIndex,
+    _normalize,
+    bytes_per_vector,
+    disk_bytes_per_vector,
+)
+
+# ======================================================
+# RECALL vs LATENCY BENCHMARK
+# ======================================================
+# Embeds the corpus and queries once at full size, then measures every
+# (dimension, dtype, rerank) setting against exact float32 search at full
+# size. Lower dimensions are prefixes of the full vector (Matryoshka
+# truncation, which is what the model's output_dimensionality does),
+# re-normalized, so no setting costs extra embedding calls.
+# Sizes are reported twice: scan_mb is the matrix every search pages through
+# (the RAM that must stay resident), disk_mb adds the float32 originals that
+# quantized indexes keep for re-ranking (only candidate rows are read).
+#
+#   python -m app.agent.vectorstore.benchmark policies/ --queries queries.txt
+#   python -m app.agent.vectorstore.benchmark --synthetic 20000
+
+DEFAULT_DIMENSIONS = (256, 512, 768, 1536, 3072)
+DEFAULT_DTYPES = ("float32", "int8", "binary")
+DEFAULT_RERANK = (0, 4, 10)
+
+
+def truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+    return _normalize(np.ascontiguousarray(vectors[:, :dim]))
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = _normalize(queries) @ _normalize(corpus).T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def measure(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    dim: int,
+    dtype: str,
+    rerank: int,
+    k: int,
+) -> dict:
+    directory = tempfile.mkdtemp(prefix="vector-bench-")
+    try:
+        index = LocalVectorIndex(directory, dim, dtype, rerank)
+        ids = [str(i) for i in range(len(corpus))]
+        index.add(ids, truncate(corpus, dim), ids)
+        q = truncate(queries, dim)
+
+        # single-query latency (what one RAG lookup pays)
+        latencies = []
+        hits = []
+        for row in q:
+            start = time.perf_counter()
+            result = index.search(row[None, :], k)[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits.append([int(doc["id"]) for doc, _ in result])
+
+        start = time.perf_counter()
+        index.search(q, k)
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        recall = np.mean(
+            [len(set(h) & set(t.tolist())) / k for h, t in zip(hits, truth)]
+        )
+        return {
+            "dim": dim,
+            "dtype": dtype,
+            "rerank": rerank if dtype != "float32" else 0,
+            f"recall@{k}": round(float(recall), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "batch_qps": round(len(q) / (batch_ms / 1000), 1) if batch_ms else 0.0,
+            "scan_bytes_per_vector": bytes_per_vector(dim, dtype),
+            "disk_bytes_per_vector": disk_bytes_per_vector(dim, dtype),
+            "scan_mb": round(bytes_per_vector(dim, dtype) * len(corpus) / 2**20, 2),
+            "disk_mb": round(disk_bytes_per_vector(dim, dtype) * len(corpus) / 2**20, 2),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    *,
+    k: int = 5,
+    dimensions=DEFAULT_DIMENSIONS,
+    dtypes=DEFAULT_DTYPES,
+    rerank=DEFAULT_RERANK,
+) -> list[dict]:
+    full = corpus.shape[1]
+    truth = exact_top_k(corpus, queries, k)
+    results = []
+    for dim in [d for d in dimensions if d <= full]:
+        for dtype in dtypes:
+            for factor in rerank if dtype != "float32" else (0,):
+                results.append(measure(corpus, queries, truth, dim, dtype, factor, k))
+    return results
+
+
+def cheapest(
+    results: list[dict], min_recall: float, k: int, minimize: str = "scan"
+) -> dict | None:
+    """
+    Smallest index (then fastest) that keeps recall above the target.
+    minimize="scan" ranks by resident memory, "disk" by total storage, where
+    the float32 originals make quantized indexes larger than float32 ones.
+    """
+    good = [r for r in results if r[f"recall@{k}"] >= min_recall]
+    size = f"{minimize}_bytes_per_vector"
+    return min(good, key=lambda r: (r[size], r["p50_ms"])) if good else None
+
+
+# --------------------
+# Inputs
+# --------------------
+def synthetic(rows: int, queries: int, dim: int, seed: int = 0):
+    """Clustered vectors with a decaying spectrum (roughly like real embeddings)."""
+    rng = np.random.default_rng(seed)
+    spectrum = 1.0 / np.sqrt(np.arange(1, dim + 1))
+    centers = rng.standard_normal((max(1, rows // 50), dim)) * spectrum
+    corpus = centers[rng.integers(len(centers), size=rows)]
+    corpus = corpus + 0.5 * rng.standard_normal((rows, dim)) * spectrum
+    picks = rng.choice(rows, queries, replace=False)
+    q = corpus[picks] + 0.3 * rng.standard_normal((queries, dim)) * spectrum
+    return corpus.astype(np.float32), q.astype(np.float32)
+
+
+def corpus_from_sources(paths: list[str], queries_path: str | None, sample: int, seed: int = 0):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from app.agent.vectorstore.ingest import iter_sources
+    from app.agent.vectorstore.vectorstore import embeddings
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=200)
+    chunks = []
+    for text, _ in iter_sources(paths):
+        chunks.extend(splitter.split_text(text))
+    if not chunks:
+        raise SystemExit("No text found in the given paths")
+
+    if queries_path:
+        with open(queries_path, encoding="utf-8") as f:
+            query_texts = [line.strip() for line in f if line.strip()]
+    else:
+        # No query log: use the opening words of random chunks
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(chunks), min(sample, len(chunks)), replace=False)
+        query_texts = [" ".join(chunks[i].split()[:12]) for i in picks]
+
+    corpus = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    queries = np.asarray([embeddings.embed_query(q) for q in query_texts], dtype=np.float32)
+    return corpus, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of local index settings")
+    parser.add_argument("paths", nargs="*", help="Corpus files or directories")
+    parser.add_argument("--queries", help="File with one query per line")
+    parser.add_argument("--sample-queries", type=int, default=200)
+    parser.add_argument("--synthetic", type=int, metavar="ROWS", help="Use random vectors")
+    parser.add_argument("--synthetic-dim", type=int, default=3072)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dims", default=",".join(map(str, DEFAULT_DIMENSIONS)))
+    parser.add_argument("--dtypes", default=",".join(DEFAULT_DTYPES))
+    parser.add_argument("--rerank", default=",".join(map(str, DEFAULT_RERANK)))
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument(
+        "--minimize",
+        choices=["scan", "disk"],
+        default="scan",
+        help="Size to recommend by: scanned matrix (RAM) or total on disk",
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus, queries = synthetic(args.synthetic, args.sample_queries, args.synthetic_dim)
+    elif args.paths:
+        corpus, queries = corpus_from_sources(args.paths, args.queries, args.sample_queries)
+    else:
+        parser.error("give corpus paths or --synthetic ROWS")
+
+    results = run(
+        corpus,
+        queries,
+        k=args.k,
+        dimensions=[int(d) for d in args.dims.split(",")],
+        dtypes=args.dtypes.split(","),
+        rerank=[int(r) for r in args.rerank.split(",")],
+    )
+
+    columns = list(results[0])
+    print(f"{len(corpus)} vectors, {len(queries)} queries, baseline float32/{corpus.shape[1]}d")
+    print(" | ".join(columns))
+    for r in results:
+        print(" | ".join(str(r[c]) for c in columns))
+
+    best = cheapest(results, args.min_recall, args.k, args.minimize)
+    if best:
+        print(
+            f"\nCheapest ({args.minimize}) with recall@{args.k} >= {args.min_recall}: "
+            f"EMBEDDING_DIMENSION={best['dim']} LOCAL_INDEX_DTYPE={best['dtype']} "
+            f"LOCAL_INDEX_RERANK={best['rerank']} "
+            f"(scan {best['scan_mb']} MB, disk {best['disk_mb']} MB)"
+        )
+    else:
+        print(f"\nNo setting reached recall@{args.k} >= {args.min_recall}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# ==============================
+# Embedding Cache
+# ==============================
+# Content-hash keyed cache in front of an embedding model:
+#   memory: LRU of float32 arrays
+#   disk:   append-only float32 matrix (memory-mapped) + parallel file of
+#           32-byte sha256 keys, so vectors take 4 bytes/dim and reload fast
+
+
+def content_key(kind: str, text: str) -> bytes:
+    # Query and document embeddings differ (task type), so key them apart
+    return hashlib.sha256(f"{kind}\0{text}".encode()).digest()
+
+
+class MmapVectorStore:
+    """Append-only on-disk store of fixed-dimension float32 vectors"""
+
+    KEY_SIZE = 32
+
+    def __init__(self, directory: str, dim: int):
+        self.dim = dim
+        self.row_bytes = dim * 4
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.bin")
+        self.lock_path = os.path.join(directory, ".lock")
+
+        self._lock = threading.Lock()
+        self._rows: dict[bytes, int] = {}
+        self._count = 0
+        self._mmap: np.memmap | None = None
+        self._mapped_rows = 0
+
+        for path in (self.vectors_path, self.keys_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+
+        with self._lock, self._file_lock():
+            self._sync(repair=True)
+
+    def __len__(self):
+        return len(self._rows)
+
+    # --------------------
+    # Cross-process sync
+    # --------------------
+    # Several processes may share the directory (uvicorn workers, the ingest
+    # CLI next to the service). Appends happen under an exclusive flock, and a
+    # row number is always the file's row count at that moment, never a
+    # per-process counter; other processes' keys are read in on a miss.
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:  # Windows
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _sync(self, repair: bool = False):
+        """Read keys appended since the last sync (thread and file lock held)"""
+        count = min(
+            os.path.getsize(self.keys_path) // self.KEY_SIZE,
+            os.path.getsize(self.vectors_path) // self.row_bytes,
+        )
+        if repair:
+            # A crash between the two appends leaves them uneven: trim to the shorter
+            for path, size in (
+                (self.keys_path, count * self.KEY_SIZE),
+                (self.vectors_path, count * self.row_bytes),
+            ):
+                if os.path.getsize(path) != size:
+                    os.truncate(path, size)
+        if count <= self._count:
+            return
+
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._count * self.KEY_SIZE)
+            keys = f.read((count - self._count) * self.KEY_SIZE)
+        for i in range(count - self._count):
+            key = keys[i * self.KEY_SIZE : (i + 1) * self.KEY_SIZE]
+            self._rows.setdefault(key, self._count + i)
+        self._count = count
+
+    def _remap(self):
+        rows = self._count
+        self._mmap = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            if rows
+            else None
+        )
+        self._mapped_rows = rows
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None and os.path.getsize(self.keys_path) > self._count * self.KEY_SIZE:
+                # Another process appended since we last looked
+                with self._file_lock():
+                    self._sync()
+                row = self._rows.get(key)
+            if row is None:
+                return None
+            if row >= self._mapped_rows:
+                self._remap()
+            return np.array(self._mmap[row])
+
+    def put_many(self, items: list[tuple[bytes, np.ndarray]]):
+        with self._lock, self._file_lock():
+            # Rows other processes appended come first; ours go after them
+            self._sync(repair=True)
+            fresh = {}
+            for key, vec in items:
+                if key not in self._rows and vec.shape == (self.dim,):
+                    fresh[key] = vec
+            if not fresh:
+                return
+            with open(self.vectors_path, "ab") as f:
+                for vec in fresh.values():
+                    f.write(vec.astype(np.float32, copy=False).tobytes())
+            with open(self.keys_path, "ab") as f:
+                for key in fresh:
+                    f.write(key)
+            self._sync()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from memory or disk"""
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        store: MmapVectorStore | None = None,
+        lru_size: int = 4096,
+    ):
+        self.underlying = underlying
+        self.store = store
+        self.lru_size = lru_size
+        self._lru: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --------------------
+    # Lookup
+    # --------------------
+    def _remember(self, key: bytes, vec: np.ndarray):
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _lookup(self, key: bytes) -> np.ndarray | None:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return vec
+
+        vec = self.store.get(key) if self.store is not None else None
+        if vec is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, vec)
+        return vec
+
+    def _split(self, kind: str, texts: list[str]):
+        keys = [content_key(kind, t) for t in texts]
+        found = [self._lookup(k) for k in keys]
+        missing = [i for i, v in enumerate(found) if v is None]
+        with self._lock:
+            self.misses += len(missing)
+        return keys, found, missing
+
+    def _store(self, keys, found, missing, vectors) -> list[list[float]]:
+        fresh = []
+        for i, vec in zip(missing, vectors):
+            arr = np.asarray(vec, dtype=np.float32)
+            found[i] = arr
+            fresh.append((keys[i], arr))
+            self._remember(keys[i], arr)
+        if self.store is not None and fresh:
+            self.store.put_many(fresh)
+        return [v.tolist() for v in found]
+
+    # --------------------
+    # Embeddings interface
+    # --------------------
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, found, missing = self._split("doc", texts)
+        vectors = (
+            self.underlying.embed_documents([texts[i] for i in missing]) if missing else []
+        )
+        return self._store(keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> list[float]:
+        keys, found, missing = self._split("query", [text])
+        vectors = [self.underlying.embed_query(text)] if missing else []
+        return self._store(keys, found, missing, vectors)[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, found, missing = await asyncio.to_thread(self._split, "doc", texts)
+        vectors = (
+            await self.underlying.aembed_documents([texts[i] for i in missing])
+            if missing
+            else []
+        )
+        return await asyncio.to_thread(self._store, keys, found, missing, vectors)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        keys, found, missing = await asyncio.to_thread(self._split, "query", [text])
+        vectors = [await self.underlying.aembed_query(text)] if missing else []
+        return (await asyncio.to_thread(self._store, keys, found, missing, vectors))[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._lru),
+                "disk_entries": len(self.store) if self.store is not None else 0,
+            }
@@ -0,0 +1,101 @@
+import asyncio
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from app.agent.vectorstore.ingest import chunk_id
+from app.agent.vectorstore.lexical_index import BM25Index
+
+# ==============================
+# Hybrid Retriever
+# ==============================
+# Dense (vector store) and lexical (BM25) results are merged with
+# reciprocal rank fusion: score(d) = sum over lists of 1 / (rrf_k + rank).
+# Ranks rather than raw scores are fused, so cosine and BM25 scales never
+# have to be calibrated against each other. Chunks are matched across the
+# two lists by content hash (the ingestion id). Each fused chunk keeps its
+# dense cosine similarity (None when only BM25 found it).
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[Document]], k: int, rrf_k: int = 60
+) -> list[Document]:
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = chunk_id(doc.page_content)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in ranked]
+
+
+class HybridRetriever(BaseRetriever):
+    vectorstore: VectorStore
+    lexical: BM25Index
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _fuse(self, dense_hits, lexical_hits, k: int) -> list[tuple[Document, float | None]]:
+        dense = [doc for doc, _ in dense_hits]
+        lexical = [
+            Document(id=doc["id"], page_content=doc["text"], metadata=doc["metadata"])
+            for doc, _ in lexical_hits
+        ]
+
+        dense_scores = {chunk_id(doc.page_content): score for doc, score in dense_hits}
+        fused = reciprocal_rank_fusion([dense, lexical], k, self.rrf_k) if lexical else dense[:k]
+        return [(doc, dense_scores.get(chunk_id(doc.page_content))) for doc in fused]
+
+    def search_with_scores(
+        self, query: str, k: int | None = None
+    ) -> list[tuple[Document, float | None]]:
+        k = k or self.k
+        fetch_k = max(self.fetch_k, k)
+
+        dense_hits = self.vectorstore.similarity_search_with_score(query, k=fetch_k)
+        return self._fuse(dense_hits, self.lexical.search(query, fetch_k), k)
+
+    async def asearch_with_scores(
+        self, query: str, k: int | None = None
+    ) -> list[tuple[Document, float | None]]:
+        k = k or self.k
+        fetch_k = max(self.fetch_k, k)
+
+        # dense lookup (network) and BM25 (local disk) run side by side
+        dense_hits, lexical_hits = await asyncio.gather(
+            self.vectorstore.asimilarity_search_with_score(query, k=fetch_k),
+            asyncio.to_thread(self.lexical.search, query, fetch_k),
+        )
+        return self._fuse(dense_hits, lexical_hits, k)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+        k: int | None = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        return [doc for doc, _ in self.search_with_scores(query, k)]
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+        k: int | None = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        return [doc for doc, _ in await self.asearch_with_scores(query, k)]
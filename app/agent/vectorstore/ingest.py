@@ -0,0 +1,362 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.agent.vectorstore.local_index import LocalVectorStore
+
+# ======================================================
+# DOCUMENT INGESTION PIPELINE
+# ======================================================
+# read -> split -> de-duplicate by content hash -> embed (concurrent batches)
+# -> upsert (concurrent batches)
+# Chunk ids are the hash of the chunk text, so an upsert is idempotent and
+# the same chunk is never stored twice. Ids that were upserted are appended
+# to a manifest file; re-running on unchanged input skips them before
+# embedding, so it costs one read + split + hash per document.
+# When a BM25 index is given, every chunk is also added to it (chunks that
+# are already upserted but missing from it are added without embedding).
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown", ".rst")
+
+
+@dataclass
+class IngestStats:
+    documents: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    already_indexed: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    lexical_indexed: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.upserted / self.elapsed_s if self.elapsed_s else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "chunks_per_second": round(self.chunks_per_second, 1)}
+
+
+def chunk_id(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    message = f"{type(error).__name__} {error}".lower()
+    return any(s in message for s in ("429", "rate limit", "ratelimit", "quota", "resourceexhausted"))
+
+
+class Backoff:
+    """
+    Shared retry policy for all workers
+    A rate-limit error pauses every worker (not just the failing one) for an
+    exponentially growing delay; a success resets it.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, max_attempts: int = 5):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self._streak = 0
+
+    def _wait_for_pause(self):
+        with self._lock:
+            delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def call(self, fn, stats: IngestStats, *args):
+        for attempt in range(1, self.max_attempts + 1):
+            self._wait_for_pause()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                limited = _is_rate_limited(e)
+                with self._lock:
+                    stats.retries += 1
+                    if limited:
+                        stats.rate_limited += 1
+                        self._streak += 1
+                        delay = min(self.max_delay, self.base_delay * 2 ** self._streak)
+                        self._pause_until = max(self._pause_until, time.monotonic() + delay)
+                if not limited:
+                    time.sleep(min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                time.sleep(random.uniform(0, self.base_delay))
+                continue
+
+            with self._lock:
+                self._streak = 0
+            return result
+
+
+class IngestManifest:
+    """Append-only file of chunk ids already present in the index"""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids: set[str] = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._ids = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add_many(self, ids: list[str]):
+        with self._lock:
+            fresh = [i for i in ids if i not in self._ids]
+            self._ids.update(fresh)
+            if self.path and fresh:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write("".join(f"{i}\n" for i in fresh))
+
+    def reset(self):
+        with self._lock:
+            self._ids.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def _upsert(vectorstore, ids: list[str], vectors: list[list[float]], documents: list[Document]):
+    """Write pre-computed embeddings (the store's add_texts would embed again)"""
+    texts = [d.page_content for d in documents]
+    metadatas = [dict(d.metadata) for d in documents]
+
+    if isinstance(vectorstore, LocalVectorStore):
+        vectorstore.index.add(ids, vectors, texts, metadatas)
+        return
+
+    text_key = getattr(vectorstore, "_text_key", "text")
+    vectorstore.index.upsert(
+        vectors=[
+            (doc_id, vector, {**metadata, text_key: text})
+            for doc_id, vector, metadata, text in zip(ids, vectors, metadatas, texts)
+        ]
+    )
+
+
+def iter_sources(sources):
+    """
+    Yields (text, source) for Documents, files and directories of text files.
+    Raw text must come wrapped in a Document: a string is always a path, so
+    text that happens to name a file is never read from disk.
+    """
+    for source in sources:
+        if isinstance(source, Document):
+            yield source.page_content, source.metadata.get("source")
+        elif os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                for name in sorted(files):
+                    if name.lower().endswith(TEXT_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        with open(path, encoding="utf-8", errors="replace") as f:
+                            yield f.read(), path
+        elif os.path.isfile(source):
+            with open(source, encoding="utf-8", errors="replace") as f:
+                yield f.read(), os.fspath(source)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {source}")
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        vectorstore,
+        embeddings,
+        *,
+        manifest: IngestManifest | None = None,
+        lexical=None,
+        chunk_size: int = 800,
+        chunk_overlap: int = 200,
+        embed_batch_size: int = 64,
+        embed_concurrency: int = 4,
+        upsert_batch_size: int = 100,
+        upsert_concurrency: int = 4,
+        backoff: Backoff | None = None,
+    ):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.manifest = manifest if manifest is not None else IngestManifest(None)
+        self.lexical = lexical
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+        )
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_concurrency = upsert_concurrency
+        self.backoff = backoff or Backoff()
+        self.errors: list[str] = []
+
+    # --------------------
+    # Stages
+    # --------------------
+    def _chunks(self, sources, stats: IngestStats):
+        """New, unique chunks as (id, Document)"""
+        seen: set[str] = set()
+        for text, source in iter_sources(sources):
+            if not text or not text.strip():
+                continue
+            stats.documents += 1
+            metadata = {"source": source} if source else {}
+            for doc in self.splitter.create_documents([text], metadatas=[metadata]):
+                stats.chunks += 1
+                doc_id = chunk_id(doc.page_content)
+                if doc_id in seen:
+                    stats.duplicates += 1
+                elif doc_id in self.manifest:
+                    stats.already_indexed += 1
+                    if self.lexical is not None and doc_id not in self.lexical:
+                        self.lexical.add([doc_id], [doc.page_content], [doc.metadata])
+                else:
+                    seen.add(doc_id)
+                    yield doc_id, doc
+
+    def _batches(self, items, size: int):
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _embed(self, batch, stats: IngestStats):
+        texts = [doc.page_content for _, doc in batch]
+        vectors = self.backoff.call(self.embeddings.embed_documents, stats, texts)
+        return batch, vectors
+
+    def _write(self, batch, vectors, stats: IngestStats):
+        ids = [doc_id for doc_id, _ in batch]
+        documents = [d for _, d in batch]
+        self.backoff.call(_upsert, stats, self.vectorstore, ids, vectors, documents)
+        self.manifest.add_many(ids)
+        if self.lexical is not None:
+            self.lexical.add(
+                ids, [d.page_content for d in documents], [d.metadata for d in documents]
+            )
+        return len(ids)
+
+    # --------------------
+    # Run
+    # --------------------
+    def run(self, sources) -> IngestStats:
+        stats = IngestStats()
+        start = time.perf_counter()
+        lexical_before = len(self.lexical) if self.lexical is not None else 0
+
+        embed_pool = ThreadPoolExecutor(self.embed_concurrency, thread_name_prefix="embed")
+        upsert_pool = ThreadPoolExecutor(self.upsert_concurrency, thread_name_prefix="upsert")
+        # Bound in-flight batches so memory stays flat on large inputs
+        max_in_flight = 2 * (self.embed_concurrency + self.upsert_concurrency)
+        embedding, upserting = {}, {}
+        pending: list = []
+
+        def drain(block: bool):
+            futures = set(embedding) | set(upserting)
+            if not futures:
+                return
+            done, _ = wait(futures, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in embedding:
+                    size = embedding.pop(future)
+                    try:
+                        batch, vectors = future.result()
+                    except Exception as e:
+                        stats.failed += size
+                        self.errors.append(f"embedding failed: {e}")
+                        continue
+                    stats.embedded += len(batch)
+                    pending.extend(zip(batch, vectors))
+                else:
+                    size = upserting.pop(future)
+                    try:
+                        stats.upserted += future.result()
+                    except Exception as e:
+                        stats.failed += size
+                        self.errors.append(f"upsert failed: {e}")
+
+        def flush_pending(final: bool):
+            while len(pending) >= self.upsert_batch_size or (final and pending):
+                chunk = pending[: self.upsert_batch_size]
+                del pending[: self.upsert_batch_size]
+                batch = [item for item, _ in chunk]
+                vectors = [vector for _, vector in chunk]
+                future = upsert_pool.submit(self._write, batch, vectors, stats)
+                upserting[future] = len(batch)
+
+        try:
+            for batch in self._batches(self._chunks(sources, stats), self.embed_batch_size):
+                while len(embedding) + len(upserting) >= max_in_flight:
+                    drain(block=True)
+                    flush_pending(final=False)
+                embedding[embed_pool.submit(self._embed, batch, stats)] = len(batch)
+                drain(block=False)
+                flush_pending(final=False)
+
+            while embedding or upserting or pending:
+                flush_pending(final=not embedding)
+                drain(block=True)
+        finally:
+            embed_pool.shutdown(wait=True)
+            upsert_pool.shutdown(wait=True)
+            if self.lexical is not None:
+                self.lexical.save()
+                stats.lexical_indexed = len(self.lexical) - lexical_before
+
+        stats.elapsed_s = round(time.perf_counter() - start, 3)
+        return stats
+
+
+def main():
+    from app.agent.vectorstore.vectorstore import ingest_documents
+
+    parser = argparse.ArgumentParser(description="Ingest text files into the RAG vector store")
+    parser.add_argument("paths", nargs="+", help="Files or directories (.txt, .md, .rst)")
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--embed-concurrency", type=int, default=4)
+    parser.add_argument("--upsert-batch-size", type=int, default=100)
+    parser.add_argument("--upsert-concurrency", type=int, default=4)
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Forget the manifest and upsert every chunk again",
+    )
+    args = parser.parse_args()
+
+    stats, errors = ingest_documents(
+        args.paths,
+        embed_batch_size=args.embed_batch_size,
+        embed_concurrency=args.embed_concurrency,
+        upsert_batch_size=args.upsert_batch_size,
+        upsert_concurrency=args.upsert_concurrency,
+        reindex=args.reindex,
+    )
+    print(json.dumps({"stats": stats.to_dict(), "errors": errors}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
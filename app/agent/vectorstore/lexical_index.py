@@ -0,0 +1,241 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+# ==============================
+# BM25 Inverted Index
+# ==============================
+# Local lexical index over the same chunks as the vector store, so exact
+# terms (merchant / category names, "GST", "reimbursable") are found even
+# when dense search ranks them low.
+#
+# Files in the index directory (arrays load with np.fromfile / memmap):
+#   meta.json        document count, total length, BM25 parameters
+#   terms.txt        sorted vocabulary, one term per line
+#   offsets.u64      postings range per term (len = terms + 1)
+#   postings.u32     document numbers, grouped by term, ascending
+#   tfs.u16          term frequency per posting
+#   doclen.u32       token count per document
+#   docs.jsonl       {"id", "text", "metadata"} per document (append-only)
+#   doc_offsets.u64  byte offset of each docs.jsonl line (texts load lazily)
+#
+# New documents are buffered in memory and merged into the arrays on save().
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its "
+    "me my of on or our so than that the their them then there these this to was "
+    "we were what when where which who will with you your".split()
+)
+
+
+def _stem(token: str) -> str:
+    # Light plural folding: expenses -> expense, bills -> bill (not "gst"/"class")
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        _stem(t.replace("'", ""))
+        for t in _TOKEN.findall((text or "").lower())
+        if t not in STOPWORDS
+    ]
+
+
+class BM25Index:
+    def __init__(self, directory: str, k1: float = 1.2, b: float = 0.75):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.terms_path = os.path.join(directory, "terms.txt")
+        self.offsets_path = os.path.join(directory, "offsets.u64")
+        self.postings_path = os.path.join(directory, "postings.u32")
+        self.tfs_path = os.path.join(directory, "tfs.u16")
+        self.doclen_path = os.path.join(directory, "doclen.u32")
+        self.docs_path = os.path.join(directory, "docs.jsonl")
+        self.doc_offsets_path = os.path.join(directory, "doc_offsets.u64")
+
+        self.count = 0
+        self.total_len = 0
+        self.vocab: dict[str, int] = {}
+        self.terms: list[str] = []
+        self.offsets = np.zeros(1, dtype=np.uint64)
+        self.postings = np.empty(0, dtype=np.uint32)
+        self.tfs = np.empty(0, dtype=np.uint16)
+        self.doclen = np.empty(0, dtype=np.uint32)
+        self.doc_offsets: list[int] = []
+        self.id_to_doc: dict[str, int] = {}
+
+        # Buffered since the last save()
+        self._pending: dict[str, list[tuple[int, int]]] = {}
+        self._pending_len: list[int] = []
+
+        self._load()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.id_to_doc
+
+    # --------------------
+    # Persistence
+    # --------------------
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.total_len = meta["total_len"]
+
+        with open(self.terms_path, encoding="utf-8") as f:
+            self.terms = f.read().split("\n") if meta["terms"] else []
+        self.vocab = {t: i for i, t in enumerate(self.terms)}
+        self.offsets = np.fromfile(self.offsets_path, dtype=np.uint64)
+        if len(self.offsets) > 1 and self.offsets[-1]:
+            self.postings = np.memmap(self.postings_path, dtype=np.uint32, mode="r")
+            self.tfs = np.memmap(self.tfs_path, dtype=np.uint16, mode="r")
+        self.doclen = np.fromfile(self.doclen_path, dtype=np.uint32)
+        self.doc_offsets = np.fromfile(self.doc_offsets_path, dtype=np.uint64).tolist()[
+            : self.count
+        ]
+
+        # Only ids are needed up front; texts are read when a document is returned
+        with open(self.docs_path, encoding="utf-8") as f:
+            for number, offset in enumerate(self.doc_offsets):
+                f.seek(offset)
+                self.id_to_doc[json.loads(f.readline())["id"]] = number
+
+    def _write_array(self, path: str, array: np.ndarray):
+        tmp = f"{path}.tmp"
+        array.tofile(tmp)
+        os.replace(tmp, path)
+
+    def save(self):
+        """Merge buffered documents into the on-disk arrays."""
+        with self._lock:
+            if not self._pending_len:
+                return
+
+            terms = sorted(set(self.terms) | set(self._pending))
+            offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+            postings, tfs = [], []
+            for i, term in enumerate(terms):
+                size = 0
+                old = self.vocab.get(term)
+                if old is not None:
+                    start, stop = int(self.offsets[old]), int(self.offsets[old + 1])
+                    postings.append(np.asarray(self.postings[start:stop]))
+                    tfs.append(np.asarray(self.tfs[start:stop]))
+                    size += stop - start
+                new = self._pending.get(term)
+                if new:
+                    docs, freqs = zip(*new)
+                    postings.append(np.asarray(docs, dtype=np.uint32))
+                    tfs.append(np.minimum(freqs, 65535).astype(np.uint16))
+                    size += len(new)
+                offsets[i + 1] = offsets[i] + size
+
+            postings = np.concatenate(postings) if postings else np.empty(0, dtype=np.uint32)
+            tfs = np.concatenate(tfs) if tfs else np.empty(0, dtype=np.uint16)
+            doclen = np.concatenate([self.doclen, np.asarray(self._pending_len, dtype=np.uint32)])
+
+            self._write_array(self.postings_path, postings.astype(np.uint32))
+            self._write_array(self.tfs_path, tfs.astype(np.uint16))
+            self._write_array(self.offsets_path, offsets)
+            self._write_array(self.doclen_path, doclen)
+            self._write_array(self.doc_offsets_path, np.asarray(self.doc_offsets, dtype=np.uint64))
+            tmp = f"{self.terms_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("\n".join(terms))
+            os.replace(tmp, self.terms_path)
+
+            tmp = f"{self.meta_path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(
+                    {"count": self.count, "total_len": self.total_len, "terms": len(terms)}, f
+                )
+            os.replace(tmp, self.meta_path)
+
+            self.terms = terms
+            self.vocab = {t: i for i, t in enumerate(terms)}
+            self.offsets = offsets
+            self.postings = postings
+            self.tfs = tfs
+            self.doclen = doclen
+            self._pending = {}
+            self._pending_len = []
+
+    # --------------------
+    # Writes
+    # --------------------
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict] | None = None):
+        """Buffer new documents (ids already indexed are skipped); call save() after."""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            with open(self.docs_path, "a", encoding="utf-8") as f:
+                for doc_id, text, metadata in zip(ids, texts, metadatas):
+                    if doc_id in self.id_to_doc:
+                        continue
+                    number = self.count
+                    self.doc_offsets.append(f.tell())
+                    f.write(
+                        json.dumps({"id": doc_id, "text": text, "metadata": metadata}) + "\n"
+                    )
+
+                    tokens = tokenize(text)
+                    for term, tf in Counter(tokens).items():
+                        self._pending.setdefault(term, []).append((number, tf))
+                    self._pending_len.append(len(tokens))
+                    self.total_len += len(tokens)
+                    self.id_to_doc[doc_id] = number
+                    self.count += 1
+
+    # --------------------
+    # Search
+    # --------------------
+    def document(self, number: int) -> dict:
+        with open(self.docs_path, encoding="utf-8") as f:
+            f.seek(self.doc_offsets[number])
+            return json.loads(f.readline())
+
+    def search(self, query: str, k: int = 5) -> list[tuple[dict, float]]:
+        """Top-k documents by BM25 score (only documents matching a query term)."""
+        with self._lock:
+            saved = len(self.doclen)
+            if not saved:
+                return []
+
+            avg_len = self.total_len / self.count if self.count else 1.0
+            lengths = self.doclen.astype(np.float32)
+            norm = self.k1 * (1 - self.b + self.b * lengths / avg_len)
+            scores = np.zeros(saved, dtype=np.float32)
+
+            for term in set(tokenize(query)):
+                i = self.vocab.get(term)
+                if i is None:
+                    continue
+                start, stop = int(self.offsets[i]), int(self.offsets[i + 1])
+                docs = np.asarray(self.postings[start:stop], dtype=np.int64)
+                tf = np.asarray(self.tfs[start:stop], dtype=np.float32)
+                df = stop - start
+                idf = math.log(1 + (saved - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+            matched = np.flatnonzero(scores)
+            if not len(matched):
+                return []
+            top = matched[np.argsort(-scores[matched])[:k]]
+            return [(self.document(int(n)), float(scores[n])) for n in top]
@@ -0,0 +1,537 @@
+import asyncio
+import json
+import os
+import threading
+import uuid
+from typing import Any, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# ==============================
+# Local Vector Index
+# ==============================
+# Offline RAG backend. Vectors are L2-normalized and kept in a memory-mapped
+# matrix, so cosine similarity is a plain matrix product. Queries are scored
+# in batches and the matrix is scanned in blocks. Larger corpora can enable
+# an IVF partitioning (spherical k-means): only the `nprobe` closest
+# partitions are scanned per query.
+#
+# dtype trades memory for accuracy:
+#   float32  4 bytes / dim, exact
+#   int8     1 byte / dim + one float32 scale per row
+#   binary   1 bit / dim (sign), scored by Hamming distance
+# Quantized indexes also keep the float32 vectors on disk (only paged in for
+# candidates): the top `k * rerank` approximate hits are re-scored exactly.
+#
+# Files in the index directory:
+#   meta.json        dim, dtype, row count, IVF settings
+#   vectors.f32|i8|b1  row-major matrix
+#   scales.f32       per-row scale (int8 only)
+#   originals.f32    float32 vectors for re-ranking (int8 / binary only)
+#   docs.jsonl       {"row", "id", "text", "metadata"}; the last line per row wins
+#   centroids.f32    IVF centroids (optional)
+
+BLOCK_ROWS = 65536
+DTYPES = {"float32": ("f32", np.float32), "int8": ("i8", np.int8), "binary": ("b1", np.uint8)}
+# Sign bits lose more ranking information than int8, so look deeper
+DEFAULT_RERANK = {"float32": 0, "int8": 4, "binary": 10}
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[bits].sum(axis=1, dtype=np.int32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization -> (codes, scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits, packed 8 per byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def bytes_per_vector(dim: int, dtype: str) -> int:
+    """Size of one row in the scanned matrix (what every search pages through)"""
+    if dtype == "binary":
+        return (dim + 7) // 8
+    if dtype == "int8":
+        return dim + 4
+    return dim * 4
+
+
+def disk_bytes_per_vector(dim: int, dtype: str) -> int:
+    """Size of one row on disk: the scanned row plus the float32 original of quantized rows"""
+    originals = dim * 4 if dtype != "float32" else 0
+    return bytes_per_vector(dim, dtype) + originals
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on normalized vectors, returns normalized centroids."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(k):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+class LocalVectorIndex:
+    def __init__(
+        self, directory: str, dim: int, dtype: str = "float32", rerank: int | None = None
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+
+        self.directory = directory
+        self.dim = dim
+        self.dtype = dtype
+        # candidates per result re-scored with float32 vectors (0 = off)
+        self.rerank = DEFAULT_RERANK[dtype] if rerank is None or dtype == "float32" else rerank
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+        ext, self._np_dtype = DTYPES[dtype]
+        self.width = (dim + 7) // 8 if dtype == "binary" else dim
+        self.vectors_path = os.path.join(directory, f"vectors.{ext}")
+        self.scales_path = os.path.join(directory, "scales.f32")
+        self.originals_path = os.path.join(directory, "originals.f32")
+        self.docs_path = os.path.join(directory, "docs.jsonl")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.centroids_path = os.path.join(directory, "centroids.f32")
+
+        self.count = 0
+        self.docs: list[dict] = []
+        self.id_to_row: dict[str, int] = {}
+        self.centroids: np.ndarray | None = None
+        self.nprobe = 8
+        self._lists: list[np.ndarray] | None = None
+        self._matrix = None
+        self._scales = None
+        self._originals = None
+
+        self._load()
+
+    # --------------------
+    # Persistence
+    # --------------------
+    def _load(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim or meta["dtype"] != self.dtype:
+                raise ValueError(
+                    f"Index at {self.directory} is {meta['dtype']}/{meta['dim']}d, "
+                    f"expected {self.dtype}/{self.dim}d"
+                )
+            self.count = meta["count"]
+            self.nprobe = meta.get("nprobe", self.nprobe)
+
+        self._truncate_to_count()
+
+        self.docs = [None] * self.count
+        if os.path.exists(self.docs_path):
+            with open(self.docs_path, encoding="utf-8") as f:
+                for line in f:
+                    doc = json.loads(line)
+                    if doc["row"] < self.count:
+                        self.docs[doc["row"]] = doc
+        self.id_to_row = {d["id"]: d["row"] for d in self.docs if d}
+
+        if os.path.exists(self.centroids_path) and self.count:
+            self.centroids = np.fromfile(self.centroids_path, dtype=np.float32).reshape(
+                -1, self.dim
+            )
+        self._remap()
+
+    def _truncate_to_count(self):
+        """
+        Rows are appended before meta.json is saved: after a crash in between,
+        drop the orphan rows, or the next append would land past them while
+        its row numbers (count + offset) point at them.
+        """
+        row_bytes = self.width * np.dtype(self._np_dtype).itemsize
+        for path, size in (
+            (self.vectors_path, self.count * row_bytes),
+            (self.scales_path, self.count * 4),
+            (self.originals_path, self.count * self.dim * 4),
+        ):
+            # Shorter files are left alone (an index from before re-ranking has no originals)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                orphan = os.path.getsize(path) - size
+                print(f"Local index: dropping {orphan} orphan bytes from {path}")
+                os.truncate(path, size)
+
+    def _save_meta(self):
+        tmp = f"{self.meta_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "dim": self.dim,
+                    "dtype": self.dtype,
+                    "count": self.count,
+                    "nprobe": self.nprobe,
+                },
+                f,
+            )
+        os.replace(tmp, self.meta_path)
+
+    def _remap(self):
+        if not self.count:
+            self._matrix = self._scales = self._originals = None
+            self._lists = None
+            return
+        self._matrix = np.memmap(
+            self.vectors_path, dtype=self._np_dtype, mode="r", shape=(self.count, self.width)
+        )
+        if self.dtype == "int8":
+            self._scales = np.memmap(
+                self.scales_path, dtype=np.float32, mode="r", shape=(self.count,)
+            )
+        # Indexes written before re-ranking existed have no originals file
+        self._originals = None
+        if (
+            self.dtype != "float32"
+            and os.path.exists(self.originals_path)
+            and os.path.getsize(self.originals_path) == self.count * self.dim * 4
+        ):
+            self._originals = np.memmap(
+                self.originals_path, dtype=np.float32, mode="r", shape=(self.count, self.dim)
+            )
+        self._lists = None
+
+    # --------------------
+    # Writes
+    # --------------------
+    def _encode(self, vectors: np.ndarray):
+        if self.dtype == "int8":
+            return quantize_int8(vectors)
+        if self.dtype == "binary":
+            return quantize_binary(vectors), None
+        return vectors.astype(np.float32), None
+
+    def add(
+        self,
+        ids: list[str],
+        vectors: np.ndarray,
+        texts: list[str],
+        metadatas: list[dict] | None = None,
+    ):
+        """Upsert rows: existing ids are overwritten in place, new ids appended."""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            updates, appends = [], []
+            for i, doc_id in enumerate(ids):
+                (updates if doc_id in self.id_to_row else appends).append(i)
+            # Same id twice in one call: keep the last one
+            appends = list({ids[i]: i for i in appends}.values())
+
+            if updates:
+                rows = [self.id_to_row[ids[i]] for i in updates]
+                codes, scales = self._encode(vectors[updates])
+                matrix = np.memmap(
+                    self.vectors_path,
+                    dtype=self._np_dtype,
+                    mode="r+",
+                    shape=(self.count, self.width),
+                )
+                matrix[rows] = codes
+                matrix.flush()
+                if scales is not None:
+                    s = np.memmap(self.scales_path, dtype=np.float32, mode="r+", shape=(self.count,))
+                    s[rows] = scales
+                    s.flush()
+                if self._originals is not None:
+                    o = np.memmap(
+                        self.originals_path, dtype=np.float32, mode="r+", shape=(self.count, self.dim)
+                    )
+                    o[rows] = vectors[updates]
+                    o.flush()
+
+            if appends:
+                codes, scales = self._encode(vectors[appends])
+                with open(self.vectors_path, "ab") as f:
+                    f.write(codes.tobytes())
+                if scales is not None:
+                    with open(self.scales_path, "ab") as f:
+                        f.write(scales.tobytes())
+                if self.dtype != "float32" and (self._originals is not None or not self.count):
+                    with open(self.originals_path, "ab") as f:
+                        f.write(vectors[appends].tobytes())
+
+            new_docs = []
+            for i in updates:
+                new_docs.append({"row": self.id_to_row[ids[i]], "id": ids[i]})
+            for offset, i in enumerate(appends):
+                new_docs.append({"row": self.count + offset, "id": ids[i]})
+            for doc, i in zip(new_docs, updates + appends):
+                doc["text"] = texts[i]
+                doc["metadata"] = metadatas[i]
+
+            with open(self.docs_path, "a", encoding="utf-8") as f:
+                for doc in new_docs:
+                    f.write(json.dumps(doc) + "\n")
+
+            self.count += len(appends)
+            self.docs.extend([None] * len(appends))
+            for doc in new_docs:
+                self.docs[doc["row"]] = doc
+                self.id_to_row[doc["id"]] = doc["row"]
+
+            self._save_meta()
+            self._remap()
+
+            if self.centroids is not None and appends:
+                # keep IVF assignments current for appended rows
+                self._lists = None
+
+    # --------------------
+    # IVF
+    # --------------------
+    def build_ivf(self, nlist: int | None = None, nprobe: int = 8, sample: int = 50000):
+        """Train IVF partitions (default nlist ~ sqrt(rows))."""
+        with self._lock:
+            if not self.count:
+                return
+            nlist = nlist or max(1, int(np.sqrt(self.count)))
+            rng = np.random.default_rng(0)
+            rows = np.sort(rng.choice(self.count, min(sample, self.count), replace=False))
+            train = self._rows_float(rows)
+            self.centroids = kmeans(train, nlist)
+            self.centroids.tofile(self.centroids_path)
+            self.nprobe = nprobe
+            self._save_meta()
+            self._lists = None
+
+    def drop_ivf(self):
+        with self._lock:
+            self.centroids = None
+            self._lists = None
+            if os.path.exists(self.centroids_path):
+                os.remove(self.centroids_path)
+
+    def _inverted_lists(self) -> list[np.ndarray]:
+        if self._lists is None:
+            assign = np.empty(self.count, dtype=np.int32)
+            for start in range(0, self.count, BLOCK_ROWS):
+                block = self._rows_float(np.arange(start, min(start + BLOCK_ROWS, self.count)))
+                assign[start : start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c] : bounds[c + 1]] for c in range(len(self.centroids))]
+        return self._lists
+
+    # --------------------
+    # Search
+    # --------------------
+    def _decode(self, rows) -> np.ndarray:
+        """Stored rows as (approximate) unit float32 vectors."""
+        if self.dtype == "binary":
+            bits = np.unpackbits(np.asarray(self._matrix[rows]), axis=1, count=self.dim)
+            return (bits.astype(np.float32) * 2 - 1) / np.sqrt(self.dim, dtype=np.float32)
+        block = np.asarray(self._matrix[rows], dtype=np.float32)
+        if self.dtype == "int8":
+            block *= np.asarray(self._scales[rows])[:, None]
+        return block
+
+    def _rows_float(self, rows) -> np.ndarray:
+        if self._originals is not None:
+            return np.asarray(self._originals[rows])
+        return self._decode(rows)
+
+    def _block_scores(self, queries: np.ndarray, rows) -> np.ndarray:
+        if self.dtype == "binary":
+            # 1 - 2 * hamming / dim: the cosine of the two sign vectors
+            codes = np.asarray(self._matrix[rows])
+            query_bits = quantize_binary(queries)
+            scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+            for i, bits in enumerate(query_bits):
+                scores[i] = 1 - 2 * _popcount_rows(codes ^ bits) / self.dim
+            return scores
+        if self.dtype == "int8":
+            codes = np.asarray(self._matrix[rows], dtype=np.float32)
+            return (queries @ codes.T) * np.asarray(self._scales[rows])
+        return queries @ np.asarray(self._matrix[rows]).T
+
+    def _scan(self, queries: np.ndarray, rows: np.ndarray | None, k: int):
+        """Scores of `queries` against `rows` (all rows when None), exact for float32."""
+        total = self.count if rows is None else len(rows)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, total, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, total)
+            block_rows = np.arange(start, stop) if rows is None else rows[start:stop]
+            scores = self._block_scores(queries, slice(start, stop) if rows is None else block_rows)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            candidates = np.concatenate(
+                [best_rows, np.broadcast_to(block_rows, (len(queries), len(block_rows)))],
+                axis=1,
+            )
+            keep = min(k, scores.shape[1])
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(candidates, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return (
+            np.take_along_axis(best_rows, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1),
+        )
+
+    def _rerank(self, query: np.ndarray, rows: np.ndarray, k: int):
+        """Exact float32 scores for the approximate candidates."""
+        rows = np.sort(rows)
+        scores = self._originals[rows] @ query
+        order = np.argsort(-scores)[:k]
+        return rows[order], scores[order]
+
+    def search(self, queries: np.ndarray, k: int = 5) -> list[list[tuple[dict, float]]]:
+        """Batched cosine top-k: one result list per query row."""
+        queries = _normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dim))
+
+        with self._lock:
+            if not self.count:
+                return [[] for _ in queries]
+
+            rerank = self.rerank and self._originals is not None
+            depth = k * self.rerank if rerank else k
+
+            if self.centroids is None:
+                rows, scores = self._scan(queries, None, depth)
+                results = list(zip(rows, scores))
+            else:
+                lists = self._inverted_lists()
+                probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, : self.nprobe]
+                results = []
+                for q, probe in zip(queries, probes):
+                    candidates = np.concatenate([lists[c] for c in probe])
+                    if not len(candidates):
+                        results.append(([], []))
+                        continue
+                    rows, scores = self._scan(q[None, :], np.sort(candidates), depth)
+                    results.append((rows[0], scores[0]))
+
+            if rerank:
+                results = [
+                    self._rerank(q, rows, k) if len(rows) else (rows, scores)
+                    for q, (rows, scores) in zip(queries, results)
+                ]
+
+            return [
+                [(self.docs[int(r)], float(s)) for r, s in zip(rows, scores) if self.docs[int(r)]]
+                for rows, scores in results
+            ]
+
+
+# ==============================
+# LangChain VectorStore
+# ==============================
+
+
+class LocalVectorStore(VectorStore):
+    """VectorStore over LocalVectorIndex (drop-in for PineconeVectorStore)"""
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings):
+        self.index = index
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        self.index.add(ids, vectors, texts, metadatas)
+        return ids
+
+    def _to_documents(self, hits) -> list[tuple[Document, float]]:
+        return [
+            (Document(id=doc["id"], page_content=doc["text"], metadata=doc["metadata"]), score)
+            for doc, score in hits
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        vector = self._embedding.embed_query(query)
+        return self._to_documents(self.index.search(np.asarray([vector]), k)[0])
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        vector = await self._embedding.aembed_query(query)
+        hits = await asyncio.to_thread(self.index.search, np.asarray([vector]), k)
+        return self._to_documents(hits[0])
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [d for d, _ in self._to_documents(self.index.search(np.asarray([embedding]), k)[0])]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def batch_similarity_search_with_score(
+        self, queries: list[str], k: int = 4
+    ) -> list[list[tuple[Document, float]]]:
+        """Score many queries in one matrix product."""
+        vectors = np.asarray([self._embedding.embed_query(q) for q in queries], dtype=np.float32)
+        return [self._to_documents(hits) for hits in self.index.search(vectors, k)]
+
+    def _select_relevance_score_fn(self):
+        # scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        directory: str = "vector_index",
+        dim: int | None = None,
+        dtype: str = "float32",
+        rerank: int | None = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        vectors = np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+        index = LocalVectorIndex(directory, dim or vectors.shape[1], dtype, rerank)
+        index.add(ids or [str(uuid.uuid4()) for _ in texts], vectors, texts, metadatas)
+        return cls(index, embedding)
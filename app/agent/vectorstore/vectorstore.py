@@ -1,71 +1,271 @@
+import asyncio
 import os
+import threading
 from pinecone import Pinecone, ServerlessSpec
+from langchain_core.documents import Document
 from langchain_pinecone import PineconeVectorStore
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
-from app.agent.config.config import PINECONE_API_KEY, GEMINI_API_KEY
+from app.agent.config.config import (
+    DATA_DIR,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_LRU_SIZE,
+    EMBEDDING_DIMENSION,
+    GEMINI_API_KEY,
+    HYBRID_FETCH_K,
+    HYBRID_RRF_K,
+    HYBRID_SEARCH_ENABLED,
+    LOCAL_INDEX_DTYPE,
+    LOCAL_INDEX_IVF_MIN_ROWS,
+    LOCAL_INDEX_NPROBE,
+    LOCAL_INDEX_RERANK,
+    PINECONE_API_KEY,
+    VECTOR_BACKEND,
+)
+from app.agent.vectorstore.embedding_cache import CachedEmbeddings, MmapVectorStore
+from app.agent.vectorstore.hybrid import HybridRetriever
+from app.agent.vectorstore.ingest import IngestManifest, IngestPipeline, IngestStats
+from app.agent.vectorstore.lexical_index import BM25Index
+from app.agent.vectorstore.local_index import LocalVectorIndex, LocalVectorStore
 
 # set environ for pinecone
-os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
-os.environ["GEMINI_API_KEY"] = GEMINI_API_KEY
+if PINECONE_API_KEY:
+    os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
+if GEMINI_API_KEY:
+    os.environ["GEMINI_API_KEY"] = GEMINI_API_KEY
+
+# a Pinecone index has a fixed dimension: other sizes get their own index
+INDEX_NAME = (
+    "expense_index" if EMBEDDING_DIMENSION == 3072 else f"expense-index-{EMBEDDING_DIMENSION}"
+)
 
-INDEX_NAME = "expense_index"
+# initialize pinecone client (not needed for the local backend)
+pc = Pinecone(api_key=PINECONE_API_KEY) if VECTOR_BACKEND == "pinecone" else None
 
-# initialize pinecone client
-pc = Pinecone(api_key=PINECONE_API_KEY)
+EMBEDDING_MODEL = "gemini-embedding-001"
 
 # define embedding models
 embeddings = GoogleGenerativeAIEmbeddings(
-    model="gemini-embedding-001",
+    model=EMBEDDING_MODEL,
     google_api_key=GEMINI_API_KEY,
-    output_dimensionality=3072,
+    output_dimensionality=EMBEDDING_DIMENSION,
 )
 
+# repeated / re-ingested texts are served from the embedding cache
+if EMBEDDING_CACHE_ENABLED:
+    embeddings = CachedEmbeddings(
+        embeddings,
+        MmapVectorStore(
+            os.path.join(DATA_DIR, "embeddings", f"{EMBEDDING_MODEL}-{EMBEDDING_DIMENSION}"),
+            dim=EMBEDDING_DIMENSION,
+        ),
+        lru_size=EMBEDDING_CACHE_LRU_SIZE,
+    )
 
-# retriever
-def get_retriever():
-    """Initializes and returns the Pinecone vector store retriever"""
 
-    # ensure the index exists, create if not
+# ==============================
+# Process-wide vector store lifecycle
+# ==============================
+# The index is checked once, then the same vector store (for Pinecone, its
+# Index HTTP connection pool) serves every lookup until refreshed.
+# VECTOR_BACKEND picks Pinecone or the local numpy / mmap index.
+# With HYBRID_SEARCH_ENABLED the retriever also queries a local BM25 index
+# over the same chunks and fuses both rankings.
+
+_lock = threading.Lock()
+_vectorstore: PineconeVectorStore | LocalVectorStore | None = None
+_lexical: BM25Index | None = None
+_retriever = None
+
+
+def _ensure_index():
+    """Create the index if missing (one control-plane round trip)"""
     if INDEX_NAME not in pc.list_indexes().names():
         print("Creating new index")
         pc.create_index(
             name=INDEX_NAME,
-            dimension=3072,
+            dimension=EMBEDDING_DIMENSION,
             metric="cosine",
             spec=ServerlessSpec(cloud="aws", region="us-east-1"),
         )
         print("Created pinecone index")
 
-    vectorstore = PineconeVectorStore(index_name=INDEX_NAME, embedding=embeddings)
 
-    return vectorstore.as_retriever(search_kwargs={"k": 5})
+def _local_index_path() -> str:
+    name = f"expense_index-{EMBEDDING_DIMENSION}"
+    if LOCAL_INDEX_DTYPE != "float32":
+        name += f"-{LOCAL_INDEX_DTYPE}"
+    return os.path.join(DATA_DIR, "vector_index", name)
 
 
-# upload documents to vector store
-def add_document(text_content: str):
+def _build_vectorstore():
+    if VECTOR_BACKEND == "local":
+        index = LocalVectorIndex(
+            _local_index_path(),
+            dim=EMBEDDING_DIMENSION,
+            dtype=LOCAL_INDEX_DTYPE,
+            rerank=LOCAL_INDEX_RERANK,
+        )
+        return LocalVectorStore(index, embedding=embeddings)
+
+    _ensure_index()
+    return PineconeVectorStore(index=pc.Index(INDEX_NAME), embedding=embeddings)
+
+
+def _index_key() -> str:
+    """Names the files that belong to the current backend / index"""
+    if VECTOR_BACKEND == "local":
+        return f"local-{os.path.basename(_local_index_path())}"
+    return f"{VECTOR_BACKEND}-{INDEX_NAME}-{EMBEDDING_DIMENSION}"
+
+
+def _maybe_partition(vectorstore):
+    """Train IVF partitions on the local index once it is large enough"""
+    if not isinstance(vectorstore, LocalVectorStore) or not LOCAL_INDEX_IVF_MIN_ROWS:
+        return
+    index = vectorstore.index
+    if index.centroids is None and index.count >= LOCAL_INDEX_IVF_MIN_ROWS:
+        print(f"Training IVF partitions for {index.count} vectors")
+        index.build_ivf(nprobe=LOCAL_INDEX_NPROBE)
+
+
+def get_vectorstore() -> PineconeVectorStore | LocalVectorStore:
+    """Returns the shared vector store, initializing it on first use"""
+    global _vectorstore, _lexical, _retriever
+
+    if _vectorstore is None:
+        with _lock:
+            if _vectorstore is None:
+                vectorstore = _build_vectorstore()
+                if HYBRID_SEARCH_ENABLED:
+                    _lexical = BM25Index(os.path.join(DATA_DIR, "lexical_index", _index_key()))
+                    _retriever = HybridRetriever(
+                        vectorstore=vectorstore,
+                        lexical=_lexical,
+                        k=5,
+                        fetch_k=HYBRID_FETCH_K,
+                        rrf_k=HYBRID_RRF_K,
+                    )
+                else:
+                    _retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+                _vectorstore = vectorstore
+
+    return _vectorstore
+
+
+def get_lexical_index() -> BM25Index | None:
+    """Returns the shared BM25 index (None when hybrid search is disabled)"""
+    get_vectorstore()
+    return _lexical
+
+
+# retriever
+def get_retriever():
+    """Returns the shared vector store retriever"""
+    get_vectorstore()
+    return _retriever
+
+
+def retrieve_with_scores(query: str, k: int = 5) -> list[tuple[Document, float | None]]:
+    """Top-k chunks with their dense cosine similarity (None for BM25-only hits)"""
+    retriever = get_retriever()
+    if isinstance(retriever, HybridRetriever):
+        return retriever.search_with_scores(query, k)
+    return get_vectorstore().similarity_search_with_score(query, k=k)
+
+
+async def aretrieve_with_scores(query: str, k: int = 5) -> list[tuple[Document, float | None]]:
+    """Async retrieve_with_scores (async embedding and index clients)"""
+    retriever = _retriever or await asyncio.to_thread(get_retriever)
+    if isinstance(retriever, HybridRetriever):
+        return await retriever.asearch_with_scores(query, k)
+    return await get_vectorstore().asimilarity_search_with_score(query, k=k)
+
+
+async def aopen_vectorstore():
+    """Keep Pinecone's async HTTP client open on the running loop (else one per query)"""
+    vectorstore = await asyncio.to_thread(get_vectorstore)
+    if isinstance(vectorstore, PineconeVectorStore):
+        await vectorstore.__aenter__()
+
+
+async def aclose_vectorstore():
+    if isinstance(_vectorstore, PineconeVectorStore):
+        await _vectorstore.aclose()
+
+
+def init_vectorstore():
+    """Warm up at startup: check the index and open connections once"""
+    get_vectorstore()
+
+
+def invalidate_retriever():
+    """Drop the cached store, the next lookup re-checks the index and reconnects"""
+    global _vectorstore, _lexical, _retriever
+
+    with _lock:
+        _vectorstore = None
+        _lexical = None
+        _retriever = None
+
+
+def refresh_retriever():
+    """Rebuild the cached store now (e.g. after the index was recreated)"""
+    invalidate_retriever()
+    return get_retriever()
+
+
+def ingest_documents(
+    sources,
+    *,
+    embed_batch_size: int = 64,
+    embed_concurrency: int = 4,
+    upsert_batch_size: int = 100,
+    upsert_concurrency: int = 4,
+    reindex: bool = False,
+) -> tuple[IngestStats, list[str]]:
     """
-    Adds a single text document to the Pinecone vector store
-    Splits the text into chunks before embedding and upsetting
+    Ingests Documents, text files or directories into the shared vector store
+    Chunks already in the index (by content hash) are skipped
     """
-    if not text_content:
-        raise ValueError("Document content cannot be empty")
+    manifest = IngestManifest(os.path.join(DATA_DIR, "ingest", f"{_index_key()}.ids"))
+    if reindex:
+        manifest.reset()
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800, chunk_overlap=200, add_start_index=True
+    vectorstore = get_vectorstore()
+    pipeline = IngestPipeline(
+        vectorstore,
+        embeddings,
+        manifest=manifest,
+        lexical=get_lexical_index(),
+        embed_batch_size=embed_batch_size,
+        embed_concurrency=embed_concurrency,
+        upsert_batch_size=upsert_batch_size,
+        upsert_concurrency=upsert_concurrency,
     )
+    stats = pipeline.run(sources)
+    _maybe_partition(vectorstore)
 
-    # create langchain document objects from the raw text
-    documents = text_splitter.create_documents([text_content])
-
-    print("Splitting document into chunk for indexing..")
+    print(
+        f"Ingested {stats.upserted} new chunks into {VECTOR_BACKEND} "
+        f"({stats.already_indexed} already indexed, {stats.duplicates} duplicates, "
+        f"{stats.failed} failed) in {stats.elapsed_s}s "
+        f"[{stats.chunks_per_second:.1f} chunks/s]"
+    )
+    return stats, pipeline.errors
 
-    # get vector store instance to add documents
-    vectorstore = PineconeVectorStore(index_name=INDEX_NAME, embedding=embeddings)
 
-    # add documents to vector store
-    vectorstore.add_documents(documents=documents)
+# upload documents to vector store
+def add_document(text_content: str):
+    """
+    Adds a single text document to the vector store
+    Splits the text into chunks before embedding and upserting
+    """
+    if not text_content:
+        raise ValueError("Document content cannot be empty")
 
-    print("Successfully added chunks to pinecone vector store")
+    # Wrapped, so the text is never mistaken for a path to read
+    stats, errors = ingest_documents([Document(page_content=text_content)])
+    if errors:
+        raise RuntimeError(f"Failed to add {stats.failed} chunks: {errors[0]}")
@@ -0,0 +1,115 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import time
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.agent.config.config import (
+    SERVICE_AUTH_SECRET,
+    SERVICE_TOKEN_TTL,
+    SERVICE_WEBHOOK_SECRET,
+)
+
+# ==============================
+# Caller Authentication
+# ==============================
+# The user id picks the graph thread and is bound onto every expense tool call,
+# so it is never taken from a request body:
+#   /chat, /chat/approve  Authorization: Bearer <token>, where the token is
+#                         "<user_id b64>.<expiry>.<hmac-sha256>" signed with
+#                         SERVICE_AUTH_SECRET (issued by the login / gateway side)
+#   /webhook              X-Hub-Signature-256: sha256=<hmac of the raw body>
+#                         with SERVICE_WEBHOOK_SECRET; the signed body names the user
+# Without a secret configured the matching endpoints refuse every request.
+#
+#   python -m app.auth issue USER_ID [--ttl SECONDS]
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(secret: str, payload: bytes) -> str:
+    return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+
+def issue_token(user_id: str, ttl: int = SERVICE_TOKEN_TTL, secret: str | None = None) -> str:
+    secret = SERVICE_AUTH_SECRET if secret is None else secret
+    if not secret:
+        raise RuntimeError("SERVICE_AUTH_SECRET is not set")
+    payload = f"{_b64(user_id.encode())}.{int(time.time()) + ttl}"
+    return f"{payload}.{_sign(secret, payload.encode())}"
+
+
+def verify_token(token: str, secret: str | None = None) -> str | None:
+    """The user id a valid, unexpired token was issued for, else None."""
+    secret = SERVICE_AUTH_SECRET if secret is None else secret
+    if not secret:
+        return None
+    try:
+        encoded, expiry, signature = token.split(".")
+        payload = f"{encoded}.{expiry}"
+        if not hmac.compare_digest(signature, _sign(secret, payload.encode())):
+            return None
+        if int(expiry) < time.time():
+            return None
+        return _unb64(encoded).decode() or None
+    except ValueError:
+        return None
+
+
+def verify_body_signature(body: bytes, header: str | None, secret: str | None = None) -> bool:
+    secret = SERVICE_WEBHOOK_SECRET if secret is None else secret
+    if not secret or not header or not header.startswith("sha256="):
+        return False
+    return hmac.compare_digest(header.removeprefix("sha256="), _sign(secret, body))
+
+
+# --------------------
+# FastAPI dependencies
+# --------------------
+async def authenticated_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> str:
+    if not SERVICE_AUTH_SECRET:
+        raise HTTPException(status_code=503, detail="Authentication is not configured")
+    user_id = verify_token(credentials.credentials) if credentials else None
+    if user_id is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing bearer token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
+
+
+async def verified_webhook(request: Request) -> bytes:
+    """Raw body of a webhook call whose signature checks out."""
+    if not SERVICE_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook signing is not configured")
+    body = await request.body()
+    if not verify_body_signature(body, request.headers.get("x-hub-signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Issue a bearer token for the HTTP service")
+    parser.add_argument("command", choices=["issue"])
+    parser.add_argument("user_id")
+    parser.add_argument("--ttl", type=int, default=SERVICE_TOKEN_TTL, help="Seconds")
+    args = parser.parse_args()
+    print(issue_token(args.user_id, args.ttl))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+from datetime import date
+
+from supabase import Client
+
+# Rows per multi-row INSERT
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "100"))
+
+VALID_SOURCES = ("cash", "upi")
+
+EXPENSE_COLUMNS = (
+    "user_id",
+    "amount",
+    "category",
+    "expense_date",
+    "source",
+    "merchant",
+    "note",
+)
+
+
+# ======================================================
+# VALIDATION
+# ======================================================
+def validate_expense(
+    item: dict, user_id: str | None = None
+) -> tuple[dict | None, str | None]:
+    """
+    Normalize one expense dict into an `expenses` row.
+    `user_id`, when given, overrides the item's own user_id.
+    Returns (row, None) when valid, (None, error message) otherwise.
+    """
+    if not isinstance(item, dict):
+        return None, "Expense must be an object"
+
+    if user_id is not None:
+        item = {**item, "user_id": user_id}
+
+    missing = [
+        k
+        for k in ("user_id", "amount", "category", "expense_date", "source")
+        if item.get(k) in (None, "")
+    ]
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+
+    try:
+        amount = float(item["amount"])
+    except (TypeError, ValueError):
+        return None, f"Invalid amount: {item['amount']!r}"
+    if amount <= 0:
+        return None, "Amount must be positive"
+
+    try:
+        expense_date = date.fromisoformat(str(item["expense_date"])).isoformat()
+    except ValueError:
+        return None, f"Invalid expense_date (expected YYYY-MM-DD): {item['expense_date']!r}"
+
+    source = str(item["source"]).strip().lower()
+    if source not in VALID_SOURCES:
+        return None, f"Invalid source {item['source']!r}, expected one of {VALID_SOURCES}"
+
+    return {
+        "user_id": str(item["user_id"]),
+        "amount": amount,
+        "category": str(item["category"]).strip(),
+        "expense_date": expense_date,
+        "source": source,
+        "merchant": item.get("merchant") or None,
+        "note": item.get("note") or None,
+    }, None
+
+
+# ======================================================
+# BATCHED INSERT
+# ======================================================
+def insert_expenses_batched(
+    supabase: Client,
+    rows: list[dict],
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE,
+) -> list[dict]:
+    """
+    Insert rows with one multi-row INSERT per chunk.
+    If a chunk is rejected, its rows are retried one by one so a single bad
+    row only fails itself.
+
+    Returns one result per input row, in order:
+    {"status": "success", "expense_id": ...} or {"status": "error", "message": ...}
+    """
+    results: list[dict] = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+
+        try:
+            inserted = supabase.table("expenses").insert(chunk).execute().data
+            results.extend(
+                {"status": "success", "expense_id": r["id"]} for r in inserted
+            )
+            continue
+        except Exception as e:
+            print(f"Bulk insert chunk failed ({e}), retrying rows individually")
+
+        for row in chunk:
+            try:
+                inserted = supabase.table("expenses").insert(row).execute().data
+                results.append({"status": "success", "expense_id": inserted[0]["id"]})
+            except Exception as e:
+                results.append({"status": "error", "message": str(e)})
+
+    return results
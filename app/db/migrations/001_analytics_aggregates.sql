@@ -0,0 +1,80 @@
+-- ======================================================
+-- ANALYTICS AGGREGATES
+-- ======================================================
+-- Server-side SUM / COUNT / GROUP BY for app/mcp/analytics_server.py.
+-- Apply in the Supabase SQL editor (or `supabase db push`).
+-- Payload size stays constant no matter how many expenses a user has.
+
+create index if not exists expenses_user_date_idx
+    on expenses (user_id, expense_date);
+
+create index if not exists expenses_user_category_date_idx
+    on expenses (user_id, category, expense_date);
+
+
+-- ======================================================
+-- TOTAL SPEND (optionally for one category)
+-- ======================================================
+create or replace function expense_totals(
+    p_user_id expenses.user_id%type,
+    p_from date,
+    p_to date,
+    p_category expenses.category%type default null
+)
+returns table (total_spent numeric, expense_count bigint)
+language sql
+stable
+as $$
+    select coalesce(sum(e.amount), 0)::numeric, count(*)
+    from expenses e
+    where e.user_id = p_user_id
+      and e.expense_date between p_from and p_to
+      and (p_category is null or e.category = p_category);
+$$;
+
+
+-- ======================================================
+-- SPEND GROUPED BY CATEGORY
+-- ======================================================
+create or replace function expense_category_totals(
+    p_user_id expenses.user_id%type,
+    p_from date,
+    p_to date
+)
+returns table (category text, total_spent numeric, expense_count bigint)
+language sql
+stable
+as $$
+    select e.category::text, sum(e.amount)::numeric, count(*)
+    from expenses e
+    where e.user_id = p_user_id
+      and e.expense_date between p_from and p_to
+    group by e.category
+    order by 2 desc;
+$$;
+
+
+-- ======================================================
+-- CATEGORY SPEND + LIMIT (one round trip)
+-- ======================================================
+create or replace function expense_category_limit_status(
+    p_user_id expenses.user_id%type,
+    p_category expenses.category%type,
+    p_from date,
+    p_to date
+)
+returns table (total_spent numeric, monthly_limit numeric)
+language sql
+stable
+as $$
+    select
+        t.total_spent,
+        (
+            select c.monthly_limit::numeric
+            from categories c
+            where c.user_id = p_user_id
+              and c.name = p_category
+            limit 1
+        )
+    from expense_totals(p_user_id, p_from, p_to, p_category) t;
+$$;
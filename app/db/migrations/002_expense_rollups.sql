@@ -0,0 +1,191 @@
+-- ======================================================
+-- PER-USER MONTH / CATEGORY ROLLUPS
+-- ======================================================
+-- expense_rollups holds SUM/COUNT per (user_id, month, category).
+-- It is maintained incrementally by statement-level triggers on `expenses`,
+-- inside the same transaction as every write made by app/mcp/expense_server.py
+-- (add / update / delete / clear_all), so it can never drift.
+--
+-- The analytics functions from 001 are redefined on top of it: whole months
+-- come from the rollup, only partial edge days are read from raw rows.
+-- Requires 001_analytics_aggregates.sql.
+
+begin;
+
+-- Block writes while backfilling so no row is missed or double counted
+lock table expenses in share row exclusive mode;
+
+
+-- ======================================================
+-- TABLE + BACKFILL
+-- ======================================================
+-- Created from a SELECT so the column types follow `expenses`.
+do $$
+begin
+    if to_regclass('public.expense_rollups') is null then
+        create table expense_rollups as
+        select
+            e.user_id,
+            date_trunc('month', e.expense_date)::date as month,
+            e.category,
+            sum(e.amount)::numeric as total_spent,
+            count(*)::bigint as expense_count
+        from expenses e
+        group by 1, 2, 3;
+
+        alter table expense_rollups
+            add primary key (user_id, month, category);
+    end if;
+end
+$$;
+
+
+-- ======================================================
+-- INCREMENTAL MAINTENANCE
+-- ======================================================
+create or replace function expense_rollups_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        insert into expense_rollups as r
+            (user_id, month, category, total_spent, expense_count)
+        select
+            o.user_id,
+            date_trunc('month', o.expense_date)::date,
+            o.category,
+            -sum(o.amount)::numeric,
+            -count(*)::bigint
+        from old_rows o
+        group by 1, 2, 3
+        on conflict (user_id, month, category) do update
+            set total_spent = r.total_spent + excluded.total_spent,
+                expense_count = r.expense_count + excluded.expense_count;
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into expense_rollups as r
+            (user_id, month, category, total_spent, expense_count)
+        select
+            n.user_id,
+            date_trunc('month', n.expense_date)::date,
+            n.category,
+            sum(n.amount)::numeric,
+            count(*)::bigint
+        from new_rows n
+        group by 1, 2, 3
+        on conflict (user_id, month, category) do update
+            set total_spent = r.total_spent + excluded.total_spent,
+                expense_count = r.expense_count + excluded.expense_count;
+    end if;
+
+    if tg_op in ('UPDATE', 'DELETE') then
+        delete from expense_rollups r
+        where r.expense_count <= 0
+          and r.user_id in (select o.user_id from old_rows o);
+    end if;
+
+    return null;
+end;
+$$;
+
+-- Transition tables allow only one event per trigger
+drop trigger if exists expense_rollups_ins on expenses;
+create trigger expense_rollups_ins
+    after insert on expenses
+    referencing new table as new_rows
+    for each statement execute function expense_rollups_apply();
+
+drop trigger if exists expense_rollups_upd on expenses;
+create trigger expense_rollups_upd
+    after update on expenses
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function expense_rollups_apply();
+
+drop trigger if exists expense_rollups_del on expenses;
+create trigger expense_rollups_del
+    after delete on expenses
+    referencing old table as old_rows
+    for each statement execute function expense_rollups_apply();
+
+
+-- ======================================================
+-- RANGE = WHOLE MONTHS (ROLLUP) + EDGE DAYS (RAW)
+-- ======================================================
+create or replace function expense_range_category_totals(
+    p_user_id expenses.user_id%type,
+    p_from date,
+    p_to date
+)
+returns table (category text, total_spent numeric, expense_count bigint)
+language sql
+stable
+as $$
+    with bounds as (
+        select
+            -- first whole month inside the range
+            case
+                when p_from = date_trunc('month', p_from)::date then p_from
+                else (date_trunc('month', p_from) + interval '1 month')::date
+            end as m_start,
+            -- first day after the last whole month inside the range
+            case
+                when p_to = (date_trunc('month', p_to) + interval '1 month - 1 day')::date
+                    then (date_trunc('month', p_to) + interval '1 month')::date
+                else date_trunc('month', p_to)::date
+            end as m_end
+    ),
+    parts as (
+        select r.category, r.total_spent, r.expense_count
+        from expense_rollups r, bounds b
+        where r.user_id = p_user_id
+          and r.month >= b.m_start
+          and r.month < b.m_end
+
+        union all
+
+        select e.category, e.amount::numeric, 1::bigint
+        from expenses e, bounds b
+        where e.user_id = p_user_id
+          and e.expense_date between p_from and p_to
+          and (e.expense_date < b.m_start or e.expense_date >= b.m_end)
+    )
+    select p.category::text, sum(p.total_spent)::numeric, sum(p.expense_count)::bigint
+    from parts p
+    group by p.category
+    order by 2 desc;
+$$;
+
+
+-- ======================================================
+-- ANALYTICS FUNCTIONS (same signatures as 001)
+-- ======================================================
+create or replace function expense_totals(
+    p_user_id expenses.user_id%type,
+    p_from date,
+    p_to date,
+    p_category expenses.category%type default null
+)
+returns table (total_spent numeric, expense_count bigint)
+language sql
+stable
+as $$
+    select coalesce(sum(t.total_spent), 0)::numeric, coalesce(sum(t.expense_count), 0)::bigint
+    from expense_range_category_totals(p_user_id, p_from, p_to) t
+    where p_category is null or t.category = p_category::text;
+$$;
+
+create or replace function expense_category_totals(
+    p_user_id expenses.user_id%type,
+    p_from date,
+    p_to date
+)
+returns table (category text, total_spent numeric, expense_count bigint)
+language sql
+stable
+as $$
+    select * from expense_range_category_totals(p_user_id, p_from, p_to);
+$$;
+
+commit;
@@ -0,0 +1,55 @@
+import argparse
+import json
+
+from app.importer.normalize import AMOUNT_SIGNS
+from app.importer.pipeline import ImportPipeline
+from app.importer.stores import SqliteExpenseStore, SupabaseExpenseStore
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream a CSV / OFX / QIF statement into the expenses table"
+    )
+    parser.add_argument("path", help="Statement file (.csv, .ofx, .qfx, .qif)")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--format", choices=["csv", "ofx", "qfx", "qif"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--source", default="upi", help="Default source: cash | upi")
+    parser.add_argument("--date-format", help="strptime format, e.g. %%d/%%m/%%Y")
+    parser.add_argument(
+        "--amount-sign",
+        choices=AMOUNT_SIGNS,
+        default="negative",
+        help="CSV with one signed amount column: sign of spend "
+        "(negative: bank export, positives are credits)",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="DB_PATH",
+        help="Write to a local SQLite stand-in instead of Supabase",
+    )
+    parser.add_argument(
+        "--state",
+        help="Resume state file (default: <path>.import-state.json)",
+    )
+    parser.add_argument("--no-resume", action="store_true")
+    args = parser.parse_args()
+
+    store = SqliteExpenseStore(args.sqlite) if args.sqlite else SupabaseExpenseStore()
+
+    pipeline = ImportPipeline(
+        store,
+        args.user_id,
+        batch_size=args.batch_size,
+        default_source=args.source,
+        date_format=args.date_format,
+        amount_sign=args.amount_sign,
+        state_path=args.state or f"{args.path}.import-state.json",
+    )
+    stats = pipeline.run(args.path, fmt=args.format, resume=not args.no_resume)
+
+    print(json.dumps({"stats": stats.to_dict(), "errors": pipeline.errors}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
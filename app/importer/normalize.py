@@ -0,0 +1,226 @@
+import re
+from datetime import date, datetime
+
+# ======================================================
+# NORMALIZATION
+# ======================================================
+# Raw statement records -> dicts accepted by app.db.expenses.validate_expense
+
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%y",
+    "%d %b %Y",
+    "%d-%b-%Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+    "%m/%d'%y",  # QIF
+    "%Y%m%d",  # OFX
+)
+
+CATEGORY_KEYWORDS = {
+    "food": ("swiggy", "zomato", "restaurant", "cafe", "coffee", "pizza", "dominos"),
+    "groceries": ("bigbasket", "blinkit", "zepto", "grocery", "dmart", "supermarket"),
+    "transport": ("uber", "ola", "rapido", "metro", "irctc", "petrol", "fuel"),
+    "shopping": ("amazon", "flipkart", "myntra", "ajio"),
+    "bills": ("electricity", "recharge", "broadband", "airtel", "jio", "gas bill"),
+    "entertainment": ("netflix", "spotify", "hotstar", "bookmyshow", "prime video"),
+    "health": ("pharmacy", "apollo", "hospital", "clinic", "medical"),
+}
+DEFAULT_CATEGORY = "other"
+
+# Sign convention of a single signed amount column:
+#   negative  spend is negative, positive values are credits (bank exports)
+#   positive  spend is positive, negative values are refunds (expense trackers)
+# Separate debit / credit columns, DR / CR markers and a Dr/Cr column are
+# unambiguous and override it.
+AMOUNT_SIGNS = ("negative", "positive")
+
+_CSV_COLUMNS = {
+    "date": ("expense_date", "date", "transaction date", "txn date", "value date"),
+    "amount": ("amount", "transaction amount", "amount (inr)"),
+    "debit": (
+        "debit",
+        "debit amount",
+        "debit amt.",
+        "withdrawal",
+        "withdrawals",
+        "withdrawal amt.",
+        "withdrawal amount",
+    ),
+    "credit": (
+        "credit",
+        "credit amount",
+        "credit amt.",
+        "deposit",
+        "deposits",
+        "deposit amt.",
+        "deposit amount",
+    ),
+    "direction": ("dr/cr", "cr/dr", "debit/credit", "type", "transaction type"),
+    "merchant": ("merchant", "description", "narration", "payee", "particulars"),
+    "category": ("category",),
+    "note": ("note", "memo", "remarks"),
+    "source": ("source", "mode"),
+}
+
+_AMOUNT_JUNK = re.compile(r"[^\d.\-]")
+_DR_CR = re.compile(r"(?<![a-z])(dr|cr)\.?$", re.IGNORECASE)
+
+
+def parse_date(value: str, date_format: str | None = None) -> str | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    formats = (date_format,) if date_format else DATE_FORMATS
+    for fmt in formats:
+        candidate = value[:8] if fmt == "%Y%m%d" else value
+        try:
+            return datetime.strptime(candidate, fmt).date().isoformat()
+        except ValueError:
+            continue
+    try:
+        return date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_amount(value: str) -> float | None:
+    """
+    '₹1,234.50', '(12.00)', '-12', '12.00 DR', '12.00 Cr' -> signed float.
+    Bank convention: DR and parentheses are negative, CR is positive.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    marker = _DR_CR.search(value)
+    if marker:
+        value = value[: marker.start()].strip()
+    negative = value.startswith("(") and value.endswith(")")
+    cleaned = _AMOUNT_JUNK.sub("", value.replace(",", ""))
+    if cleaned in ("", "-", ".", "-."):
+        return None
+    try:
+        amount = float(cleaned)
+    except ValueError:
+        return None
+    if marker:
+        negative = marker.group(1).upper() == "DR"
+    elif not negative:
+        return amount
+    return -abs(amount) if negative else abs(amount)
+
+
+def map_category(*texts: str | None) -> str:
+    haystack = " ".join(t for t in texts if t).lower()
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(k in haystack for k in keywords):
+            return category
+    return DEFAULT_CATEGORY
+
+
+def _pick(row: dict, field: str) -> str:
+    for column in _CSV_COLUMNS[field]:
+        if row.get(column):
+            return row[column]
+    return ""
+
+
+def _has_column(row: dict, field: str) -> bool:
+    return any(column in row for column in _CSV_COLUMNS[field])
+
+
+def _csv_spend(record: dict, amount_sign: str) -> tuple[float | None, bool]:
+    """(spend amount, is_credit) of a CSV row; amount is None when missing or malformed."""
+    direction = _pick(record, "direction").strip().lower()
+
+    # Separate debit / credit columns: the debit column holds unsigned spend
+    if _has_column(record, "debit"):
+        debit = _pick(record, "debit")
+        if not debit:
+            return None, bool(_pick(record, "credit"))
+        amount = parse_amount(debit)
+        return (abs(amount) if amount is not None else None), False
+
+    value = _pick(record, "amount")
+    if not value and _pick(record, "credit"):
+        return None, True
+    amount = parse_amount(value)
+    if amount is None:
+        return None, False
+
+    if direction in ("cr", "credit"):
+        return abs(amount), True
+    if direction in ("dr", "debit"):
+        return abs(amount), False
+    # DR / CR markers follow the bank convention whatever the column's
+    if amount_sign == "negative" or _DR_CR.search(value):
+        amount = -amount
+    return amount, amount <= 0
+
+
+def normalize_record(
+    record: dict,
+    fmt: str,
+    *,
+    default_source: str = "upi",
+    date_format: str | None = None,
+    amount_sign: str = "negative",
+) -> dict | None:
+    """
+    Map one raw record to an expense dict.
+    Returns None for records that are not expenses (credits, zero amounts);
+    malformed values are left for validate_expense to report.
+    `amount_sign` is the convention of a single signed CSV amount column.
+    """
+    if fmt == "csv":
+        raw_date = _pick(record, "date")
+        amount, credit = _csv_spend(record, amount_sign)
+        if credit:
+            return None
+        merchant = _pick(record, "merchant") or None
+        category = _pick(record, "category") or None
+        note = _pick(record, "note") or None
+        source = _pick(record, "source") or default_source
+    elif fmt in ("ofx", "qfx"):
+        raw_date = record.get("dtposted", "")
+        amount = parse_amount(record.get("trnamt", ""))
+        merchant = record.get("name") or None
+        note = record.get("memo") or None
+        category = None
+        source = default_source
+        # Bank statements: debits are negative
+        amount = -amount if amount is not None else None
+    else:  # qif
+        raw_date = record.get("date", "")
+        amount = parse_amount(record.get("amount", ""))
+        merchant = record.get("payee") or None
+        note = record.get("memo") or None
+        category = record.get("category") or None
+        source = default_source
+        amount = -amount if amount is not None else None
+
+    if amount is not None and amount <= 0:
+        return None
+
+    return {
+        "amount": amount,
+        "category": (category or map_category(merchant, note)).lower(),
+        "expense_date": parse_date(raw_date, date_format) or raw_date,
+        "source": source,
+        "merchant": merchant,
+        "note": note,
+    }
+
+
+def fingerprint(row: dict) -> tuple:
+    """Identity used to de-duplicate against rows already stored."""
+    return (
+        str(row["expense_date"])[:10],
+        round(float(row["amount"]), 2),
+        (row.get("merchant") or row.get("note") or "").strip().lower(),
+    )
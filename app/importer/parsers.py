@@ -0,0 +1,111 @@
+import csv
+import re
+from typing import Iterator
+
+# ======================================================
+# STREAMING STATEMENT PARSERS
+# ======================================================
+# Every parser is a generator over raw records (dicts of strings), so a
+# statement of any size is read in constant memory.
+
+READ_CHUNK = 64 * 1024
+
+
+# ======================================================
+# CSV
+# ======================================================
+def iter_csv(path: str) -> Iterator[dict]:
+    """Rows of a CSV with a header line, keys lower-cased."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield {
+                (k or "").strip().lower(): (v or "").strip()
+                for k, v in row.items()
+            }
+
+
+# ======================================================
+# OFX (SGML or XML flavour)
+# ======================================================
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def iter_ofx(path: str) -> Iterator[dict]:
+    """<STMTTRN> blocks as {"trntype", "dtposted", "trnamt", "name", "memo", "fitid"}."""
+    record: dict | None = None
+    buffer = ""
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            buffer += chunk
+
+            # Keep a possibly incomplete trailing tag for the next chunk
+            cut = buffer.rfind("<") if chunk else len(buffer)
+            text, buffer = buffer[:cut], buffer[cut:]
+
+            for closing, tag, value in _OFX_TAG.findall(text):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if closing:
+                        if record is not None:
+                            yield record
+                        record = None
+                    else:
+                        record = {}
+                elif record is not None and not closing:
+                    record[tag.lower()] = value.strip()
+
+            if not chunk:
+                break
+
+    # SGML files may omit the final closing tag
+    if record:
+        yield record
+
+
+# ======================================================
+# QIF
+# ======================================================
+_QIF_FIELDS = {
+    "D": "date",
+    "T": "amount",
+    "U": "amount",
+    "P": "payee",
+    "M": "memo",
+    "L": "category",
+    "N": "number",
+}
+
+
+def iter_qif(path: str) -> Iterator[dict]:
+    """Records terminated by '^' as {"date", "amount", "payee", "memo", "category"}."""
+    record: dict = {}
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+            if line.startswith("^"):
+                if record:
+                    yield record
+                record = {}
+                continue
+            field = _QIF_FIELDS.get(line[0])
+            if field and field not in record:
+                record[field] = line[1:].strip()
+
+    if record:
+        yield record
+
+
+PARSERS = {"csv": iter_csv, "ofx": iter_ofx, "qfx": iter_ofx, "qif": iter_qif}
+
+
+def detect_format(path: str) -> str:
+    ext = path.rsplit(".", 1)[-1].lower()
+    if ext not in PARSERS:
+        raise ValueError(f"Unsupported statement format: .{ext}")
+    return ext
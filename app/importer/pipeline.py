@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from itertools import islice
+
+from app.db.expenses import validate_expense
+from app.importer.normalize import AMOUNT_SIGNS, fingerprint, normalize_record
+from app.importer.parsers import PARSERS, detect_format
+
+# ======================================================
+# IMPORT PIPELINE
+# ======================================================
+# parse -> normalize -> validate -> de-duplicate -> batched write
+# One batch of rows is held in memory at a time (plus a count per distinct
+# row fingerprint for de-duplication). After every committed batch the
+# position is saved to a small state file, so a failed run resumes from
+# the last committed batch (de-duplication covers a partially written one).
+# The state is keyed by path, size and mtime, and removed when a run completes.
+
+
+@dataclass
+class ImportStats:
+    records_read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    failed: int = 0
+    resumed_from: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.records_read / self.elapsed_s if self.elapsed_s else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "rows_per_second": round(self.rows_per_second, 1)}
+
+
+class ImportPipeline:
+    def __init__(
+        self,
+        store,
+        user_id: str,
+        *,
+        batch_size: int = 500,
+        default_source: str = "upi",
+        date_format: str | None = None,
+        amount_sign: str = "negative",
+        state_path: str | None = None,
+        max_errors_reported: int = 20,
+    ):
+        self.store = store
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.default_source = default_source
+        self.date_format = date_format
+        if amount_sign not in AMOUNT_SIGNS:
+            raise ValueError(f"amount_sign must be one of {AMOUNT_SIGNS}")
+        self.amount_sign = amount_sign
+        self.state_path = state_path
+        self.max_errors_reported = max_errors_reported
+        self.errors: list[dict] = []
+        # Per-fingerprint counts for the whole run (a few dozen bytes per distinct
+        # row). Not pruned by date: statements are not reliably date-sorted, and a
+        # same-day repeat in a later batch must still count as a new occurrence
+        self._seen: Counter = Counter()
+        self._inserted: Counter = Counter()
+
+    # --------------------
+    # Resume state
+    # --------------------
+    def _state_key(self, path: str) -> dict:
+        # Size and mtime too: a re-exported statement at the same path must
+        # not resume at a record offset counted in the old file
+        info = os.stat(path)
+        return {
+            "file": os.path.abspath(path),
+            "size": info.st_size,
+            "mtime_ns": info.st_mtime_ns,
+            "user_id": self.user_id,
+        }
+
+    def _load_state(self, path: str) -> int:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return 0
+        with open(self.state_path) as f:
+            state = json.load(f)
+        key = self._state_key(path)
+        if any(state.get(k) != v for k, v in key.items()):
+            return 0
+        return int(state.get("records_done", 0))
+
+    def _save_state(self, path: str, records_done: int):
+        if not self.state_path:
+            return
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({**self._state_key(path), "records_done": records_done}, f)
+        os.replace(tmp, self.state_path)
+
+    def _clear_state(self):
+        if self.state_path and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _error(self, position: int, message: str):
+        if len(self.errors) < self.max_errors_reported:
+            self.errors.append({"record": position, "message": message})
+
+    # --------------------
+    # Batches
+    # --------------------
+    def _write_batch(self, batch: list[tuple[int, dict]], stats: ImportStats):
+        dates = [row["expense_date"] for _, row in batch]
+        first, last = min(dates), max(dates)
+
+        # Occurrence counting instead of a plain set: two identical coffees on
+        # the same day stay two rows, while re-importing the file adds nothing
+        stored = Counter(self.store.existing_fingerprints(self.user_id, first, last))
+
+        rows, positions, keys = [], [], []
+        for position, row in batch:
+            key = fingerprint(row)
+            occurrence = self._seen[key]
+            self._seen[key] += 1
+
+            if occurrence < stored[key] - self._inserted[key]:
+                stats.duplicates += 1
+                continue
+
+            self._inserted[key] += 1
+            rows.append(row)
+            positions.append(position)
+            keys.append(key)
+
+        if not rows:
+            return
+
+        for position, key, result in zip(positions, keys, self.store.insert_batch(rows)):
+            if result["status"] == "success":
+                stats.inserted += 1
+            else:
+                self._inserted[key] -= 1
+                stats.failed += 1
+                self._error(position, result.get("message", "insert failed"))
+
+    def run(self, path: str, fmt: str | None = None, resume: bool = True) -> ImportStats:
+        fmt = fmt or detect_format(path)
+        records = PARSERS[fmt](path)
+
+        stats = ImportStats()
+        start = self._load_state(path) if resume else 0
+        if start:
+            print(f"Resuming import after record {start}")
+            stats.resumed_from = start
+            records = islice(records, start, None)
+
+        started = time.perf_counter()
+        position = start
+        batch: list[tuple[int, dict]] = []
+
+        def flush():
+            if batch:
+                self._write_batch(batch, stats)
+                batch.clear()
+            self._save_state(path, position)
+            stats.elapsed_s = time.perf_counter() - started
+            print(
+                f"[import] {stats.records_read} records, {stats.inserted} inserted, "
+                f"{stats.duplicates} duplicates, {stats.rows_per_second:.0f} rows/s"
+            )
+
+        for record in records:
+            position += 1
+            stats.records_read += 1
+
+            expense = normalize_record(
+                record,
+                fmt,
+                default_source=self.default_source,
+                date_format=self.date_format,
+                amount_sign=self.amount_sign,
+            )
+            if expense is None:
+                stats.skipped += 1
+                continue
+
+            row, error = validate_expense(expense, user_id=self.user_id)
+            if error:
+                stats.invalid += 1
+                self._error(position, error)
+                continue
+
+            batch.append((position, row))
+            if len(batch) >= self.batch_size:
+                flush()
+
+        flush()
+        # Finished: a later run of the same file starts over (and de-duplicates)
+        self._clear_state()
+        return stats
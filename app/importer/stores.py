@@ -0,0 +1,112 @@
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+
+from app.db.expenses import insert_expenses_batched
+from app.importer.normalize import fingerprint
+
+# ======================================================
+# EXPENSE STORES
+# ======================================================
+# The pipeline only needs two operations, so it can run against
+# Supabase or against a local SQLite stand-in with the same schema.
+
+
+class SupabaseExpenseStore:
+    """Writes to the `expenses` table used by app/mcp/expense_server.py."""
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase=None):
+        if supabase is None:
+            from app.db.connection import get_supabase
+
+            supabase = get_supabase()
+        self.supabase = supabase
+
+    def existing_fingerprints(self, user_id: str, from_date: str, to_date: str) -> list:
+        found, start = [], 0
+        while True:
+            rows = (
+                self.supabase.table("expenses")
+                .select("expense_date, amount, merchant, note")
+                .eq("user_id", user_id)
+                .gte("expense_date", from_date)
+                .lte("expense_date", to_date)
+                .range(start, start + self.PAGE_SIZE - 1)
+                .execute()
+                .data
+            )
+            found.extend(fingerprint(r) for r in rows)
+            if len(rows) < self.PAGE_SIZE:
+                return found
+            start += self.PAGE_SIZE
+
+    def insert_batch(self, rows: list[dict]) -> list[dict]:
+        return insert_expenses_batched(self.supabase, rows)
+
+
+class SqliteExpenseStore:
+    """Local stand-in for the `expenses` table (tests, dry runs, offline imports)."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS expenses (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                amount REAL NOT NULL,
+                category TEXT NOT NULL,
+                expense_date TEXT NOT NULL,
+                source TEXT NOT NULL,
+                merchant TEXT,
+                note TEXT,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS expenses_user_date_idx"
+            " ON expenses (user_id, expense_date)"
+        )
+        self.conn.commit()
+
+    def existing_fingerprints(self, user_id: str, from_date: str, to_date: str) -> list:
+        rows = self.conn.execute(
+            "SELECT expense_date, amount, merchant, note FROM expenses"
+            " WHERE user_id = ? AND expense_date BETWEEN ? AND ?",
+            (user_id, from_date, to_date),
+        )
+        return [fingerprint(dict(r)) for r in rows]
+
+    def insert_batch(self, rows: list[dict]) -> list[dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        ids = [str(uuid.uuid4()) for _ in rows]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO expenses (id, user_id, amount, category, expense_date,"
+                " source, merchant, note, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        i,
+                        r["user_id"],
+                        r["amount"],
+                        r["category"],
+                        r["expense_date"],
+                        r["source"],
+                        r.get("merchant"),
+                        r.get("note"),
+                        now,
+                    )
+                    for i, r in zip(ids, rows)
+                ],
+            )
+        return [{"status": "success", "expense_id": i} for i in ids]
+
+    def count(self, user_id: str) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM expenses WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
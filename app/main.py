@@ -0,0 +1,256 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, ValidationError
+
+from app.agent.agent import get_graph, shutdown, startup, thread_id_for
+from app.agent.config.config import (
+    SERVICE_QUEUE_SIZE,
+    SERVICE_QUEUE_TIMEOUT,
+    SERVICE_TURN_TIMEOUT,
+    SERVICE_USER_QUEUE_SIZE,
+    SERVICE_WORKERS,
+)
+from app.agent.streaming import adeny_pending, astream_resume, astream_turn
+from app.auth import authenticated_user, verified_webhook
+from app.turn_queue import QueueFull, QueueTimeout, TurnQueue
+
+# ============================================================
+# HTTP SERVICE
+# ============================================================
+# uvicorn app.main:app
+#
+#   POST /chat           run a turn; JSON reply, or SSE events with "stream": true
+#   POST /chat/approve   approve / deny the tool calls a paused turn is waiting on
+#   POST /webhook        accept an inbound message, run it in the background (202)
+#   GET  /health         queue stats
+#
+# The user comes from the bearer token (webhook: the signed body), see app/auth.py.
+# Each user maps to one graph thread. Turns go through TurnQueue: serialized
+# per user, concurrent across users, shed with 429 / 503 when saturated.
+
+
+def _config(user_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id_for(user_id), "user_id": user_id}}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Graphs, checkpointer and vector store are built once, not per request
+    await startup()
+    app.state.queue = TurnQueue(
+        workers=SERVICE_WORKERS,
+        max_pending=SERVICE_QUEUE_SIZE,
+        max_per_user=SERVICE_USER_QUEUE_SIZE,
+        max_wait=SERVICE_QUEUE_TIMEOUT,
+        turn_timeout=SERVICE_TURN_TIMEOUT,
+    )
+    app.state.queue.start()
+    print("Service ready")
+    yield
+    await app.state.queue.stop()
+    await shutdown()
+
+
+app = FastAPI(title="Expense Agent", lifespan=lifespan)
+
+
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request: Request, exc: QueueFull):
+    return JSONResponse(
+        status_code=exc.status,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(int(exc.retry_after + 0.5))},
+    )
+
+
+@app.exception_handler(TimeoutError)
+async def turn_timeout_handler(request: Request, exc: TimeoutError):
+    # Raised by TurnQueue when a turn runs past SERVICE_TURN_TIMEOUT
+    return JSONResponse(
+        status_code=504, content={"detail": "The turn took too long and was stopped"}
+    )
+
+
+@app.exception_handler(QueueTimeout)
+async def queue_timeout_handler(request: Request, exc: QueueTimeout):
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"}
+    )
+
+
+# ============================================================
+# Requests
+# ============================================================
+
+
+class ChatRequest(BaseModel):
+    message: str
+    web_search_enabled: bool = True
+    stream: bool = False
+
+
+class ApproveRequest(BaseModel):
+    approved: bool
+    stream: bool = False
+
+
+class WebhookMessage(BaseModel):
+    # Trusted only because the body signature was verified
+    user_id: str
+    message: str
+    web_search_enabled: bool = True
+
+
+# ============================================================
+# Turn execution
+# ============================================================
+
+
+async def _collect(events) -> dict:
+    """Drain a turn's events into a JSON reply"""
+    result = {"status": "done", "reply": "", "tool_calls": []}
+    async for event in events:
+        if event.type == "interrupt":
+            result.update(
+                status="awaiting_approval",
+                reply=event.text,
+                tool_calls=event.data["tool_calls"],
+            )
+        elif event.type == "done":
+            result["reply"] = event.text
+    return result
+
+
+def _run_turn(app: FastAPI, user_id: str, make_events, stream: bool):
+    """Queue one turn; JSON result, or an SSE response fed while the turn runs"""
+    queue: TurnQueue = app.state.queue
+
+    if not stream:
+        return queue.submit(user_id, lambda: _collect(make_events()))
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        async for event in make_events():
+            await events.put(event)
+
+    future = queue.submit(user_id, run)
+    # End of stream, whether the turn ran, failed or was shed before starting
+    future.add_done_callback(lambda _: events.put_nowait(None))
+
+    async def sse():
+        yield f"event: queued\ndata: {json.dumps({'thread_id': thread_id_for(user_id)})}\n\n"
+        while (event := await events.get()) is not None:
+            yield f"event: {event.type}\ndata: {json.dumps(asdict(event), default=str)}\n\n"
+        if not future.cancelled() and future.exception() is not None:
+            yield f"event: error\ndata: {json.dumps({'detail': str(future.exception())})}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream")
+
+
+async def _message_turn(agent, graph_input, config):
+    """A new message; runs inside the user's queued turn, so it can't race an approval"""
+    # Sending a message instead of approving declines the pending tool calls
+    if await adeny_pending(
+        agent, config, "User sent a new message instead of approving. The action was not run."
+    ):
+        print(f"Pending tool calls declined for {config['configurable']['thread_id']}")
+    async for event in astream_turn(agent, graph_input, config):
+        yield event
+
+
+async def _approval_turn(config, approved: bool):
+    snapshot = await get_graph().aget_state(config)
+    if not snapshot.next:
+        raise HTTPException(status_code=409, detail="No tool call is awaiting approval")
+    # Resume on the variant the paused turn was running on
+    agent = get_graph(snapshot.values.get("web_search_enabled", True))
+    async for event in astream_resume(agent, config, approved):
+        yield event
+
+
+# ============================================================
+# Endpoints
+# ============================================================
+
+
+@app.post("/chat")
+async def chat(body: ChatRequest, request: Request, user_id: str = Depends(authenticated_user)):
+    agent = get_graph(body.web_search_enabled)
+    config = _config(user_id)
+    graph_input = {
+        "messages": [HumanMessage(content=body.message)],
+        "web_search_enabled": body.web_search_enabled,
+    }
+
+    result = _run_turn(
+        request.app,
+        user_id,
+        lambda: _message_turn(agent, graph_input, config),
+        body.stream,
+    )
+    if body.stream:
+        return result
+    return {"thread_id": config["configurable"]["thread_id"], **(await result)}
+
+
+@app.post("/chat/approve")
+async def approve(
+    body: ApproveRequest, request: Request, user_id: str = Depends(authenticated_user)
+):
+    config = _config(user_id)
+
+    result = _run_turn(
+        request.app,
+        user_id,
+        lambda: _approval_turn(config, body.approved),
+        body.stream,
+    )
+    if body.stream:
+        return result
+    return {"thread_id": config["configurable"]["thread_id"], **(await result)}
+
+
+@app.post("/webhook", status_code=202)
+async def webhook(request: Request, raw: bytes = Depends(verified_webhook)):
+    try:
+        body = WebhookMessage.model_validate_json(raw)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422, detail=e.errors(include_url=False, include_context=False)
+        )
+    agent = get_graph(body.web_search_enabled)
+    config = _config(body.user_id)
+    graph_input = {
+        "messages": [HumanMessage(content=body.message)],
+        "web_search_enabled": body.web_search_enabled,
+    }
+
+    future = _run_turn(
+        request.app,
+        body.user_id,
+        lambda: _message_turn(agent, graph_input, config),
+        stream=False,
+    )
+
+    def log_result(f: asyncio.Future):
+        if f.cancelled():
+            return
+        if f.exception() is not None:
+            print(f"Webhook turn for {body.user_id} failed: {f.exception()}")
+        else:
+            print(f"Webhook reply for {body.user_id}: {f.result()['reply'][:200]}")
+
+    future.add_done_callback(log_result)
+    return {"queued": True, "thread_id": config["configurable"]["thread_id"]}
+
+
+@app.get("/health")
+async def health(request: Request):
+    return {"status": "ok", "queue": request.app.state.queue.stats()}
@@ -12,18 +12,17 @@ supabase = get_supabase()
 def monthly_summary(user_id: str, from_date: str, to_date: str):
     """Total spend for a date range"""
 
-    res = (
-        supabase.table("expenses")
-        .select("amount")
-        .eq("user_id", user_id)
-        .gte("expense_date", from_date)
-        .lte("expense_date", to_date)
-        .execute()
-    )
+    res = supabase.rpc(
+        "expense_totals",
+        {"p_user_id": user_id, "p_from": from_date, "p_to": to_date},
+    ).execute()
 
-    total = sum(e["amount"] for e in res.data)
+    row = res.data[0] if res.data else {}
 
-    return {"total_spent": total, "count": len(res.data)}
+    return {
+        "total_spent": row.get("total_spent") or 0,
+        "count": row.get("expense_count") or 0,
+    }
 
 
 # ======================================================
@@ -33,21 +32,12 @@ def monthly_summary(user_id: str, from_date: str, to_date: str):
 def category_breakdown(user_id: str, from_date: str, to_date: str):
     """Spend grouped by category"""
 
-    res = (
-        supabase.table("expenses")
-        .select("category, amount")
-        .eq("user_id", user_id)
-        .gte("expense_date", from_date)
-        .lte("expense_date", to_date)
-        .execute()
-    )
+    res = supabase.rpc(
+        "expense_category_totals",
+        {"p_user_id": user_id, "p_from": from_date, "p_to": to_date},
+    ).execute()
 
-    breakdown = {}
-
-    for e in res.data:
-        breakdown[e["category"]] = breakdown.get(e["category"], 0) + e["amount"]
-
-    return breakdown
+    return {r["category"]: r["total_spent"] for r in res.data}
 
 
 # ======================================================
@@ -81,33 +71,24 @@ def highest_spend(user_id: str, from_date: str, to_date: str):
 def check_category_limit(user_id: str, category: str, from_date: str, to_date: str):
     """Check if category monthly limit exceeded"""
 
-    # 1️⃣ Get total spent in category
-    spend_res = (
-        supabase.table("expenses")
-        .select("amount")
-        .eq("user_id", user_id)
-        .eq("category", category)
-        .gte("expense_date", from_date)
-        .lte("expense_date", to_date)
-        .execute()
-    )
-
-    total_spent = sum(e["amount"] for e in spend_res.data)
-
-    # 2️⃣ Get category limit
-    limit_res = (
-        supabase.table("categories")
-        .select("monthly_limit")
-        .eq("user_id", user_id)
-        .eq("name", category)
-        .execute()
-    )
-
-    if not limit_res.data or limit_res.data[0]["monthly_limit"] is None:
+    # Spend and limit in one round trip
+    res = supabase.rpc(
+        "expense_category_limit_status",
+        {
+            "p_user_id": user_id,
+            "p_category": category,
+            "p_from": from_date,
+            "p_to": to_date,
+        },
+    ).execute()
+
+    row = res.data[0] if res.data else {}
+    total_spent = row.get("total_spent") or 0
+    limit = row.get("monthly_limit")
+
+    if limit is None:
         return {"has_limit": False, "total_spent": total_spent}
 
-    limit = limit_res.data[0]["monthly_limit"]
-
     return {
         "has_limit": True,
         "limit": limit,
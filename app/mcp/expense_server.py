@@ -1,6 +1,13 @@
+import base64
+import json
+import os
+import re
+from datetime import date
+
 from mcp.server.fastmcp import FastMCP
 from langchain_core.runnables import RunnableConfig
 from app.db.connection import get_supabase
+from app.db.expenses import insert_expenses_batched, validate_expense
 
 
 # --------------------
@@ -11,6 +18,8 @@ mcp = FastMCP("expense-mcp")
 # --------------------
 # Supabase Client
 # --------------------
+# Writes below also maintain `expense_rollups` (per user/month/category)
+# through triggers on `expenses`, see app/db/migrations/002_expense_rollups.sql
 supabase = get_supabase()
 
 
@@ -30,41 +39,204 @@ def add_expense(
 ):
     """Add a new expense"""
 
-    data = {
-        "user_id": user_id,
-        "amount": amount,
-        "category": category,
-        "expense_date": expense_date,
-        "source": source,
-        "merchant": merchant,
-        "note": note,
-    }
+    # Same rules as add_expenses_bulk and the statement importer
+    data, error = validate_expense(
+        {
+            "user_id": user_id,
+            "amount": amount,
+            "category": category,
+            "expense_date": expense_date,
+            "source": source,
+            "merchant": merchant,
+            "note": note,
+        }
+    )
+    if error:
+        return {"status": "error", "message": error}
 
     result = supabase.table("expenses").insert(data).execute()
 
     return {"status": "success", "expense_id": result.data[0]["id"]}
 
 
+# ======================================================
+# ADD EXPENSES (BULK)
+# ======================================================
+MAX_BULK_EXPENSES = 500
+
+
+@mcp.tool()
+def add_expenses_bulk(user_id: str, expenses: list[dict]):
+    """
+    Add many expenses in one call (e.g. a list of receipts).
+    Each item needs amount, category, expense_date (YYYY-MM-DD) and
+    source ('cash' or 'upi'); merchant and note are optional.
+    Returns a per-item status.
+    """
+
+    if not expenses:
+        return {"status": "error", "message": "No expenses provided."}
+
+    if len(expenses) > MAX_BULK_EXPENSES:
+        return {
+            "status": "error",
+            "message": f"Too many expenses ({len(expenses)}), max is {MAX_BULK_EXPENSES}.",
+        }
+
+    results: list[dict] = [None] * len(expenses)
+    rows, row_indexes = [], []
+
+    for i, item in enumerate(expenses):
+        row, error = validate_expense(item, user_id=user_id)
+        if error:
+            results[i] = {"index": i, "status": "error", "message": error}
+        else:
+            rows.append(row)
+            row_indexes.append(i)
+
+    for i, res in zip(row_indexes, insert_expenses_batched(supabase, rows)):
+        results[i] = {"index": i, **res}
+
+    added = sum(1 for r in results if r["status"] == "success")
+
+    return {
+        "status": (
+            "success" if added == len(expenses) else "partial" if added else "error"
+        ),
+        "added_count": added,
+        "failed_count": len(expenses) - added,
+        "results": results,
+    }
+
+
 # ======================================================
 # GET EXPENSES (DATE RANGE)
 # ======================================================
+GET_EXPENSES_MAX_PAGE_SIZE = int(os.getenv("GET_EXPENSES_MAX_PAGE_SIZE", "50"))
+
+# Expense ids are UUIDs; anything else in a cursor was not made by us
+_CURSOR_ID = re.compile(r"[0-9A-Za-z-]+")
+
+EXPENSE_FIELDS = (
+    "id",
+    "amount",
+    "category",
+    "expense_date",
+    "source",
+    "merchant",
+    "note",
+    "created_at",
+)
+
+
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["expense_date"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str] | dict:
+    """
+    Return (expense_date, id) from a cursor made by _encode_cursor,
+    or an error dict when it is malformed.
+    The values end up in a PostgREST filter, so both are checked strictly.
+    """
+    try:
+        expense_date, expense_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+        expense_date = date.fromisoformat(expense_date).isoformat()
+        expense_id = str(expense_id)
+    except (ValueError, TypeError):
+        return {"status": "error", "message": "Invalid cursor"}
+
+    if not _CURSOR_ID.fullmatch(expense_id):
+        return {"status": "error", "message": "Invalid cursor"}
+    return expense_date, expense_id
+
+
 @mcp.tool()
-def get_expenses(user_id: str, from_date: str, to_date: str):
-    """Get expenses for a user in date range"""
+def get_expenses(
+    user_id: str,
+    from_date: str,
+    to_date: str,
+    fields: list[str] | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    totals_only: bool = False,
+):
+    """
+    Get expenses for a user in date range, newest first, one page at a time.
+    `fields` picks columns (id and expense_date are always included),
+    pass `next_cursor` back as `cursor` for the next page.
+    total and count are returned with the first page only.
+    Use totals_only=True when only the total and count are needed.
+    """
 
-    result = (
+    unknown = [f for f in fields or [] if f not in EXPENSE_FIELDS]
+    if unknown and not totals_only:
+        return {
+            "status": "error",
+            "message": f"Unknown fields {unknown}, allowed: {list(EXPENSE_FIELDS)}",
+        }
+
+    if cursor and not totals_only:
+        position = _decode_cursor(cursor)
+        if isinstance(position, dict):
+            return position
+
+    # Totals are aggregated in the database, rows are never materialized.
+    # They cover the whole range, so only the first page pays for them.
+    page = {}
+    if not cursor or totals_only:
+        totals = supabase.rpc(
+            "expense_totals",
+            {"p_user_id": user_id, "p_from": from_date, "p_to": to_date},
+        ).execute()
+        row = totals.data[0] if totals.data else {}
+        page = {
+            "total": row.get("total_spent") or 0,
+            "count": row.get("expense_count") or 0,
+        }
+
+    if totals_only:
+        return page
+
+    columns = ["id", "expense_date"] + [
+        f for f in (fields or EXPENSE_FIELDS) if f not in ("id", "expense_date")
+    ]
+    page_size = max(1, min(limit or GET_EXPENSES_MAX_PAGE_SIZE, GET_EXPENSES_MAX_PAGE_SIZE))
+
+    query = (
         supabase.table("expenses")
-        .select("*")
+        .select(",".join(columns))
         .eq("user_id", user_id)
         .gte("expense_date", from_date)
         .lte("expense_date", to_date)
-        .order("expense_date", desc=True)
+    )
+
+    # Keyset pagination on (expense_date, id), both descending
+    if cursor:
+        last_date, last_id = position
+        query = query.or_(
+            f"expense_date.lt.{last_date},"
+            f"and(expense_date.eq.{last_date},id.lt.{last_id})"
+        )
+
+    result = (
+        query.order("expense_date", desc=True)
+        .order("id", desc=True)
+        .limit(page_size + 1)
         .execute()
     )
 
-    total = sum(e["amount"] for e in result.data)
+    expenses = result.data[:page_size]
+    has_more = len(result.data) > page_size
 
-    return {"total": total, "count": len(result.data), "expenses": result.data}
+    return {
+        **page,
+        "expenses": expenses,
+        "next_cursor": _encode_cursor(expenses[-1]) if has_more else None,
+    }
 
 
 # ======================================================
@@ -96,6 +268,8 @@ def update_expense(
 
     if not update_data:
         return {"status": "no_changes"}
+    if amount is not None and amount <= 0:
+        return {"status": "error", "message": "Amount must be positive"}
 
     result = (
         supabase.table("expenses")
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+# ==============================
+# Per-User Turn Queue
+# ==============================
+# Turns are queued per user and run by a fixed pool of async workers:
+#   - a user's turns run one at a time, in order (one graph thread per user,
+#     so two turns must never interleave on the same checkpoint)
+#   - different users run concurrently, up to `workers` turns at once
+#   - a user with pending turns sits in the ready queue at most once and goes
+#     to the back after each turn, so a chatty user cannot starve others
+# Backpressure / load shedding: submit() raises QueueFull when the queue holds
+# max_pending turns or the user already has max_per_user waiting, and turns
+# that waited longer than max_wait are dropped instead of run late.
+
+
+class QueueFull(Exception):
+    """Turn rejected; status is the HTTP code to answer with (503 overall, 429 per user)."""
+
+    def __init__(self, reason: str, retry_after: float, status: int = 503):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status = status
+
+
+class QueueTimeout(Exception):
+    """The turn waited longer than max_wait and was not run."""
+
+
+@dataclass
+class Turn:
+    user_id: str
+    run: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class TurnQueue:
+    def __init__(
+        self,
+        workers: int = 32,
+        max_pending: int = 256,
+        max_per_user: int = 3,
+        max_wait: float = 30.0,
+        turn_timeout: float = 120.0,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self.max_wait = max_wait
+        self.turn_timeout = turn_timeout
+
+        # Users with runnable turns; a user is here at most once
+        self._ready: asyncio.Queue[str] = asyncio.Queue()
+        # user_id -> waiting turns; the key stays while the user's turn is running
+        self._turns: dict[str, deque[Turn]] = {}
+        self._pending = 0
+        self._running = 0
+        self._tasks: list[asyncio.Task] = []
+        self._metrics: Counter = Counter()
+
+    # --------------------
+    # Lifecycle
+    # --------------------
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"turn-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for turns in self._turns.values():
+            for turn in turns:
+                if not turn.future.done():
+                    turn.future.set_exception(QueueFull("shutting down", 5))
+        self._turns.clear()
+        self._pending = 0
+
+    # --------------------
+    # Submit
+    # --------------------
+    def _retry_after(self) -> float:
+        # Rough time to drain the backlog at the current worker count
+        return max(1.0, round(self._pending / max(self.workers, 1), 1))
+
+    def submit(self, user_id: str, run: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Queue a turn for user_id; the future resolves to run()'s result."""
+        if self._pending >= self.max_pending:
+            self._metrics["shed:queue_full"] += 1
+            raise QueueFull("server busy", self._retry_after())
+
+        waiting = self._turns.get(user_id)
+        if waiting is not None and len(waiting) >= self.max_per_user:
+            self._metrics["shed:user_busy"] += 1
+            raise QueueFull(
+                "too many pending messages for this user", self._retry_after(), status=429
+            )
+
+        turn = Turn(user_id, run, asyncio.get_running_loop().create_future())
+        if waiting is None:
+            self._turns[user_id] = waiting = deque()
+            self._ready.put_nowait(user_id)
+        waiting.append(turn)
+        self._pending += 1
+        self._metrics["submitted"] += 1
+        return turn.future
+
+    # --------------------
+    # Workers
+    # --------------------
+    async def _worker(self):
+        while True:
+            user_id = await self._ready.get()
+            turns = self._turns[user_id]
+            turn = turns.popleft()
+            self._pending -= 1
+            try:
+                await self._run(turn)
+            finally:
+                if turns:
+                    self._ready.put_nowait(user_id)
+                else:
+                    del self._turns[user_id]
+
+    async def _run(self, turn: Turn):
+        if turn.future.done():
+            # Caller went away (request cancelled) before the turn started
+            self._metrics["skipped:cancelled"] += 1
+            return
+
+        waited = time.monotonic() - turn.enqueued
+        if waited > self.max_wait:
+            self._metrics["shed:stale"] += 1
+            turn.future.set_exception(QueueTimeout(f"waited {waited:.1f}s in queue"))
+            return
+
+        self._running += 1
+        try:
+            result = await asyncio.wait_for(turn.run(), self.turn_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._metrics["failed"] += 1
+            if not turn.future.done():
+                turn.future.set_exception(e)
+        else:
+            self._metrics["completed"] += 1
+            if not turn.future.done():
+                turn.future.set_result(result)
+        finally:
+            self._running -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "pending": self._pending,
+            "users": len(self._turns),
+            "max_pending": self.max_pending,
+            **self._metrics,
+        }
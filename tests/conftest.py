@@ -0,0 +1,10 @@
+import os
+
+# app.agent modules build their clients at import time; no test talks to them
+for _key in ("GROQ_API_KEY", "GEMINI_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(_key, "test")
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ.setdefault("MCP_TRANSPORT", "inprocess")
+# app.mcp.expense_server builds its Supabase client at import time, offline
+os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test")
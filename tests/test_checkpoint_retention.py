@@ -0,0 +1,97 @@
+import json
+import time
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from app.agent.checkpoint.retention import prune_thread
+from app.agent.checkpoint.sqlite import SCHEMA, SqliteCheckpointer, connect
+
+# Four finished turns of input + two loop steps, then the turn in progress
+SOURCES = ["input", "loop", "loop"] * 4 + ["input", "loop"]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "checkpoints.db"))
+    conn.executescript(SCHEMA)
+    for thread_id in ("t", "other"):
+        for i, source in enumerate(SOURCES):
+            parent = f"{i - 1:02}" if i else None
+            metadata = json.dumps({"source": source, "step": i - 1})
+            conn.execute(
+                "INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, metadata) VALUES (?, '', ?, ?, ?)",
+                (thread_id, f"{i:02}", parent, metadata),
+            )
+            conn.execute(
+                "INSERT INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                "channel) VALUES (?, '', ?, 'task', 0, 'messages')",
+                (thread_id, f"{i:02}"),
+            )
+    yield conn
+    conn.close()
+
+
+def _chain(conn, table: str, thread_id: str = "t") -> list:
+    column = "checkpoint_id, parent_checkpoint_id" if table == "checkpoints" else "checkpoint_id"
+    return conn.execute(
+        f"SELECT {column} FROM {table} WHERE thread_id = ? ORDER BY checkpoint_id", (thread_id,)
+    ).fetchall()
+
+
+def test_keeps_last_turn_ends_and_the_current_turn(conn):
+    deleted = prune_thread(conn, "t", keep_turns=2)
+
+    assert deleted == len(SOURCES) - 4
+    # Ends of turns 3 and 4, then every checkpoint of the turn in progress,
+    # each re-linked to the previous survivor
+    assert _chain(conn, "checkpoints") == [("08", None), ("11", "08"), ("12", "11"), ("13", "12")]
+
+
+def test_deletes_writes_of_pruned_checkpoints_only(conn):
+    prune_thread(conn, "t", keep_turns=2)
+
+    assert _chain(conn, "writes") == [("08",), ("11",), ("12",), ("13",)]
+    # Other threads are untouched
+    assert len(_chain(conn, "checkpoints", "other")) == len(SOURCES)
+    assert len(_chain(conn, "writes", "other")) == len(SOURCES)
+
+
+def test_fewer_turns_than_kept_still_drops_intermediate_steps(conn):
+    assert prune_thread(conn, "t", keep_turns=5) == 8
+    kept = [checkpoint_id for checkpoint_id, _ in _chain(conn, "checkpoints")]
+    assert kept == ["02", "05", "08", "11", "12", "13"]
+    # Nothing left to prune on the next pass
+    assert prune_thread(conn, "t", keep_turns=5) == 0
+
+
+def test_turn_ends_kept_by_an_earlier_pass_survive_the_next_turn(conn):
+    prune_thread(conn, "t", keep_turns=3)
+    # The next turn starts: what was the current turn is now finished
+    conn.execute(
+        "INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, metadata) "
+        "VALUES ('t', '', '14', ?)",
+        (json.dumps({"source": "input", "step": 13}),),
+    )
+    prune_thread(conn, "t", keep_turns=3)
+
+    kept = [checkpoint_id for checkpoint_id, _ in _chain(conn, "checkpoints")]
+    assert kept == ["08", "11", "13", "14"]
+
+
+def test_pruning_failure_is_reported(tmp_path, monkeypatch):
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.db"), keep_turns=1)
+
+    def broken(conn, thread_id):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(saver, "_prune", broken)
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    saver.put(config, empty_checkpoint(), {"source": "input", "step": -1}, {})
+
+    deadline = time.monotonic() + 5
+    while saver.stats()["prune_failed"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saver.stats()["prune_failed"] == 1
+    saver.close()
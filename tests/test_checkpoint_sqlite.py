@@ -0,0 +1,150 @@
+import asyncio
+import operator
+from concurrent.futures import Future
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+
+from app.agent.checkpoint.sqlite import SqliteCheckpointer, connect
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+    saver._setup()
+    yield saver
+    saver.close()
+
+
+def _config(thread_id: str = "t", checkpoint_id: str | None = None) -> dict:
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def _checkpoint(previous=None, step: int = 0, **values):
+    checkpoint = create_checkpoint(previous or empty_checkpoint(), None, step)
+    checkpoint["channel_values"] = values
+    return checkpoint
+
+
+def test_put_get_round_trip(saver):
+    first = _checkpoint(messages=["hi"])
+    saved = saver.put(_config(), first, {"source": "input", "step": -1}, {})
+    second = _checkpoint(first, 1, messages=["hi", "hello"])
+    saver.put(saved, second, {"source": "loop", "step": 0}, {})
+
+    latest = saver.get_tuple(_config())
+    assert latest.checkpoint["id"] == second["id"]
+    assert latest.checkpoint["channel_values"] == {"messages": ["hi", "hello"]}
+    assert latest.metadata["source"] == "loop"
+    assert latest.parent_config["configurable"]["checkpoint_id"] == first["id"]
+
+    older = saver.get_tuple(_config(checkpoint_id=first["id"]))
+    assert older.checkpoint["channel_values"] == {"messages": ["hi"]}
+    assert saver.get_tuple(_config("other")) is None
+
+
+def test_pending_writes(saver):
+    checkpoint = _checkpoint()
+    saved = saver.put(_config(), checkpoint, {"source": "input", "step": -1}, {})
+    saver.put_writes(saved, [("messages", "a"), ("route", "rag")], task_id="task-1")
+
+    writes = saver.get_tuple(_config()).pending_writes
+    assert sorted(writes) == [("task-1", "messages", "a"), ("task-1", "route", "rag")]
+
+
+def test_failing_op_rolls_back_alone(saver):
+    conn = connect(saver.path)
+
+    def insert(conn, thread_id):
+        conn.execute(
+            "INSERT INTO checkpoints (thread_id, checkpoint_id) VALUES (?, ?)", (thread_id, "1")
+        )
+
+    def insert_then_fail(conn, thread_id):
+        insert(conn, thread_id)
+        raise RuntimeError("bad write")
+
+    futures = [Future(), Future(), Future()]
+    saver._commit(
+        conn,
+        [
+            (insert, ("a",), futures[0]),
+            (insert_then_fail, ("b",), futures[1]),
+            (insert, ("c",), futures[2]),
+        ],
+    )
+
+    assert futures[0].result() is None and futures[2].result() is None
+    with pytest.raises(RuntimeError, match="bad write"):
+        futures[1].result()
+    threads = [r[0] for r in conn.execute("SELECT thread_id FROM checkpoints ORDER BY 1")]
+    assert threads == ["a", "c"]
+    conn.close()
+
+
+def test_sync_async_parity(saver):
+    first = _checkpoint(value=1)
+    saved = saver.put(_config(), first, {"source": "input", "step": -1}, {})
+
+    async def run():
+        second = _checkpoint(first, 1, value=2)
+        await saver.aput(saved, second, {"source": "loop", "step": 0}, {})
+        await saver.aput_writes(
+            _config(checkpoint_id=second["id"]), [("value", 3)], task_id="task"
+        )
+        return (
+            await saver.aget_tuple(_config()),
+            [t async for t in saver.alist(_config())],
+        )
+
+    async_latest, async_listed = asyncio.run(run())
+    sync_latest = saver.get_tuple(_config())
+    assert async_latest == sync_latest
+    assert async_listed == list(saver.list(_config()))
+    assert [t.checkpoint["channel_values"]["value"] for t in async_listed] == [2, 1]
+    assert sync_latest.pending_writes == [("task", "value", 3)]
+
+
+class _State(TypedDict):
+    steps: Annotated[list[str], operator.add]
+
+
+def _graph(saver):
+    graph = StateGraph(_State)
+    graph.add_node("plan", lambda state: {"steps": ["plan"]})
+    graph.add_node("act", lambda state: {"steps": ["act"]})
+    graph.add_edge(START, "plan")
+    graph.add_edge("plan", "act")
+    graph.add_edge("act", END)
+    return graph.compile(checkpointer=saver, interrupt_before=["act"])
+
+
+def test_resume_after_interrupt_and_restart(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    config = {"configurable": {"thread_id": "conversation"}}
+
+    async def first_process():
+        saver = SqliteCheckpointer(path)
+        await saver.setup()
+        graph = _graph(saver)
+        await graph.ainvoke({"steps": []}, config)
+        snapshot = await graph.aget_state(config)
+        await saver.aclose()
+        return snapshot
+
+    async def second_process():
+        saver = SqliteCheckpointer(path)
+        await saver.setup()
+        result = await _graph(saver).ainvoke(None, config)
+        await saver.aclose()
+        return result
+
+    paused = asyncio.run(first_process())
+    assert paused.next == ("act",)
+    assert paused.values == {"steps": ["plan"]}
+    assert asyncio.run(second_process()) == {"steps": ["plan", "act"]}
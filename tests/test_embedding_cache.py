@@ -0,0 +1,56 @@
+import multiprocessing
+
+import numpy as np
+
+from app.agent.vectorstore.embedding_cache import MmapVectorStore, content_key
+
+DIM = 8
+
+
+def _vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(content_key("doc", text)[:4], "little")
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+
+def _writer(directory: str, prefix: str, n: int):
+    store = MmapVectorStore(directory, DIM)
+    for i in range(n):
+        text = f"{prefix}-{i}"
+        store.put_many([(content_key("doc", text), _vector(text))])
+
+
+def test_round_trip_and_reload(tmp_path):
+    store = MmapVectorStore(str(tmp_path), DIM)
+    store.put_many([(content_key("doc", t), _vector(t)) for t in ("a", "b")])
+    reloaded = MmapVectorStore(str(tmp_path), DIM)
+    assert len(reloaded) == 2
+    assert np.array_equal(reloaded.get(content_key("doc", "b")), _vector("b"))
+
+
+def test_sees_rows_appended_by_another_instance(tmp_path):
+    first, second = MmapVectorStore(str(tmp_path), DIM), MmapVectorStore(str(tmp_path), DIM)
+    first.put_many([(content_key("doc", "a"), _vector("a"))])
+    second.put_many([(content_key("doc", "b"), _vector("b"))])
+    first.put_many([(content_key("doc", "c"), _vector("c"))])
+    for text in "abc":
+        assert np.array_equal(first.get(content_key("doc", text)), _vector(text))
+        assert np.array_equal(second.get(content_key("doc", text)), _vector(text))
+
+
+def test_concurrent_processes_never_mix_up_rows(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    writers = [
+        context.Process(target=_writer, args=(str(tmp_path), f"p{p}", 200)) for p in range(4)
+    ]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+        assert w.exitcode == 0
+
+    store = MmapVectorStore(str(tmp_path), DIM)
+    assert len(store) == 800
+    for p in range(4):
+        for i in range(200):
+            text = f"p{p}-{i}"
+            assert np.array_equal(store.get(content_key("doc", text)), _vector(text))
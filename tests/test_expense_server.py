@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.mcp import expense_server
+
+
+class FakeQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def insert(self, rows):
+        self.client.inserted.append(rows)
+        batch = rows if isinstance(rows, list) else [rows]
+        self.data = [{**r, "id": f"e{i}"} for i, r in enumerate(batch)]
+        return self
+
+    def __getattr__(self, _name):
+        # select/eq/gte/lte/or_/order/limit/update: chainable no-ops
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return SimpleNamespace(data=getattr(self, "data", []))
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.inserted = []
+        self.rpcs = []
+        self.rows = []
+
+    def table(self, name):
+        query = FakeQuery(self, name)
+        query.data = self.rows
+        return query
+
+    def rpc(self, name, params):
+        self.rpcs.append(name)
+        totals = [{"total_spent": 300, "expense_count": 3}]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=totals))
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(expense_server, "supabase", fake)
+    return fake
+
+
+def _expense(**overrides):
+    return {
+        "amount": 120,
+        "category": "food",
+        "expense_date": "2024-05-01",
+        "source": "upi",
+        **overrides,
+    }
+
+
+def test_add_expense_rejects_what_bulk_rejects(supabase):
+    result = expense_server.add_expense(user_id="u1", **_expense(amount=-5))
+
+    assert result == {"status": "error", "message": "Amount must be positive"}
+    assert supabase.inserted == []
+
+    bulk = expense_server.add_expenses_bulk("u1", [_expense(amount=-5)])
+    assert bulk["results"][0]["message"] == "Amount must be positive"
+
+
+def test_add_expense_inserts_normalized_row(supabase):
+    result = expense_server.add_expense(user_id="u1", **_expense(source="UPI"))
+
+    assert result["status"] == "success"
+    assert supabase.inserted[0]["source"] == "upi"
+    assert supabase.inserted[0]["amount"] == 120.0
+
+
+def test_bulk_status_reflects_how_many_were_added(supabase):
+    ok, bad = _expense(), _expense(expense_date="yesterday")
+
+    assert expense_server.add_expenses_bulk("u1", [ok, ok])["status"] == "success"
+    assert expense_server.add_expenses_bulk("u1", [ok, bad])["status"] == "partial"
+
+    none_added = expense_server.add_expenses_bulk("u1", [bad, bad])
+    assert none_added["status"] == "error"
+    assert none_added["added_count"] == 0
+
+
+def test_update_expense_rejects_non_positive_amount(supabase):
+    result = expense_server.update_expense(expense_id="e1", user_id="u1", amount=0)
+
+    assert result["status"] == "error"
+
+
+def _page(supabase, **kwargs):
+    return expense_server.get_expenses("u1", "2024-05-01", "2024-05-31", **kwargs)
+
+
+def test_totals_are_computed_for_the_first_page_only(supabase):
+    supabase.rows = [
+        {"id": f"e{i}", "expense_date": f"2024-05-0{3 - i}"} for i in range(3)
+    ]
+
+    first = _page(supabase, limit=2)
+    assert (first["total"], first["count"]) == (300, 3)
+    assert supabase.rpcs == ["expense_totals"]
+
+    second = _page(supabase, limit=2, cursor=first["next_cursor"])
+    assert "total" not in second and len(second["expenses"]) == 2
+    assert supabase.rpcs == ["expense_totals"]
+
+    assert _page(supabase, totals_only=True) == {"total": 300, "count": 3}
+    assert supabase.rpcs == ["expense_totals"] * 2
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "bm90IGpzb24=",  # "not json"
+        expense_server.base64.urlsafe_b64encode(b'["2024-05-01"]').decode(),
+        expense_server.base64.urlsafe_b64encode(b'["yesterday", "e1"]').decode(),
+        expense_server.base64.urlsafe_b64encode(
+            b'["2024-05-01", "e1,id.gt.0"]'
+        ).decode(),
+    ],
+)
+def test_malformed_cursor_returns_error(supabase, cursor):
+    result = _page(supabase, cursor=cursor)
+
+    assert result == {"status": "error", "message": "Invalid cursor"}
+    assert supabase.rpcs == []
@@ -0,0 +1,58 @@
+import os
+
+from app.importer.pipeline import ImportPipeline
+from app.importer.stores import SqliteExpenseStore
+
+
+def _statement(path, rows: int):
+    with open(path, "w") as f:
+        f.write("date,amount,description\n")
+        for i in range(rows):
+            f.write(f"2024-03-{i % 28 + 1:02d},-{i + 1}.00,Cafe {i}\n")
+
+
+def test_resume_state_is_keyed_by_file_contents(tmp_path):
+    statement, state = tmp_path / "statement.csv", tmp_path / "state.json"
+    _statement(statement, 30)
+    pipeline = ImportPipeline(SqliteExpenseStore(), "u1", batch_size=10, state_path=str(state))
+
+    pipeline._save_state(str(statement), 20)
+    assert pipeline._load_state(str(statement)) == 20
+
+    # Same path, different statement: start from the top
+    _statement(statement, 40)
+    assert pipeline._load_state(str(statement)) == 0
+
+
+def test_state_removed_after_a_complete_run(tmp_path):
+    statement, state = tmp_path / "statement.csv", tmp_path / "state.json"
+    _statement(statement, 30)
+    store = SqliteExpenseStore()
+
+    stats = ImportPipeline(store, "u1", batch_size=10, state_path=str(state)).run(str(statement))
+    assert stats.inserted == 30
+    assert not os.path.exists(state)
+
+    # A second run re-reads the file and de-duplicates instead of skipping it
+    stats = ImportPipeline(store, "u1", batch_size=10, state_path=str(state)).run(str(statement))
+    assert (stats.records_read, stats.inserted, stats.duplicates) == (30, 0, 30)
+
+
+def test_same_day_repeats_in_an_unsorted_statement_are_kept(tmp_path):
+    statement = tmp_path / "statement.csv"
+    with open(statement, "w") as f:
+        f.write("date,amount,description\n")
+        f.write("2024-03-05,-120.00,Cafe Coffee\n")
+        f.write("2024-03-06,-40.00,Metro\n")
+        f.write("2024-03-10,-99.00,Pharmacy\n")
+        f.write("2024-03-11,-60.00,Uber\n")
+        # Out of order: the same coffee again, two batches later
+        f.write("2024-03-05,-120.00,Cafe Coffee\n")
+        f.write("2024-03-12,-30.00,Metro\n")
+    store = SqliteExpenseStore()
+
+    stats = ImportPipeline(store, "u1", batch_size=2).run(str(statement))
+    assert (stats.inserted, stats.duplicates) == (6, 0)
+
+    stats = ImportPipeline(store, "u1", batch_size=2).run(str(statement))
+    assert (stats.inserted, stats.duplicates) == (0, 6)
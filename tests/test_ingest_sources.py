@@ -0,0 +1,21 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.agent.vectorstore.ingest import iter_sources
+
+
+def test_document_text_is_never_read_as_a_path(tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("do not ingest")
+    assert list(iter_sources([Document(page_content=str(secret))])) == [(str(secret), None)]
+
+
+def test_paths_are_read(tmp_path):
+    (tmp_path / "a.md").write_text("alpha")
+    (tmp_path / "skip.bin").write_text("beta")
+    assert list(iter_sources([tmp_path])) == [("alpha", str(tmp_path / "a.md"))]
+
+
+def test_missing_path_is_an_error():
+    with pytest.raises(FileNotFoundError):
+        list(iter_sources(["Reimbursements need a receipt."]))
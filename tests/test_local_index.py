@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.agent.vectorstore.local_index import LocalVectorIndex, _normalize
+
+DIM = 64
+
+
+def _corpus(rows: int = 2000, queries: int = 50, seed: int = 0):
+    # Clustered vectors, like real embeddings; queries are noisy corpus rows
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, DIM))
+    corpus = centers[rng.integers(20, size=rows)] + 0.5 * rng.standard_normal((rows, DIM))
+    picks = rng.choice(rows, queries, replace=False)
+    q = corpus[picks] + 0.3 * rng.standard_normal((queries, DIM))
+    return corpus.astype(np.float32), q.astype(np.float32)
+
+
+def _fill(index: LocalVectorIndex, corpus: np.ndarray):
+    ids = [str(i) for i in range(len(corpus))]
+    index.add(ids, corpus, [f"text {i}" for i in ids], [{"n": int(i)} for i in ids])
+
+
+def _recall(index: LocalVectorIndex, corpus, queries, k: int = 5) -> float:
+    exact = np.argsort(-(_normalize(queries) @ _normalize(corpus).T), axis=1)[:, :k]
+    hits = index.search(queries, k)
+    found = [{int(doc["id"]) for doc, _ in hit} for hit in hits]
+    return float(np.mean([len(f & set(t.tolist())) / k for f, t in zip(found, exact)]))
+
+
+def test_round_trip(tmp_path):
+    corpus, queries = _corpus(200, 5)
+    _fill(LocalVectorIndex(str(tmp_path), DIM), corpus)
+
+    reopened = LocalVectorIndex(str(tmp_path), DIM)
+    assert reopened.count == 200
+    doc, score = reopened.search(corpus[7], 1)[0][0]
+    assert doc == {"row": 7, "id": "7", "text": "text 7", "metadata": {"n": 7}}
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_update_in_place(tmp_path):
+    corpus, _ = _corpus(100, 1)
+    index = LocalVectorIndex(str(tmp_path), DIM, "int8")
+    _fill(index, corpus)
+
+    index.add(["3"], corpus[50][None, :], ["moved"])
+    assert index.count == 100
+    reopened = LocalVectorIndex(str(tmp_path), DIM, "int8")
+    assert reopened.count == 100
+    top = [d["id"] for d, _ in reopened.search(corpus[50], 2)[0]]
+    assert set(top) == {"3", "50"}
+    assert reopened.docs[3]["text"] == "moved"
+
+
+@pytest.mark.parametrize("dtype, rerank, floor", [("int8", 4, 0.95), ("binary", 10, 0.85)])
+def test_quantized_recall(tmp_path, dtype, rerank, floor):
+    corpus, queries = _corpus()
+    index = LocalVectorIndex(str(tmp_path), DIM, dtype, rerank)
+    _fill(index, corpus)
+    assert _recall(index, corpus, queries) >= floor
+
+
+def test_ivf_recall(tmp_path):
+    corpus, queries = _corpus()
+    index = LocalVectorIndex(str(tmp_path), DIM)
+    _fill(index, corpus)
+    index.build_ivf(nlist=20, nprobe=6)
+    assert _recall(index, corpus, queries) >= 0.9
+
+    # Appended rows are searchable through the partitions too
+    index.add(["new"], corpus[11][None, :] * -1, ["new"])
+    assert index.search(-corpus[11], 1)[0][0][0]["id"] == "new"
+
+
+def test_orphan_rows_after_a_crash_are_dropped(tmp_path):
+    corpus, _ = _corpus(10, 1)
+    index = LocalVectorIndex(str(tmp_path), DIM, "int8")
+    _fill(index, corpus[:5])
+
+    # Crash after appending rows but before meta.json was saved
+    row_sizes = ((index.vectors_path, DIM), (index.scales_path, 4), (index.originals_path, DIM * 4))
+    for path, size in row_sizes:
+        with open(path, "ab") as f:
+            f.write(b"\0" * size * 3)
+
+    recovered = LocalVectorIndex(str(tmp_path), DIM, "int8")
+    recovered.add(["5"], corpus[5][None, :], ["text 5"])
+    assert recovered.count == 6
+    assert recovered.search(corpus[5], 1)[0][0][0]["id"] == "5"
+    reopened = LocalVectorIndex(str(tmp_path), DIM, "int8")
+    assert reopened.search(corpus[5], 1)[0][0][0]["id"] == "5"
@@ -0,0 +1,61 @@
+import pytest
+
+from app.importer.normalize import normalize_record, parse_amount
+
+
+def _csv(row: dict, **kwargs) -> dict | None:
+    return normalize_record(row, "csv", **kwargs)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("₹1,234.50", 1234.50),
+        ("-12", -12.0),
+        ("(12.00)", -12.0),
+        ("12.00 DR", -12.0),
+        ("12.00Dr", -12.0),
+        ("12.00 CR", 12.0),
+        ("1,200.00 Cr.", 1200.0),
+        ("", None),
+        ("CR", None),
+    ],
+)
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
+
+
+def test_signed_column_negative_is_spend_by_default():
+    spend = _csv({"date": "2024-03-01", "amount": "-250.00", "description": "Swiggy"})
+    assert spend["amount"] == 250.0
+    assert spend["category"] == "food"
+    assert _csv({"date": "2024-03-02", "amount": "5000.00", "description": "Salary"}) is None
+
+
+def test_signed_column_positive_convention():
+    spend = _csv({"date": "2024-03-01", "amount": "250.00"}, amount_sign="positive")
+    assert spend["amount"] == 250.0
+    refund = _csv({"date": "2024-03-02", "amount": "-250.00"}, amount_sign="positive")
+    assert refund is None
+
+
+def test_dr_cr_suffix_overrides_column_convention():
+    for sign in ("negative", "positive"):
+        assert _csv({"date": "2024-03-01", "amount": "99.00 DR"}, amount_sign=sign)["amount"] == 99.0
+        assert _csv({"date": "2024-03-01", "amount": "99.00 CR"}, amount_sign=sign) is None
+
+
+def test_direction_column():
+    row = {"date": "2024-03-01", "amount": "40.00", "dr/cr": "DR"}
+    assert _csv(row)["amount"] == 40.0
+    assert _csv({**row, "dr/cr": "CR"}) is None
+
+
+def test_separate_debit_credit_columns():
+    header = {"date": "2024-03-01", "narration": "Uber trip"}
+    spend = _csv({**header, "withdrawal amt.": "180.00", "deposit amt.": ""})
+    assert spend["amount"] == 180.0
+    assert spend["category"] == "transport"
+    # Credit-only rows, whatever the credit column is called
+    for column in ("credit", "deposit", "deposit amt.", "credit amount"):
+        assert _csv({**header, "withdrawal amt.": "", column: "500.00"}) is None
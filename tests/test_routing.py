@@ -0,0 +1,46 @@
+import pytest
+
+from app.agent.routing import fast_route
+
+
+@pytest.mark.parametrize("text", ["thanks", "Thank you so much!", "thx", "many thanks"])
+def test_explicit_thanks_end_the_turn(text):
+    assert fast_route(text).path == "rule:thanks"
+
+
+@pytest.mark.parametrize("text", ["ok", "okay", "cool", "great", "nice", "got it", "yes"])
+def test_acknowledgements_route_to_answer(text):
+    # Their meaning depends on the previous turn, which only answer sees
+    assert fast_route(text) == ("answer", None, "rule:ack")
+
+
+def test_may_is_not_a_date():
+    assert fast_route("may I see the travel policy summary") is None
+
+
+def test_ok_after_a_question_goes_to_answer_without_llm_or_cache(monkeypatch):
+    import asyncio
+
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from app.agent import nodes
+
+    class Unreachable:
+        def __call__(self, *args, **kwargs):
+            raise AssertionError("bare acknowledgement must not reach router_llm or the cache")
+
+        ainvoke = __call__
+
+    monkeypatch.setattr(nodes, "router_llm", Unreachable())
+    monkeypatch.setattr(nodes, "get_semantic_cache", Unreachable())
+
+    state = {
+        "messages": [
+            HumanMessage(content="lunch 250 upi"),
+            AIMessage(content="Shall I add ₹250 for lunch (UPI, today)?"),
+            HumanMessage(content="ok"),
+        ],
+        "web_search_enabled": False,
+    }
+    out = asyncio.run(nodes.router_node(state, {"configurable": {"thread_id": "t"}}))
+    assert out["route"] == "answer"
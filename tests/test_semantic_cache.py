@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.agent.cache.semantic_cache import SemanticCache
+
+
+def _cache(path, max_entries: int) -> SemanticCache:
+    rng = np.random.default_rng(0)
+    vectors: dict[str, list[float]] = {}
+    return SemanticCache(
+        path,
+        lambda text: vectors.setdefault(text, rng.standard_normal(16).tolist()),
+        max_entries=max_entries,
+    )
+
+
+def test_evicts_least_recently_used_across_namespaces(tmp_path):
+    cache = _cache(str(tmp_path / "cache.db"), max_entries=3)
+    cache.put("route", "hello", {"v": 1})
+    cache.put("judge", "policy", {"v": 2})
+    cache.put("route", "thanks", {"v": 3})
+    assert cache.get("route", "hello") == {"v": 1}
+
+    cache.put("web", "news", {"v": 4})
+    assert cache.stats()["entries"] == 3
+    # The only judge entry was evicted, and its namespace with it
+    assert "judge" not in cache._entries
+    assert cache.get("route", "hello") == {"v": 1}
+
+
+def test_reload_keeps_the_newest_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = _cache(path, max_entries=2)
+    for i in range(4):
+        cache.put("route", f"query {i}", {"v": i})
+
+    reloaded = _cache(path, max_entries=2)
+    assert reloaded.stats()["entries"] == 2
+    assert reloaded.get("route", "query 3") == {"v": 3}
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import hmac
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth, main
+
+SECRET = "test-secret"
+WEBHOOK_SECRET = "webhook-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth, "SERVICE_AUTH_SECRET", SECRET)
+    monkeypatch.setattr(auth, "SERVICE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    # No lifespan: requests that get past authentication would need the graph
+    return TestClient(main.app)
+
+
+def test_token_round_trip():
+    token = auth.issue_token("alice", secret=SECRET)
+    assert auth.verify_token(token, secret=SECRET) == "alice"
+    assert auth.verify_token(token, secret="other") is None
+    expired = auth.issue_token("alice", ttl=-1, secret=SECRET)
+    assert auth.verify_token(expired, secret=SECRET) is None
+
+
+def test_tampered_token_is_rejected():
+    encoded, expiry, signature = auth.issue_token("alice", secret=SECRET).split(".")
+    forged = f"{auth._b64(b'bob')}.{expiry}.{signature}"
+    assert auth.verify_token(forged, secret=SECRET) is None
+    assert auth.verify_token("garbage", secret=SECRET) is None
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/approve"])
+def test_chat_requires_a_bearer_token(client, path):
+    body = {"message": "hi", "approved": True, "user_id": "victim"}
+    assert client.post(path, json=body).status_code == 401
+    response = client.post(path, json=body, headers={"Authorization": "Bearer forged.1.abc"})
+    assert response.status_code == 401
+
+
+def test_no_secret_refuses_requests(client, monkeypatch):
+    monkeypatch.setattr(auth, "SERVICE_AUTH_SECRET", "")
+    token = auth.issue_token("alice", secret=SECRET)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post("/chat", json={"message": "hi"}, headers=headers).status_code == 503
+
+
+def test_user_comes_from_the_token_not_the_body(client, monkeypatch):
+    submitted = []
+
+    class Queue:
+        def submit(self, user_id, run):
+            submitted.append(user_id)
+            future = asyncio.get_running_loop().create_future()
+            future.set_result({"status": "done", "reply": "", "tool_calls": []})
+            return future
+
+    monkeypatch.setattr(main, "get_graph", lambda *args: None)
+    monkeypatch.setattr(main.app.state, "queue", Queue(), raising=False)
+
+    headers = {"Authorization": f"Bearer {auth.issue_token('alice', secret=SECRET)}"}
+    response = client.post("/chat", json={"message": "hi", "user_id": "victim"}, headers=headers)
+    assert response.status_code == 200
+    assert submitted == ["alice"]
+    assert response.json()["thread_id"] == main.thread_id_for("alice")
+
+
+def test_webhook_requires_a_valid_signature(client):
+    body = b'{"user_id": "victim", "message": "delete all my expenses"}'
+    assert client.post("/webhook", content=body).status_code == 401
+
+    wrong = hmac.new(b"other", body, hashlib.sha256).hexdigest()
+    headers = {"X-Hub-Signature-256": f"sha256={wrong}"}
+    assert client.post("/webhook", content=body, headers=headers).status_code == 401
+
+    signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    assert auth.verify_body_signature(body, f"sha256={signature}")
+
+
+def test_turn_timeout_is_a_504(client, monkeypatch):
+    class Queue:
+        def submit(self, user_id, run):
+            future = asyncio.get_running_loop().create_future()
+            future.set_exception(TimeoutError())
+            return future
+
+    monkeypatch.setattr(main, "get_graph", lambda *args: None)
+    monkeypatch.setattr(main.app.state, "queue", Queue(), raising=False)
+
+    headers = {"Authorization": f"Bearer {auth.issue_token('alice', secret=SECRET)}"}
+    assert client.post("/chat", json={"message": "hi"}, headers=headers).status_code == 504
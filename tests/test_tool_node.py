@@ -0,0 +1,57 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from app.agent import nodes
+from app.agent.state import AgentState
+
+
+def _run_tools(tool_calls: list[dict], configurable: dict) -> list:
+    # ToolNode needs a graph run around it
+    graph = StateGraph(AgentState)
+    graph.add_node("tools", nodes.tool_node)
+    graph.add_edge(START, "tools")
+    graph.add_edge("tools", END)
+    state = {
+        "messages": [
+            HumanMessage(content="delete everything"),
+            AIMessage(content="", tool_calls=tool_calls, id="ai-1"),
+        ]
+    }
+    result = asyncio.run(graph.compile().ainvoke(state, {"configurable": configurable}))
+    return result["messages"]
+
+
+def test_user_scoped_calls_fail_closed_without_a_user(monkeypatch):
+    monkeypatch.setattr(nodes, "USER_SCOPED_TOOLS", {"delete_expense"})
+    calls = [{"name": "delete_expense", "args": {"user_id": "victim", "id": 1}, "id": "c1"}]
+
+    messages = _run_tools(calls, {"thread_id": "t"})
+
+    reply = messages[-1]
+    assert reply.tool_call_id == "c1"
+    assert reply.status == "error"
+    assert "not run" in reply.content
+    # The model's call stays in history untouched; it has its answer
+    assert messages[1].tool_calls[0]["args"]["user_id"] == "victim"
+
+
+def test_user_id_is_bound_from_the_config(monkeypatch):
+    from langchain_core.tools import tool
+    from langgraph.prebuilt import ToolNode
+
+    @tool
+    def delete_expense(user_id: str, id: int) -> str:
+        """Delete one expense"""
+        return f"deleted {id} for {user_id}"
+
+    monkeypatch.setattr(nodes, "USER_SCOPED_TOOLS", {"delete_expense"})
+    monkeypatch.setattr(nodes, "base_tool_node", ToolNode([delete_expense]))
+    calls = [{"name": "delete_expense", "args": {"user_id": "victim", "id": 1}, "id": "c1"}]
+
+    messages = _run_tools(calls, {"thread_id": "t", "user_id": "alice"})
+
+    assert messages[-1].content == "deleted 1 for alice"
+    # The stored call is rewritten too, so history matches what ran
+    assert messages[1].tool_calls[0]["args"]["user_id"] == "alice"